@@ -7,6 +7,7 @@ const roundService = require('../services/round-service');
 const matchService = require('../services/match-service');
 const predictionService = require('../services/prediction-service');
 const predictorService = require('../services/predictor-service');
+const scheduleService = require('../services/schedule-service');
 const { catchAsync, createValidationError, createNotFoundError } = require('../utils/error-handler');
 const { logger } = require('../utils/logger');
 
@@ -221,6 +222,9 @@ router.get('/stats', catchAsync(async (req, res) => {
     }
   });
   
+  // Strength of schedule precomputed by the ELO replay
+  const scheduleStrength = await scheduleService.getScheduleStrengthForYear(selectedYear);
+  
   // Filter out admin users from leaderboard
   const filteredPredictorStats = predictorStats.filter(stat => {
     const predictor = predictors.find(p => p.predictor_id === stat.id);
@@ -244,6 +248,7 @@ router.get('/stats', catchAsync(async (req, res) => {
     predictorStats: filteredPredictorStats,
     completedMatches,
     userPredictions,
+    scheduleStrength,
     currentUser: req.session.user
   });
 }));
@@ -0,0 +1,278 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+
+METRICS = ['accuracy', 'brier_score', 'log_loss', 'bits']
+
+# Resampled groups drawn per block of work (bounds the size of the resampling matrices)
+RESAMPLE_BLOCK_SIZE = 1 << 22
+
+
+def match_metrics(probs, results):
+    """
+    Per-match accuracy, Brier score, log loss and bits
+
+    Accuracy counts draws as correct and log loss clips probabilities to
+    [0.001, 0.999], as in AFLEloModel.evaluate_model. Bits follow the
+    Squiggle definition: 1 + log2 of the probability given to the winner
+    (1 + log2(p(1 - p)) / 2 for a draw).
+
+    Parameters:
+    -----------
+    probs: numpy array
+        Home win probabilities, either one per match or (matches x candidates)
+    results: numpy array
+        Actual results (1 for home win, 0 for away win, 0.5 for draw), one per match
+
+    Returns:
+    --------
+    dict of arrays with the same shape as probs
+    """
+    probs = np.asarray(probs, dtype=float)
+    results = np.asarray(results, dtype=float)
+    if probs.ndim == 2:
+        results = results[:, None]
+    clipped = np.clip(probs, 0.001, 0.999)
+    draw = results == 0.5
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return {
+            'accuracy': (((probs >= 0.5) & (results == 1.0)) | ((probs < 0.5) & (results == 0.0)) | draw).astype(float),
+            'brier_score': (probs - results) ** 2,
+            'log_loss': np.where(results == 1.0, -np.log(clipped),
+                                 np.where(results == 0.0, -np.log(1 - clipped), -np.log(1 - np.abs(0.5 - clipped)))),
+            'bits': np.where(draw, 1 + 0.5 * np.log2(clipped * (1 - clipped)),
+                             1 + np.log2(np.where(results == 1.0, clipped, 1 - clipped)))
+        }
+
+
+def _resample_means(values, groups, n_groups, n_resamples, seed):
+    """
+    Metric means for a block of resamples
+
+    Each resample draws n_groups groups (seasons, or single matches) with
+    replacement, expressed as a count per group, so the resampled means are
+    one matrix product over the per-group totals.
+    """
+    rng = np.random.default_rng(seed)
+    group_sizes = np.bincount(groups, minlength=n_groups).astype(float)
+    group_totals = np.stack([np.bincount(groups, weights=column, minlength=n_groups) for column in values.T], axis=1)
+
+    # Histogram the drawn groups of all resamples in one bincount
+    draws = rng.integers(0, n_groups, size=(n_resamples, n_groups))
+    draws += np.arange(n_resamples)[:, None] * n_groups
+    counts = np.bincount(draws.ravel(), minlength=n_resamples * n_groups).reshape(n_resamples, n_groups).astype(float)
+    return (counts @ group_totals) / (counts @ group_sizes)[:, None]
+
+
+def bootstrap_means(values, groups=None, n_resamples=1000, seed=None, n_jobs=1):
+    """
+    Bootstrap distribution of the mean of per-match values
+
+    Parameters:
+    -----------
+    values: numpy array
+        Per-match values, one column per series (matches x series)
+    groups: numpy array
+        Resampling block for each match (e.g. season), or None to resample matches
+    n_resamples: int
+        Number of bootstrap resamples
+    seed: int
+        Seed for reproducible resamples (results do not depend on n_jobs)
+    n_jobs: int
+        Number of worker processes (1 to run in this process)
+
+    Returns:
+    --------
+    numpy array of resampled means (resamples x series)
+    """
+    values = np.asarray(values, dtype=float).reshape(len(values), -1)
+    if groups is None:
+        groups = np.arange(len(values))
+        n_groups = len(values)
+    else:
+        _, groups = np.unique(np.asarray(groups), return_inverse=True)
+        n_groups = groups.max() + 1
+
+    block = max(1, RESAMPLE_BLOCK_SIZE // n_groups)
+    sizes = [min(block, n_resamples - start) for start in range(0, n_resamples, block)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = [(values, groups, n_groups, size, block_seed) for size, block_seed in zip(sizes, seeds)]
+
+    if n_jobs == 1 or len(args) == 1:
+        blocks = [_resample_means(*block_args) for block_args in args]
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs if n_jobs > 0 else os.cpu_count()) as executor:
+            blocks = list(executor.map(_resample_means, *zip(*args)))
+    return np.concatenate(blocks)
+
+
+def bootstrap_metrics(probs, results, years=None, block='season', n_resamples=1000, confidence=0.95, seed=None,
+                      n_jobs=1):
+    """
+    Bootstrap confidence intervals for accuracy, Brier score, log loss and bits
+
+    Parameters:
+    -----------
+    probs: numpy array
+        Home win probabilities, one per match or (matches x candidates)
+    results: numpy array
+        Actual results (1 for home win, 0 for away win, 0.5 for draw)
+    years: numpy array
+        Season of each match (required for season-block resampling)
+    block: str
+        'season' to resample whole seasons (keeps within-season dependence),
+        or 'match' to resample individual matches
+    n_resamples: int
+        Number of bootstrap resamples
+    confidence: float
+        Confidence level of the percentile intervals
+    seed: int
+        Seed for reproducible resamples
+    n_jobs: int
+        Number of worker processes (-1 for all cores)
+
+    Returns:
+    --------
+    dict mapping each metric to a dict of estimate, lower and upper (floats,
+    or arrays with one value per candidate for 2-D probs)
+    """
+    samples = _bootstrap_metric_samples(probs, results, years, block, n_resamples, seed, n_jobs)
+    return {metric: _interval(estimate, draws, confidence) for metric, (estimate, draws) in samples.items()}
+
+
+def bootstrap_differences(probs, results, years=None, block='season', n_resamples=1000, confidence=0.95, seed=None,
+                          n_jobs=1):
+    """
+    Paired bootstrap of metric differences between candidates and the first candidate
+
+    Every candidate is scored on the same resamples, so the intervals reflect
+    the difference between models rather than the spread of each.
+
+    Parameters:
+    -----------
+    probs: numpy array
+        Home win probabilities (matches x candidates); column 0 is the reference
+    (other parameters as for bootstrap_metrics)
+
+    Returns:
+    --------
+    dict mapping each metric to a dict of estimate, lower and upper arrays
+    (candidate minus reference, one value per other candidate) and
+    prob_better, the share of resamples in which the candidate beats the reference
+    """
+    samples = _bootstrap_metric_samples(probs, results, years, block, n_resamples, seed, n_jobs)
+    differences = {}
+    for metric, (estimate, draws) in samples.items():
+        diff_draws = draws[:, 1:] - draws[:, [0]]
+        interval = _interval(estimate[1:] - estimate[0], diff_draws, confidence)
+        # Higher is better for accuracy and bits, lower for Brier score and log loss
+        better = diff_draws > 0 if metric in ('accuracy', 'bits') else diff_draws < 0
+        interval['prob_better'] = better.mean(axis=0)
+        differences[metric] = interval
+    return differences
+
+
+def _bootstrap_metric_samples(probs, results, years, block, n_resamples, seed, n_jobs):
+    """Point estimates and resampled means of every metric"""
+    if block not in ('season', 'match'):
+        raise ValueError(f"Unknown bootstrap block '{block}', expected 'season' or 'match'")
+    if block == 'season' and years is None:
+        raise ValueError("Season-block resampling needs the season of each match")
+
+    probs = np.asarray(probs, dtype=float)
+    metrics = match_metrics(probs, results)
+    n_matches = len(probs)
+    n_series = 1 if probs.ndim == 1 else probs.shape[1]
+
+    # Resample every metric for every candidate together
+    values = np.concatenate([metrics[metric].reshape(n_matches, n_series) for metric in METRICS], axis=1)
+    draws = bootstrap_means(values, groups=years if block == 'season' else None, n_resamples=n_resamples, seed=seed,
+                            n_jobs=n_jobs)
+    estimates = values.mean(axis=0)
+
+    samples = {}
+    for i, metric in enumerate(METRICS):
+        columns = slice(i * n_series, (i + 1) * n_series)
+        samples[metric] = (estimates[columns], draws[:, columns])
+    if probs.ndim == 1:
+        samples = {metric: (estimate[0], metric_draws[:, 0]) for metric, (estimate, metric_draws) in samples.items()}
+    return samples
+
+
+def _interval(estimate, draws, confidence):
+    """Percentile interval from resampled values"""
+    tail = (1 - confidence) / 2 * 100
+    lower, upper = np.percentile(draws, [tail, 100 - tail], axis=0)
+    return {'estimate': estimate, 'lower': lower, 'upper': upper}
+
+
+def load_predictions(filename):
+    """Completed matches from a predictions CSV as (probabilities, results, years, match IDs)"""
+    predictions = pd.read_csv(filename)
+    predictions = predictions[predictions['hscore'].notna() & predictions['ascore'].notna()]
+    results = np.where(predictions['hscore'] > predictions['ascore'], 1.0,
+                       np.where(predictions['hscore'] < predictions['ascore'], 0.0, 0.5))
+    return (predictions['home_win_probability'].to_numpy(dtype=float), results, predictions['year'].to_numpy(),
+            predictions['match_id'].to_numpy())
+
+
+def main():
+    """Main function to bootstrap confidence intervals for saved predictions"""
+    parser = argparse.ArgumentParser(description='Bootstrap confidence intervals for AFL ELO prediction metrics')
+    parser.add_argument('predictions', type=str, nargs='+',
+                        help='Predictions CSV(s); with several files, differences against the first are reported '
+                             '(matched on match_id)')
+    parser.add_argument('--block', type=str, default='season', choices=['season', 'match'],
+                        help='Resample whole seasons or individual matches')
+    parser.add_argument('--resamples', type=int, default=2000,
+                        help='Number of bootstrap resamples')
+    parser.add_argument('--confidence', type=float, default=0.95,
+                        help='Confidence level of the intervals')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='Random seed for reproducible intervals')
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='Number of worker processes (-1 for all cores)')
+
+    args = parser.parse_args()
+
+    probs, results, years, match_ids = load_predictions(args.predictions[0])
+    columns = [probs]
+    for filename in args.predictions[1:]:
+        other_probs, _, _, other_ids = load_predictions(filename)
+        lookup = pd.Series(other_probs, index=other_ids)
+        keep = np.isin(match_ids, other_ids)
+        probs, results, years, match_ids = probs[keep], results[keep], years[keep], match_ids[keep]
+        columns = [column[keep] for column in columns] + [lookup.loc[match_ids].to_numpy()]
+    probs = np.column_stack(columns)
+
+    level = f"{args.confidence:.0%}"
+    print(f"Bootstrapping {len(probs)} matches ({args.block} blocks, {args.resamples} resamples)")
+
+    intervals = bootstrap_metrics(probs, results, years, block=args.block, n_resamples=args.resamples,
+                                  confidence=args.confidence, seed=args.seed, n_jobs=args.jobs)
+    for i, filename in enumerate(args.predictions):
+        print(f"\n{filename}:")
+        for metric in METRICS:
+            interval = intervals[metric]
+            print(f"  {metric}: {interval['estimate'][i]:.4f} "
+                  f"({level} CI {interval['lower'][i]:.4f} to {interval['upper'][i]:.4f})")
+
+    if len(args.predictions) > 1:
+        differences = bootstrap_differences(probs, results, years, block=args.block, n_resamples=args.resamples,
+                                            confidence=args.confidence, seed=args.seed, n_jobs=args.jobs)
+        for i, filename in enumerate(args.predictions[1:]):
+            print(f"\n{filename} minus {args.predictions[0]}:")
+            for metric in METRICS:
+                difference = differences[metric]
+                print(f"  {metric}: {difference['estimate'][i]:+.4f} "
+                      f"({level} CI {difference['lower'][i]:+.4f} to {difference['upper'][i]:+.4f}, "
+                      f"better in {difference['prob_better'][i]:.0%} of resamples)")
+
+
+if __name__ == "__main__":
+    main()
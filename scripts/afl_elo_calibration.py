@@ -0,0 +1,218 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+
+
+# Confidence bands (probability of the predicted winner) for the breakdown
+CONFIDENCE_BANDS = [0.5, 0.6, 0.7, 0.8, 0.9, 1.0]
+
+
+def _group_bin_sums(probs, results, n_bins, groups, n_groups):
+    """
+    Histogram predictions into equal-width probability bins within each group
+
+    Returns (n_groups, n_bins) arrays of prediction counts, summed
+    probabilities and summed results.
+    """
+    bins = np.minimum((probs * n_bins).astype(np.int64), n_bins - 1)
+    index = groups * n_bins + bins
+    size = n_groups * n_bins
+    counts = np.bincount(index, minlength=size).reshape(n_groups, n_bins)
+    prob_sums = np.bincount(index, weights=probs, minlength=size).reshape(n_groups, n_bins)
+    result_sums = np.bincount(index, weights=results, minlength=size).reshape(n_groups, n_bins)
+    return counts, prob_sums, result_sums
+
+
+def match_results(hscore, ascore):
+    """Actual results (1 for home win, 0 for away win, 0.5 for draw)"""
+    hscore = np.asarray(hscore, dtype=float)
+    ascore = np.asarray(ascore, dtype=float)
+    return np.where(hscore > ascore, 1.0, np.where(hscore < ascore, 0.0, 0.5))
+
+
+def expected_calibration_error(probs, results, n_bins=10):
+    """
+    Expected calibration error of home win probabilities
+
+    The gap between the mean predicted probability and the observed home win
+    rate in each equal-width bin, weighted by the share of matches in the
+    bin (draws count as half a win).
+
+    Parameters:
+    -----------
+    probs: numpy array
+        Home win probabilities, either one per match or (matches x candidates)
+        to score many candidate models at once
+    results: numpy array
+        Actual results (1 for home win, 0 for away win, 0.5 for draw), one per match
+    n_bins: int
+        Number of probability bins
+
+    Returns:
+    --------
+    float, or an array with one value per candidate for 2-D probs
+    """
+    probs = np.asarray(probs, dtype=float)
+    results = np.asarray(results, dtype=float)
+    if probs.ndim == 1:
+        return float(expected_calibration_error(probs[:, None], results, n_bins)[0])
+
+    n_matches, n_candidates = probs.shape
+    groups = np.broadcast_to(np.arange(n_candidates), probs.shape).ravel()
+    _, prob_sums, result_sums = _group_bin_sums(probs.ravel(), np.broadcast_to(results[:, None], probs.shape).ravel(),
+                                                n_bins, groups, n_candidates)
+    return np.abs(prob_sums - result_sums).sum(axis=1) / n_matches
+
+
+def reliability_bins(probs, results, n_bins=10):
+    """
+    Reliability diagram data for home win probabilities
+
+    Returns:
+    --------
+    pandas DataFrame with one row per bin: bin bounds, match count, mean
+    predicted probability and observed home win rate (NaN for empty bins)
+    """
+    probs = np.asarray(probs, dtype=float)
+    counts, prob_sums, result_sums = _group_bin_sums(probs, np.asarray(results, dtype=float), n_bins,
+                                                     np.zeros(len(probs), dtype=np.int64), 1)
+    counts, prob_sums, result_sums = counts[0], prob_sums[0], result_sums[0]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return pd.DataFrame({
+            'bin_lower': np.arange(n_bins) / n_bins,
+            'bin_upper': np.arange(1, n_bins + 1) / n_bins,
+            'matches': counts,
+            'mean_probability': prob_sums / counts,
+            'observed_frequency': result_sums / counts
+        })
+
+
+def season_breakdown(probs, results, years, n_bins=10):
+    """
+    Calibration and accuracy by season
+
+    Returns:
+    --------
+    pandas DataFrame with one row per season: match count, Brier score,
+    expected calibration error, mean home win probability and observed home win rate
+    """
+    probs = np.asarray(probs, dtype=float)
+    results = np.asarray(results, dtype=float)
+    seasons, groups = np.unique(np.asarray(years), return_inverse=True)
+    counts, prob_sums, result_sums = _group_bin_sums(probs, results, n_bins, groups, len(seasons))
+    matches = counts.sum(axis=1)
+    return pd.DataFrame({
+        'year': seasons,
+        'matches': matches,
+        'brier_score': np.bincount(groups, weights=(probs - results) ** 2) / matches,
+        'ece': np.abs(prob_sums - result_sums).sum(axis=1) / matches,
+        'mean_probability': prob_sums.sum(axis=1) / matches,
+        'observed_frequency': result_sums.sum(axis=1) / matches
+    })
+
+
+def confidence_breakdown(probs, results, bands=CONFIDENCE_BANDS):
+    """
+    Accuracy by confidence band (probability given to the predicted winner)
+
+    Draws count as correct, as in AFLEloModel.evaluate_model.
+
+    Returns:
+    --------
+    pandas DataFrame with one row per band: band bounds, match count, mean
+    confidence, accuracy and the gap between them (NaN for empty bands)
+    """
+    probs = np.asarray(probs, dtype=float)
+    results = np.asarray(results, dtype=float)
+    confidence = np.maximum(probs, 1 - probs)
+    correct = ((probs >= 0.5) & (results == 1.0)) | ((probs < 0.5) & (results == 0.0)) | (results == 0.5)
+
+    edges = np.asarray(bands, dtype=float)
+    band = np.clip(np.searchsorted(edges, confidence, side='right') - 1, 0, len(edges) - 2)
+    counts = np.bincount(band, minlength=len(edges) - 1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_confidence = np.bincount(band, weights=confidence, minlength=len(edges) - 1) / counts
+        accuracy = np.bincount(band, weights=correct.astype(float), minlength=len(edges) - 1) / counts
+    return pd.DataFrame({
+        'band_lower': edges[:-1],
+        'band_upper': edges[1:],
+        'matches': counts,
+        'mean_confidence': mean_confidence,
+        'accuracy': accuracy,
+        'gap': mean_confidence - accuracy
+    })
+
+
+def calibration_report(predictions, n_bins=10):
+    """
+    Full calibration analysis of a set of predictions
+
+    Parameters:
+    -----------
+    predictions: pandas DataFrame or list of dict
+        Prediction records with year, home_win_probability, hscore and ascore
+        (as saved by either script); matches without scores are ignored
+    n_bins: int
+        Number of probability bins
+
+    Returns:
+    --------
+    dict with overall ece and brier_score, and reliability, seasons and
+    confidence_bands DataFrames
+    """
+    predictions = pd.DataFrame(predictions)
+    if 'hscore' in predictions:
+        predictions = predictions[predictions['hscore'].notna() & predictions['ascore'].notna()]
+    probs = predictions['home_win_probability'].to_numpy(dtype=float)
+    results = match_results(predictions['hscore'], predictions['ascore'])
+
+    return {
+        'matches': len(probs),
+        'ece': expected_calibration_error(probs, results, n_bins),
+        'brier_score': float(np.mean((probs - results) ** 2)) if len(probs) else float('nan'),
+        'reliability': reliability_bins(probs, results, n_bins),
+        'seasons': season_breakdown(probs, results, predictions['year'].to_numpy(), n_bins),
+        'confidence_bands': confidence_breakdown(probs, results)
+    }
+
+
+def print_calibration_report(report):
+    """Print a calibration report"""
+    print(f"Calibration over {report['matches']} completed matches")
+    print(f"  Expected calibration error: {report['ece']:.4f}")
+    print(f"  Brier score: {report['brier_score']:.4f}")
+
+    print("\nReliability (home win probability):")
+    for _, row in report['reliability'].iterrows():
+        if row['matches'] > 0:
+            print(f"  {row['bin_lower']:.1f}-{row['bin_upper']:.1f}: {int(row['matches']):5d} matches, "
+                  f"predicted {row['mean_probability']:.3f}, observed {row['observed_frequency']:.3f}")
+
+    print("\nBy confidence band:")
+    for _, row in report['confidence_bands'].iterrows():
+        if row['matches'] > 0:
+            print(f"  {row['band_lower']:.1f}-{row['band_upper']:.1f}: {int(row['matches']):5d} matches, "
+                  f"confidence {row['mean_confidence']:.3f}, accuracy {row['accuracy']:.3f}")
+
+    print("\nBy season:")
+    for _, row in report['seasons'].iterrows():
+        print(f"  {int(row['year'])}: {int(row['matches']):4d} matches, Brier {row['brier_score']:.4f}, "
+              f"ECE {row['ece']:.4f}")
+
+
+def main():
+    """Main function to report the calibration of saved predictions"""
+    parser = argparse.ArgumentParser(description='Calibration analysis of AFL ELO predictions')
+    parser.add_argument('predictions', type=str,
+                        help='Predictions CSV from afl_elo_training.py or afl_elo_predictions.py')
+    parser.add_argument('--bins', type=int, default=10,
+                        help='Number of probability bins')
+
+    args = parser.parse_args()
+
+    print_calibration_report(calibration_report(pd.read_csv(args.predictions), n_bins=args.bins))
+
+
+if __name__ == "__main__":
+    main()
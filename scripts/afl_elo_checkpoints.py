@@ -0,0 +1,111 @@
+import os
+import json
+import hashlib
+
+import numpy as np
+
+
+def params_key(params):
+    """Stable key for a parameter set (including any start_year)"""
+    return json.dumps({name: float(value) for name, value in sorted(params.items())}, sort_keys=True)
+
+
+def season_prefix_hashes(data):
+    """
+    Hash of the matches before each season, chained season by season
+
+    Parameters:
+    -----------
+    data: pandas DataFrame
+        Matches sorted by year and date (as replayed by cross_validate_batch)
+
+    Returns:
+    --------
+    dict mapping the position of each season's first match (after the
+    first season) to the hash of every match before it
+    """
+    years = data['year'].to_numpy()
+    starts = np.flatnonzero(np.diff(years)) + 1
+    rows = data[['match_id', 'year', 'home_team', 'away_team', 'venue', 'hscore', 'ascore']] \
+        .to_csv(header=False, index=False).splitlines()
+
+    hashes = {}
+    digest = hashlib.sha256()
+    previous = 0
+    for start in starts:
+        digest.update('\n'.join(rows[previous:start]).encode('utf-8'))
+        hashes[int(start)] = digest.hexdigest()
+        previous = start
+    return hashes
+
+
+class ReplayCheckpoints:
+    def __init__(self, path=None):
+        """
+        Replay states of parameter sets at season boundaries, reused across tuning runs
+
+        A state is the ratings, venue adjustments and margin sums of one
+        parameter set after replaying every match before a season (before
+        that season's carryover). It is stored under the parameter set and
+        the hash of those matches (see season_prefix_hashes), so a state is
+        only reused while the data before the season is unchanged; adding a
+        new season or new results leaves earlier checkpoints valid.
+
+        Parameters:
+        -----------
+        path: str
+            Checkpoint file (.npz) to load, if it exists
+        """
+        self.states = {}  # (params key, prefix hash) -> (ratings, venue advantages, margin sums)
+        self.hits = 0
+        if path and os.path.exists(path):
+            with np.load(path) as checkpoints:
+                ratings = np.split(checkpoints['ratings'], checkpoints['rating_offsets'][1:-1])
+                venues = np.split(checkpoints['venue_advantages'], checkpoints['venue_offsets'][1:-1])
+                for key, prefix, member_ratings, member_venues, member_sums in zip(
+                        checkpoints['keys'].tolist(), checkpoints['prefixes'].tolist(), ratings, venues,
+                        checkpoints['margin_sums']):
+                    self.states[(key, prefix)] = (member_ratings, member_venues, member_sums)
+
+    def __len__(self):
+        return len(self.states)
+
+    def get(self, key, prefix_hash):
+        """State stored for a parameter set key and prefix hash, or None"""
+        return self.states.get((key, prefix_hash))
+
+    def put(self, key, prefix_hash, ratings, venue_advantages, margin_sums):
+        """Store a copy of one parameter set's state"""
+        self.states[(key, prefix_hash)] = (np.array(ratings, dtype=float), np.array(venue_advantages, dtype=float),
+                                           np.array(margin_sums, dtype=float))
+
+    def save(self, path, keep_prefixes=None):
+        """
+        Save the checkpoints as .npz
+
+        Parameters:
+        -----------
+        path: str
+            Output file
+        keep_prefixes: iterable of str
+            Only keep states for these prefix hashes (e.g. those of the
+            current data), dropping states of data that has since changed
+        """
+        if keep_prefixes is not None:
+            keep_prefixes = set(keep_prefixes)
+        items = [(key, state) for key, state in self.states.items()
+                 if keep_prefixes is None or key[1] in keep_prefixes]
+        ratings = [state[0] for _, state in items]
+        venues = [state[1] for _, state in items]
+
+        tmp_path = path + '.tmp.npz'
+        np.savez(tmp_path,
+                 keys=np.array([key[0] for key, _ in items], dtype=str),
+                 prefixes=np.array([key[1] for key, _ in items], dtype=str),
+                 ratings=np.concatenate(ratings) if ratings else np.empty(0),
+                 rating_offsets=np.cumsum([0] + [len(r) for r in ratings]),
+                 venue_advantages=np.concatenate(venues) if venues else np.empty(0),
+                 venue_offsets=np.cumsum([0] + [len(v) for v in venues]),
+                 margin_sums=np.array([state[2] for _, state in items]).reshape(len(items), 4))
+        os.replace(tmp_path, path)
+        return len(items)
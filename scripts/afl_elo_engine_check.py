@@ -0,0 +1,342 @@
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from afl_elo_training import fetch_afl_data, train_elo_model
+from afl_elo_predictions import AFLEloPredictor, fetch_matches, replay_predictions
+from afl_elo_model_file import load_model_file
+from afl_elo_replay import available_engines, resolve_engine
+from afl_elo_stream import iter_db_matches, stream_predict, stream_train
+
+
+# Prediction columns compared between engines and against golden outputs
+COMPARED_COLUMNS = ['pre_match_home_rating', 'pre_match_away_rating', 'home_win_probability', 'expected_margin',
+                    'margin_std', 'rating_change', 'post_match_home_rating', 'post_match_away_rating']
+
+# Parameters read from a model file for the training check
+TRAINING_PARAMS = ['base_rating', 'k_factor', 'home_advantage', 'margin_factor', 'season_carryover', 'max_margin',
+                   'venue_k_factor']
+
+
+def trained_to_year(model_path):
+    """
+    Last year of matches a model was trained on
+
+    Read from the model's yearly ratings, or for ensembles (which do not
+    keep them) from the afl_elo_*trained_to_<year> file name. None if
+    neither gives a year.
+    """
+    yearly_ratings = load_model_file(model_path).get('yearly_ratings') or {}
+    years = [int(label) for label in yearly_ratings if str(label).isdigit()]
+    if years:
+        return max(years)
+    match = re.search(r'trained_to_(\d{4})', os.path.basename(model_path))
+    return int(match.group(1)) if match else None
+
+
+def time_best(run, repeat=3):
+    """
+    Best wall time of repeated runs
+
+    Returns:
+    --------
+    (best time in seconds, result of the last run)
+    """
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = run()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def _match_keys(predictions):
+    """
+    Match keys that do not depend on database IDs or date formats
+
+    Year, home team and away team, numbered in order for teams that meet
+    at the same home ground more than once in a season.
+    """
+    keys = predictions[['year', 'home_team', 'away_team']].astype(str).agg('|'.join, axis=1)
+    return keys + '|' + keys.groupby(keys).cumcount().astype(str)
+
+
+def max_differences(predictions, expected, columns=COMPARED_COLUMNS):
+    """
+    Largest absolute difference of each shared numeric column
+
+    Parameters:
+    -----------
+    predictions: pandas DataFrame
+        Predictions to check
+    expected: pandas DataFrame
+        Predictions to compare against; rows are paired by match (see _match_keys)
+        rather than position, so outputs from different databases can be compared
+
+    Returns:
+    --------
+    (dict of column -> max absolute difference, number of matches compared)
+    """
+    predictions = predictions.set_index(_match_keys(predictions))
+    expected = expected.set_index(_match_keys(expected))
+    shared = predictions.index.intersection(expected.index)
+    differences = {}
+    for column in columns:
+        if column in predictions and column in expected:
+            diff = np.abs(predictions.loc[shared, column].to_numpy(dtype=float)
+                          - expected.loc[shared, column].to_numpy(dtype=float))
+            # Missing in both (e.g. upcoming matches) counts as equal
+            diff[np.isnan(diff) & predictions.loc[shared, column].isna().to_numpy()
+                 & expected.loc[shared, column].isna().to_numpy()] = 0.0
+            differences[column] = float(np.max(diff, initial=0.0)) if not np.isnan(diff).any() else float('inf')
+    return differences, len(shared)
+
+
+def max_rating_difference(ratings, expected):
+    """Largest absolute difference between two {team: rating} dicts (inf if the teams differ)"""
+    if set(ratings) != set(expected):
+        return float('inf')
+    return max((abs(ratings[team] - expected[team]) for team in ratings), default=0.0)
+
+
+def _stream_engine(engines):
+    """Array engine used for the streaming replay (the fastest one being checked)"""
+    array_engines = [engine for engine in engines if engine != 'reference']
+    return array_engines[0] if array_engines else resolve_engine('auto')
+
+
+def check_training(db_path, params, start_year, end_year, engines, repeat=3, chunk_size=5000):
+    """
+    Train with every engine (and the streaming replay) on the same matches
+
+    Returns:
+    --------
+    dict mapping each engine to its time, final ratings, yearly ratings and predictions
+    """
+    data = fetch_afl_data(db_path, start_year, end_year)
+    print(f"Training on {len(data)} matches from {start_year} to {end_year}")
+
+    runs = {}
+    for engine in engines:
+        if engine == 'numba':
+            # Compile before timing
+            train_elo_model(data.head(10), params, engine=engine)
+        seconds, model = time_best(lambda: train_elo_model(data, params, engine=engine), repeat)
+        runs[engine] = {
+            'seconds': seconds,
+            'ratings': model.team_ratings,
+            'yearly_ratings': model.yearly_ratings,
+            'predictions': pd.DataFrame(model.predictions)
+        }
+
+    stream_engine = _stream_engine(engines)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        predictions_file = os.path.join(tmp_dir, 'predictions.csv')
+
+        def run_stream():
+            chunks = iter_db_matches(db_path, start_year, end_year, chunk_size=chunk_size)
+            return stream_train(chunks, params, engine=stream_engine, predictions_file=predictions_file)[0]
+
+        seconds, model = time_best(run_stream, repeat)
+        runs[f'stream ({stream_engine})'] = {
+            'seconds': seconds,
+            'ratings': model.team_ratings,
+            'yearly_ratings': model.yearly_ratings,
+            'predictions': pd.read_csv(predictions_file, float_precision='round_trip')
+        }
+    return runs
+
+
+def check_predictions(db_path, model_path, start_year, engines, repeat=3, chunk_size=5000):
+    """
+    Replay a saved model (or ensemble) over the matches from start_year with every engine
+
+    Returns:
+    --------
+    dict mapping each engine to its time, final ratings and predictions
+    """
+    matches = fetch_matches(db_path, start_year)
+    print(f"Predicting {len(matches)} matches from {start_year} with {model_path}")
+
+    runs = {}
+    for engine in engines:
+        def run():
+            predictor = AFLEloPredictor(model_path)
+            replay_predictions(predictor, matches, engine=engine)
+            return predictor
+
+        if engine == 'numba':
+            run()
+        seconds, predictor = time_best(run, repeat)
+        runs[engine] = {
+            'seconds': seconds,
+            'ratings': predictor.team_ratings,
+            'predictions': pd.DataFrame(predictor.predictions)
+        }
+
+    stream_engine = _stream_engine(engines)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        predictions_file = os.path.join(tmp_dir, 'predictions.csv')
+
+        def run_stream():
+            predictor = AFLEloPredictor(model_path)
+            chunks = iter_db_matches(db_path, start_year, completed_only=False, chunk_size=chunk_size)
+            stream_predict(predictor, chunks, engine=stream_engine, predictions_file=predictions_file,
+                           history_file=os.path.join(tmp_dir, 'history.csv'))
+            return predictor
+
+        seconds, predictor = time_best(run_stream, repeat)
+        runs[f'stream ({stream_engine})'] = {
+            'seconds': seconds,
+            'ratings': predictor.team_ratings,
+            'predictions': pd.read_csv(predictions_file, float_precision='round_trip')
+        }
+    return runs
+
+
+def compare_runs(runs, tolerance, golden_file=None, golden_tolerance=None):
+    """
+    Print timings and differences against the reference engine (and a golden CSV)
+
+    The first run is the baseline when the reference engine was not checked.
+    The baseline's predictions must match every match of the golden CSV
+    within golden_tolerance (default: tolerance).
+
+    Returns:
+    --------
+    (True if every run is within tolerance of the baseline,
+     True if the baseline matches the golden CSV or there is none)
+    """
+    baseline_name = 'reference' if 'reference' in runs else next(iter(runs))
+    baseline = runs[baseline_name]
+    passed = True
+
+    print(f"\n{'Engine':<18}{'Time (s)':>10}{'Speedup':>10}{'Ratings':>12}{'Probability':>14}  Worst column")
+    for name, run in runs.items():
+        rating_diff = max_rating_difference(run['ratings'], baseline['ratings'])
+        if 'yearly_ratings' in run:
+            yearly = baseline['yearly_ratings']
+            if set(run['yearly_ratings']) != set(yearly):
+                rating_diff = float('inf')
+            for label in set(run['yearly_ratings']) & set(yearly):
+                rating_diff = max(rating_diff, max_rating_difference(run['yearly_ratings'][label], yearly[label]))
+
+        differences, compared = max_differences(run['predictions'], baseline['predictions'])
+        if compared != len(baseline['predictions']) or compared != len(run['predictions']):
+            differences['matches'] = float('inf')
+        worst = max(differences, key=differences.get)
+        ok = rating_diff <= tolerance and differences[worst] <= tolerance
+        passed = passed and ok
+
+        print(f"{name:<18}{run['seconds']:>10.3f}{baseline['seconds'] / run['seconds']:>9.1f}x"
+              f"{rating_diff:>12.2e}{differences.get('home_win_probability', float('nan')):>14.2e}"
+              f"  {worst} {differences[worst]:.1e}{'' if ok else '  FAIL'}")
+
+    golden_passed = True
+    if golden_file:
+        golden_tolerance = tolerance if golden_tolerance is None else golden_tolerance
+        golden = pd.read_csv(golden_file, float_precision='round_trip')
+        differences, compared = max_differences(baseline['predictions'], golden)
+        golden_passed = compared == len(golden)
+        print(f"\nGolden outputs ({golden_file}): {compared} of {len(golden)} matches found"
+              f"{'' if golden_passed else '  FAIL'}")
+        for column, diff in differences.items():
+            ok = diff <= golden_tolerance
+            golden_passed = golden_passed and ok
+            print(f"  {column}: max difference {diff:.2e}{'' if ok else '  FAIL'}")
+
+    return passed, golden_passed
+
+
+def main():
+    """Main function to check that the replay engines agree and compare their speed"""
+    parser = argparse.ArgumentParser(description='Check the AFL ELO replay engines against each other and time them')
+    parser.add_argument('mode', type=str, choices=['train', 'predict'],
+                        help='Check training replays or prediction replays of a saved model')
+    parser.add_argument('--db-path', type=str, default='data/afl_predictions.db',
+                        help='Path to the SQLite database')
+    parser.add_argument('--model-path', type=str, default='afl_elo_trained_to_2024.json',
+                        help='Model (or ensemble) to replay in predict mode; in train mode its parameters are '
+                             'used for training')
+    parser.add_argument('--start-year', type=int,
+                        help='First year of matches (default: the first year of the golden CSV, otherwise 1990 '
+                             'for train and the year after the model was trained for predict)')
+    parser.add_argument('--end-year', type=int,
+                        help='Last year of training matches (default: the last year of the golden CSV, '
+                             'otherwise the last year with results)')
+    parser.add_argument('--golden', type=str,
+                        help='Predictions CSV from a previous run to compare the reference outputs against '
+                             '(matches are paired by season and teams, so database IDs may differ)')
+    parser.add_argument('--engines', type=str, nargs='+', choices=['numba', 'python', 'rounds', 'reference'],
+                        help='Engines to check (default: every engine available here)')
+    parser.add_argument('--tolerance', type=float, default=1e-9,
+                        help='Largest absolute difference from the reference engine that passes')
+    parser.add_argument('--golden-tolerance', type=float,
+                        help='Largest absolute difference from the golden CSV that passes (default: --tolerance)')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Runs per engine (the best time is reported)')
+    parser.add_argument('--chunk-size', type=int, default=5000,
+                        help='Chunk size of the streaming replay')
+
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db_path):
+        print(f"Error: Database not found at {args.db_path}")
+        sys.exit(2)
+
+    engines = args.engines or available_engines()
+    golden_years = None
+    if args.golden:
+        golden_years = pd.read_csv(args.golden, usecols=['year'])['year']
+
+    if args.mode == 'train':
+        # Training with other parameters than the golden run's would make the comparison meaningless
+        if not os.path.exists(args.model_path):
+            print(f"Error: Model file not found at {args.model_path} (train mode trains with its parameters)")
+            sys.exit(2)
+        parameters = load_model_file(args.model_path).get('parameters', {})
+        params = {name: parameters[name] for name in TRAINING_PARAMS if name in parameters}
+        print(f"Using the parameters of {args.model_path}: {json.dumps(params)}")
+        start_year = args.start_year or (int(golden_years.min()) if golden_years is not None else 1990)
+        end_year = args.end_year or (int(golden_years.max()) if golden_years is not None else None)
+        runs = check_training(args.db_path, params, start_year, end_year, engines, repeat=args.repeat,
+                              chunk_size=args.chunk_size)
+    else:
+        if not os.path.exists(args.model_path):
+            print(f"Error: Model file not found at {args.model_path}")
+            sys.exit(2)
+        start_year = args.start_year or (int(golden_years.min()) if golden_years is not None else None)
+        if start_year is None:
+            trained_to = trained_to_year(args.model_path)
+            if trained_to is None:
+                print(f"Error: Cannot tell which year {args.model_path} was trained to; "
+                      f"predict mode needs --start-year (or --golden)")
+                sys.exit(2)
+            start_year = trained_to + 1
+            print(f"{args.model_path} was trained to {trained_to}, predicting from {start_year}")
+        runs = check_predictions(args.db_path, args.model_path, start_year, engines, repeat=args.repeat,
+                                 chunk_size=args.chunk_size)
+
+    golden_tolerance = args.tolerance if args.golden_tolerance is None else args.golden_tolerance
+    engines_passed, golden_passed = compare_runs(runs, args.tolerance, args.golden, golden_tolerance)
+    if engines_passed:
+        print(f"\nAll engines agree with the reference within {args.tolerance:g}")
+    else:
+        print(f"\nEngines differ from the reference by more than {args.tolerance:g}")
+    if not golden_passed:
+        print(f"The reference outputs differ from {args.golden} by more than {golden_tolerance:g}, "
+              f"or some of its matches were not found")
+    if not (engines_passed and golden_passed):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
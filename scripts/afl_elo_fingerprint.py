@@ -0,0 +1,180 @@
+import os
+import ast
+import json
+import sqlite3
+import hashlib
+import argparse
+
+
+# Scripts whose code, with every afl_* module they import, determines the trained models and predictions
+PIPELINE_ENTRY_POINTS = ['afl_elo_training.py', 'afl_elo_predictions.py']
+
+# Match columns that affect ratings and predictions
+MATCH_COLUMNS = ['m.match_id', 'm.match_number', 'm.round_number', 'm.match_date', 'm.venue', 'm.year',
+                 'm.hscore', 'm.ascore', 'ht.name', 'at.name']
+
+
+def db_fingerprint(db_path, start_year=None, end_year=None, completed_only=False):
+    """
+    Hash of the match rows a training or prediction run reads
+
+    Rows are hashed straight from SQLite in match ID order, without building
+    a DataFrame, so checking for changes costs one indexed scan.
+
+    Parameters:
+    -----------
+    db_path: str
+        Path to SQLite database
+    start_year, end_year: int
+        Optional year range (inclusive)
+    completed_only: bool
+        Only include matches with both scores (as training does)
+
+    Returns:
+    --------
+    dict with the number of rows and their SHA-256 hash
+    """
+    conditions = []
+    params = []
+    if start_year:
+        conditions.append("m.year >= ?")
+        params.append(start_year)
+    if end_year:
+        conditions.append("m.year <= ?")
+        params.append(end_year)
+    if completed_only:
+        conditions.append("m.hscore IS NOT NULL AND m.ascore IS NOT NULL")
+
+    query = f"""
+    SELECT {', '.join(MATCH_COLUMNS)}
+    FROM matches m
+    JOIN teams ht ON m.home_team_id = ht.team_id
+    JOIN teams at ON m.away_team_id = at.team_id
+    {'WHERE ' + ' AND '.join(conditions) if conditions else ''}
+    ORDER BY m.match_id
+    """
+
+    digest = hashlib.sha256()
+    rows = 0
+    conn = sqlite3.connect(db_path)
+    try:
+        for row in conn.execute(query, params):
+            digest.update(json.dumps(row).encode('utf-8'))
+            rows += 1
+    finally:
+        conn.close()
+    return {'rows': rows, 'sha256': digest.hexdigest()}
+
+
+def file_fingerprint(path):
+    """SHA-256 hash of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def pipeline_sources(source_dir=None):
+    """
+    Source files of the pipeline: the entry points and the afl_* modules they import, directly or indirectly
+
+    Imports are read with ast rather than executed, so the list follows the
+    code without loading any of it.
+    """
+    source_dir = source_dir or os.path.dirname(os.path.abspath(__file__))
+    sources = []
+    pending = list(PIPELINE_ENTRY_POINTS)
+    while pending:
+        name = pending.pop(0)
+        if name in sources:
+            continue
+        sources.append(name)
+        with open(os.path.join(source_dir, name), encoding='utf-8') as f:
+            tree = ast.parse(f.read(), filename=name)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                modules = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                modules = [node.module]
+            else:
+                continue
+            pending.extend(f"{module}.py" for module in modules
+                           if module.startswith('afl_') and os.path.exists(os.path.join(source_dir, f"{module}.py")))
+    return sorted(sources)
+
+
+def code_fingerprint():
+    """Hash of the pipeline source files, so upgrading the code triggers a fresh run"""
+    source_dir = os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha256()
+    for name in pipeline_sources(source_dir):
+        digest.update(file_fingerprint(os.path.join(source_dir, name)).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def fingerprint_path(output_file):
+    """Fingerprint file stored next to an output file"""
+    return os.path.splitext(output_file)[0] + '_inputs.json'
+
+
+def outputs_current(fingerprint_file, fingerprint, outputs):
+    """
+    Whether a previous run with the same inputs left every output in place
+
+    Parameters:
+    -----------
+    fingerprint_file: str
+        Fingerprint saved by that run (see save_fingerprint)
+    fingerprint: dict
+        Fingerprint of this run's inputs
+    outputs: list of str
+        Files the run writes
+
+    Returns:
+    --------
+    True if the saved fingerprint matches and every output exists
+    """
+    if not os.path.exists(fingerprint_file) or not all(os.path.exists(path) for path in outputs):
+        return False
+    with open(fingerprint_file, 'r') as f:
+        try:
+            saved = json.load(f)
+        except ValueError:
+            return False
+    # Round trip through JSON so tuples and lists compare equal
+    return saved.get('inputs') == json.loads(json.dumps(fingerprint)) and saved.get('outputs') == outputs
+
+
+def save_fingerprint(fingerprint_file, fingerprint, outputs):
+    """Record the inputs of a completed run and the outputs it wrote"""
+    tmp_path = fingerprint_file + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump({'inputs': fingerprint, 'outputs': outputs}, f, indent=4)
+    os.replace(tmp_path, fingerprint_file)
+
+
+def main():
+    """Main function to show the current fingerprint of the match data"""
+    parser = argparse.ArgumentParser(description='Show the fingerprint of the AFL match data used by the ELO scripts')
+    parser.add_argument('--db-path', type=str, default='data/afl_predictions.db',
+                        help='Path to the SQLite database')
+    parser.add_argument('--start-year', type=int,
+                        help='First year of matches (inclusive)')
+    parser.add_argument('--end-year', type=int,
+                        help='Last year of matches (inclusive)')
+    parser.add_argument('--completed-only', action='store_true',
+                        help='Only include matches with results (as training does)')
+
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db_path):
+        print(f"Error: Database not found at {args.db_path}")
+        return
+
+    fingerprint = db_fingerprint(args.db_path, args.start_year, args.end_year, args.completed_only)
+    print(f"{fingerprint['rows']} matches, sha256 {fingerprint['sha256']}")
+
+
+if __name__ == "__main__":
+    main()
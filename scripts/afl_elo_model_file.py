@@ -0,0 +1,218 @@
+import os
+import json
+import struct
+import argparse
+from collections.abc import Mapping
+
+import numpy as np
+
+
+# Binary model files start with this magic number, the format version and the header length
+MAGIC = b'AFLELO\x00\x00'
+FORMAT_VERSION = 1
+PREAMBLE = struct.Struct('<8sHHI')
+
+BINARY_EXTENSION = '.elo'
+
+
+def _padded(length, alignment=8):
+    """Length rounded up to the next multiple of alignment"""
+    return (length + alignment - 1) // alignment * alignment
+
+
+def is_binary_model(filename):
+    """Whether a model file is in the binary format"""
+    with open(filename, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def save_model_binary(model_data, filename):
+    """
+    Save model data (as returned by AFLEloModel.get_model_data) in the binary format
+
+    The file holds a small JSON header (parameters, team IDs, venue names and
+    the margin model), the current ratings and venue adjustments as arrays, and
+    then the yearly ratings as one snapshot matrix (snapshots x team IDs, NaN
+    for teams without a rating) followed by the snapshot labels. Readers only
+    touch the snapshot section when snapshots are requested, so loading the
+    current ratings does not depend on the length of the history.
+
+    Parameters:
+    -----------
+    model_data: dict
+        Model parameters, ratings and learned adjustments
+    filename: str
+        Output file
+    """
+    team_ids = model_data['team_ids']
+    team_order = np.array([team_ids[team] for team in model_data['team_ratings']], dtype='<i4')
+    ratings = np.array(list(model_data['team_ratings'].values()), dtype='<f8')
+    venue_advantages = np.array(list(model_data.get('venue_advantages', {}).values()), dtype='<f8')
+
+    yearly_ratings = model_data.get('yearly_ratings', {})
+    n_columns = max(team_ids.values(), default=0) + 1
+    snapshots = np.full((len(yearly_ratings), n_columns), np.nan, dtype='<f8')
+    for row, snapshot in enumerate(yearly_ratings.values()):
+        for team, rating in snapshot.items():
+            snapshots[row, team_ids[team]] = rating
+    labels = json.dumps(list(yearly_ratings)).encode('utf-8')
+
+    # Section offsets are relative to the end of the (padded) header
+    sections = {}
+    offset = 0
+    for name, size in [('team_order', team_order.nbytes), ('ratings', ratings.nbytes),
+                       ('venue_advantages', venue_advantages.nbytes), ('snapshots', snapshots.nbytes),
+                       ('snapshot_labels', len(labels))]:
+        sections[name] = {'offset': offset, 'length': size}
+        offset = _padded(offset + size)
+
+    header = json.dumps({
+        'parameters': model_data['parameters'],
+        'team_ids': team_ids,
+        'venues': list(model_data.get('venue_advantages', {})),
+        'margin_model': model_data.get('margin_model', {}),
+        'snapshot_count': len(yearly_ratings),
+        'snapshot_columns': n_columns,
+        'sections': sections
+    }).encode('utf-8')
+    header += b' ' * (_padded(PREAMBLE.size + len(header)) - PREAMBLE.size - len(header))
+
+    tmp_path = filename + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(PREAMBLE.pack(MAGIC, FORMAT_VERSION, 0, len(header)))
+        f.write(header)
+        data_start = f.tell()
+        for name, payload in [('team_order', team_order.tobytes()), ('ratings', ratings.tobytes()),
+                              ('venue_advantages', venue_advantages.tobytes()), ('snapshots', snapshots.tobytes()),
+                              ('snapshot_labels', labels)]:
+            f.seek(data_start + sections[name]['offset'])
+            f.write(payload)
+    os.replace(tmp_path, filename)
+
+
+class SnapshotRatings(Mapping):
+    def __init__(self, filename, data_start, header, team_order):
+        """
+        Read-only mapping of snapshot label -> {team: rating}, read from a
+        binary model file on demand
+
+        The labels are read on first use, and each snapshot is read from disk
+        when it is looked up. Teams are listed in team_order (the order of the
+        current ratings).
+        """
+        self.filename = filename
+        self.count = header['snapshot_count']
+        self.columns = header['snapshot_columns']
+        self.offset = data_start + header['sections']['snapshots']['offset']
+        self.labels_offset = data_start + header['sections']['snapshot_labels']['offset']
+        self.labels_length = header['sections']['snapshot_labels']['length']
+        self.team_names = {team_id: team for team, team_id in header['team_ids'].items()}
+        self.team_order = team_order.tolist()
+        self._labels = None
+
+    @property
+    def labels(self):
+        """Snapshot labels -> row in the snapshot matrix"""
+        if self._labels is None:
+            with open(self.filename, 'rb') as f:
+                f.seek(self.labels_offset)
+                self._labels = {label: row for row, label in enumerate(json.loads(f.read(self.labels_length)))}
+        return self._labels
+
+    def __getitem__(self, label):
+        row = self.labels[label]
+        with open(self.filename, 'rb') as f:
+            f.seek(self.offset + row * self.columns * 8)
+            ratings = np.frombuffer(f.read(self.columns * 8), dtype='<f8')
+        # Teams in the order of the current ratings, then any that have since dropped out
+        team_ids = list(dict.fromkeys(self.team_order + list(range(self.columns))))
+        return {self.team_names[team_id]: float(ratings[team_id]) for team_id in team_ids
+                if team_id in self.team_names and not np.isnan(ratings[team_id])}
+
+    def __iter__(self):
+        return iter(self.labels)
+
+    def __len__(self):
+        return self.count
+
+    def to_dict(self):
+        """Read every snapshot into a plain dict"""
+        return {label: self[label] for label in self}
+
+
+def load_model_file(filename):
+    """
+    Load model data from a JSON or binary model file
+
+    For binary files, 'yearly_ratings' is a SnapshotRatings mapping that reads
+    snapshots on demand rather than a dict held in memory.
+
+    Returns:
+    --------
+    dict in the layout of AFLEloModel.get_model_data (or an ensemble dict with 'members')
+    """
+    if not is_binary_model(filename):
+        with open(filename, 'r') as f:
+            return json.load(f)
+
+    with open(filename, 'rb') as f:
+        magic, version, _, header_length = PREAMBLE.unpack(f.read(PREAMBLE.size))
+        if version > FORMAT_VERSION:
+            raise ValueError(f"{filename} uses model format version {version}, "
+                             f"this version reads up to {FORMAT_VERSION}")
+        header = json.loads(f.read(header_length))
+        data_start = f.tell()
+
+        def read_section(name, dtype):
+            section = header['sections'][name]
+            f.seek(data_start + section['offset'])
+            return np.frombuffer(f.read(section['length']), dtype=dtype)
+
+        team_order = read_section('team_order', '<i4')
+        ratings = read_section('ratings', '<f8')
+        venue_advantages = read_section('venue_advantages', '<f8')
+
+    team_names = {team_id: team for team, team_id in header['team_ids'].items()}
+    return {
+        'parameters': header['parameters'],
+        'team_ratings': {team_names[team_id]: rating for team_id, rating in zip(team_order.tolist(), ratings.tolist())},
+        'team_ids': header['team_ids'],
+        'venue_advantages': dict(zip(header['venues'], venue_advantages.tolist())),
+        'margin_model': header['margin_model'],
+        'yearly_ratings': SnapshotRatings(filename, data_start, header, team_order)
+    }
+
+
+def save_model_file(model_data, filename):
+    """Save model data as JSON, or in the binary format for a .elo filename"""
+    if filename.endswith(BINARY_EXTENSION):
+        save_model_binary(model_data, filename)
+    else:
+        model_data = dict(model_data)
+        if isinstance(model_data.get('yearly_ratings'), SnapshotRatings):
+            model_data['yearly_ratings'] = model_data['yearly_ratings'].to_dict()
+        with open(filename, 'w') as f:
+            json.dump(model_data, f, indent=4)
+
+
+def main():
+    """Main function to convert model files between JSON and the binary format"""
+    parser = argparse.ArgumentParser(description='Convert AFL ELO model files between JSON and the binary format')
+    parser.add_argument('input', type=str,
+                        help='Model file to convert (JSON or binary)')
+    parser.add_argument('output', type=str,
+                        help=f'Output file ({BINARY_EXTENSION} for the binary format, otherwise JSON)')
+
+    args = parser.parse_args()
+
+    model_data = load_model_file(args.input)
+    if 'members' in model_data:
+        print("Error: ensemble files are only stored as JSON")
+        return
+    save_model_file(model_data, args.output)
+    print(f"Converted {args.input} ({os.path.getsize(args.input)} bytes) to "
+          f"{args.output} ({os.path.getsize(args.output)} bytes)")
+
+
+if __name__ == "__main__":
+    main()
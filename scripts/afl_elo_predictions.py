@@ -1,11 +1,25 @@
+import copy
 import json
 import sqlite3
+import hashlib
 import pandas as pd
 import numpy as np
 from datetime import datetime
+from types import MappingProxyType
 import os
 import argparse
 
+from afl_elo_replay import (resolve_engine, get_replay_kernel, get_batch_replay_kernel, margin_multipliers,
+                            margin_multipliers_batch, replay_outputs, run_replay, run_replay_batch)
+from afl_teams import TeamRegistry
+from afl_elo_model_file import load_model_file
+from afl_elo_fingerprint import (db_fingerprint, file_fingerprint, code_fingerprint, fingerprint_path,
+                                outputs_current, save_fingerprint)
+
+# Parameters that can differ between ensemble members
+MEMBER_PARAMETERS = ['base_rating', 'k_factor', 'home_advantage', 'margin_factor',
+                     'season_carryover', 'max_margin', 'venue_k_factor']
+
 
 class AFLEloPredictor:
     def __init__(self, model_path):
@@ -15,32 +29,48 @@ class AFLEloPredictor:
         Parameters:
         -----------
         model_path: str
-            Path to the saved ELO model JSON file
+            Path to the saved ELO model (JSON or binary .elo file), or an ensemble
+            file with a weighted 'members' list of models (see save_ensemble in afl_elo_training.py)
         """
-        self.load_model(model_path)
+        self.member_weights = None  # Set when an ensemble is loaded
+        self.ratings_version = 0  # Incremented whenever the ratings change
+        self._fixture_cache = {}  # Fixture predictions for _fixture_cache_version
+        self._fixture_cache_version = None
+        self._etag = (None, None)  # (ratings version, ETag)
+        self.current_snapshot = None  # Latest RatingSnapshot published for concurrent readers
+        loaded = self.load_model(model_path)
         self.predictions = []  # Store all predictions
         self.rating_history = []  # Store rating history
+        if loaded:
+            self.publish_snapshot()
     
     def load_model(self, model_path):
         """Load the trained ELO model"""
         try:
-            with open(model_path, 'r') as f:
-                model_data = json.load(f)
+            model_data = load_model_file(model_path)
+            
+            if 'members' in model_data:
+                return self._load_ensemble(model_data['members'])
             
             # Set parameters
-            self.params = model_data['parameters']
-            self.base_rating = self.params['base_rating']
-            self.k_factor = self.params['k_factor']
-            self.home_advantage = self.params['home_advantage']
-            self.margin_factor = self.params['margin_factor']
-            self.season_carryover = self.params['season_carryover']
-            self.max_margin = self.params['max_margin']
+            self._load_member(model_data)
+            
+            # Set team ratings, keyed by canonical name so ratings saved under an alias carry over
+            self.teams = TeamRegistry.from_dict(model_data.get('team_ids'))
+            self.team_ratings = {self.teams.canonical_name(team): rating
+                                 for team, rating in model_data['team_ratings'].items()}
             
-            # Set team ratings
-            self.team_ratings = model_data['team_ratings']
+            # Intern venues to integer IDs with their learned home advantage adjustments
+            venue_advantages = model_data.get('venue_advantages', {})
+            self.venue_ids = {venue: i for i, venue in enumerate(venue_advantages)}
+            self.venue_advantages = np.array(list(venue_advantages.values()), dtype=float)
             
-            # Store yearly ratings if available
-            self.yearly_ratings = model_data.get('yearly_ratings', {})
+            # Running sums for the rating-difference-to-margin fit, continued from training
+            margin_model = model_data.get('margin_model', {})
+            self.margin_sxx = margin_model.get('sxx', 0.0)
+            self.margin_sxy = margin_model.get('sxy', 0.0)
+            self.margin_syy = margin_model.get('syy', 0.0)
+            self.margin_n = margin_model.get('n', 0)
             
             print(f"Loaded ELO model with {len(self.team_ratings)} team ratings")
             print("Model parameters:")
@@ -52,23 +82,187 @@ class AFLEloPredictor:
             print(f"Error loading model: {e}")
             return False
     
+    def _load_ensemble(self, members):
+        """
+        Load an ensemble of models into member-axis arrays
+        
+        Single-model attributes are taken from the first (best) member, with
+        team_ratings holding the weighted average of the member ratings.
+        """
+        self._load_member(members[0])
+        self.teams = TeamRegistry.from_dict(members[0].get('team_ids'))
+        
+        weights = np.array([member.get('weight', 1.0) for member in members], dtype=float)
+        self.member_weights = weights / weights.sum()
+        self.member_params = {
+            name: np.array([member['parameters'].get(name, 0) for member in members], dtype=float)
+            for name in MEMBER_PARAMETERS
+        }
+        
+        # Teams and venues are shared across members; missing entries start from the base rating / no adjustment.
+        # Member ratings are indexed by registry team ID.
+        self.member_team_names = list(dict.fromkeys(self.teams.canonical_name(team)
+                                                    for member in members for team in member['team_ratings']))
+        self.member_ratings = np.tile(self.member_params['base_rating'], (self.teams.size, 1))
+        for k, member in enumerate(members):
+            for team, rating in member['team_ratings'].items():
+                self.member_ratings[self.teams.get_team_id(team), k] = rating
+        
+        venues = list(dict.fromkeys(venue for member in members for venue in member.get('venue_advantages', {})))
+        self.venue_ids = {venue: i for i, venue in enumerate(venues)}
+        self.member_venue_advantages = np.array([
+            [member.get('venue_advantages', {}).get(venue, 0.0) for member in members] for venue in venues
+        ], dtype=float).reshape(len(venues), len(members))
+        
+        self.member_margin_sums = np.array([
+            [member.get('margin_model', {}).get(key, 0.0) for member in members] for key in ['sxx', 'sxy', 'syy', 'n']
+        ], dtype=float)
+        
+        self._sync_ensemble_ratings()
+        
+        print(f"Loaded ELO ensemble with {len(members)} members and {len(self.team_ratings)} team ratings")
+        for i, member in enumerate(members):
+            print(f"  Member {i + 1} (weight {self.member_weights[i]:.3f}): {member['parameters']}")
+        
+        return True
+    
+    def _load_member(self, model_data):
+        """Set single-model parameters (and yearly ratings if available) from one model's data"""
+        self.params = model_data['parameters']
+        self.base_rating = self.params['base_rating']
+        self.k_factor = self.params['k_factor']
+        self.home_advantage = self.params['home_advantage']
+        self.margin_factor = self.params['margin_factor']
+        self.season_carryover = self.params['season_carryover']
+        self.max_margin = self.params['max_margin']
+        self.venue_k_factor = self.params.get('venue_k_factor', 0)
+        self.yearly_ratings = model_data.get('yearly_ratings', {})
+    
+    def _sync_ensemble_ratings(self):
+        """Publish the weighted average of the member ratings as team_ratings"""
+        averaged = self.member_ratings @ self.member_weights
+        self.team_ratings = {team: float(averaged[self.teams.team_ids[team]]) for team in self.member_team_names}
+    
+    def get_ratings_array(self):
+        """Team ratings as an array indexed by team ID (base rating for teams without a rating)"""
+        ratings = np.full(self.teams.size, float(self.base_rating))
+        for team, rating in self.team_ratings.items():
+            ratings[self.teams.team_ids[team]] = rating
+        return ratings
+    
+    def set_ratings_array(self, ratings):
+        """Update team_ratings from an array indexed by team ID"""
+        self.team_ratings = {team: float(ratings[self.teams.team_ids[team]]) for team in self.team_ratings}
+    
     def _cap_margin(self, margin):
         """Cap margin to reduce effect of blowouts"""
         return min(abs(margin), self.max_margin) * np.sign(margin)
     
-    def calculate_win_probability(self, home_team, away_team):
+    def get_venue_id(self, venue):
+        """Return the integer ID for a venue, interning it if not seen before (-1 for unknown)"""
+        if venue is None or venue != venue:  # None or NaN
+            return -1
+        venue_id = self.venue_ids.get(venue)
+        if venue_id is None:
+            venue_id = len(self.venue_ids)
+            self.venue_ids[venue] = venue_id
+            self.venue_advantages = np.append(self.venue_advantages, 0.0)
+        return venue_id
+    
+    def get_home_advantage(self, venue_id):
+        """Home advantage in rating points for a venue ID"""
+        if venue_id < 0:
+            return self.home_advantage
+        return self.home_advantage + self.venue_advantages[venue_id]
+    
+    def get_margin_model(self):
+        """Current rating-difference-to-margin mapping as (points per rating point, residual std)"""
+        if self.margin_n == 0:
+            return 0.0, 0.0
+        scale = self.margin_sxy / self.margin_sxx if self.margin_sxx > 0 else 0.0
+        residual_ss = self.margin_syy - 2 * scale * self.margin_sxy + scale * scale * self.margin_sxx
+        return scale, np.sqrt(max(residual_ss, 0.0) / self.margin_n)
+    
+    def calculate_win_probability(self, home_team, away_team, venue=None):
         """Calculate probability of home team winning based on ELO difference"""
-        home_rating = self.team_ratings.get(home_team, self.base_rating)
-        away_rating = self.team_ratings.get(away_team, self.base_rating)
+        if self.member_weights is not None:
+            return float(self.calculate_member_probabilities(home_team, away_team, venue) @ self.member_weights)
         
-        # Apply home ground advantage
-        rating_diff = (home_rating + self.home_advantage) - away_rating
+        home_rating = self.team_ratings.get(self.teams.canonical_name(home_team, register=False), self.base_rating)
+        away_rating = self.team_ratings.get(self.teams.canonical_name(away_team, register=False), self.base_rating)
+        
+        # Apply home ground advantage (global plus any learned venue adjustment)
+        venue_id = self.venue_ids.get(venue, -1)
+        rating_diff = (home_rating + self.get_home_advantage(venue_id)) - away_rating
         
         # Convert rating difference to win probability using logistic function
         win_probability = 1.0 / (1.0 + 10 ** (-rating_diff / 400))
         
         return win_probability
     
+    def calculate_member_probabilities(self, home_team, away_team, venue=None):
+        """Home win probability under each ensemble member"""
+        _, _, rating_diff = self._member_rating_differences(home_team, away_team, venue)
+        return 1.0 / (1.0 + 10.0 ** (-rating_diff / 400))
+    
+    def _member_rating_differences(self, home_team, away_team, venue=None):
+        """Home ratings, away ratings and venue-adjusted rating differences under each ensemble member"""
+        home_id = self.teams.get_team_id(home_team, register=False)
+        away_id = self.teams.get_team_id(away_team, register=False)
+        base = self.member_params['base_rating']
+        home_rating = self.member_ratings[home_id] if home_id is not None and home_id < len(self.member_ratings) else base
+        away_rating = self.member_ratings[away_id] if away_id is not None and away_id < len(self.member_ratings) else base
+        
+        advantage = self.member_params['home_advantage']
+        venue_id = self.venue_ids.get(venue, -1)
+        if venue_id >= 0 and venue_id < len(self.member_venue_advantages):
+            advantage = advantage + self.member_venue_advantages[venue_id]
+        
+        return home_rating, away_rating, (home_rating + advantage) - away_rating
+    
+    def batch_win_probabilities(self, home_teams, away_teams, venues=None):
+        """
+        Home win probabilities for many fixtures at once from the current ratings
+        
+        Array equivalent of calculate_win_probability (weighted over the
+        members for an ensemble). Teams without a rating, including None for
+        a hypothetical average team, play at the base rating.
+        
+        Parameters:
+        -----------
+        home_teams, away_teams: list of str
+            Team names (or None) for each fixture
+        venues: list of str
+            Optional venue of each fixture
+        
+        Returns:
+        --------
+        numpy array of home win probabilities
+        """
+        # Row -1 of the rating arrays holds the base rating, for teams without one
+        team_ids = [[None if team is None else self.teams.get_team_id(team, register=False) for team in teams]
+                    for teams in (home_teams, away_teams)]
+        home_idx, away_idx = (np.array([-1 if team_id is None else team_id for team_id in ids], dtype=np.int64)
+                              for ids in team_ids)
+        venue_idx = np.array([self.venue_ids.get(venue, -1) for venue in venues] if venues is not None
+                             else np.full(len(home_idx), -1), dtype=np.int64)
+        
+        if self.member_weights is not None:
+            base = self.member_params['base_rating']
+            ratings = np.vstack([self.member_ratings, base])
+            advantages = np.vstack([self.member_venue_advantages, np.zeros(len(base))])
+            venue_idx[venue_idx >= len(self.member_venue_advantages)] = -1
+            home_idx[home_idx >= len(self.member_ratings)] = -1
+            away_idx[away_idx >= len(self.member_ratings)] = -1
+            advantage = self.member_params['home_advantage'] + advantages[venue_idx]
+            diffs = (ratings[home_idx] + advantage) - ratings[away_idx]
+            return (1.0 / (1.0 + 10.0 ** (-diffs / 400))) @ self.member_weights
+        
+        ratings = np.append(self.get_ratings_array(), float(self.base_rating))
+        advantages = np.append(self.venue_advantages, 0.0)
+        diffs = (ratings[home_idx] + self.home_advantage + advantages[venue_idx]) - ratings[away_idx]
+        return 1.0 / (1.0 + 10 ** (-diffs / 400))
+    
     def apply_season_carryover(self, new_year):
         """Apply regression to mean between seasons"""
         print(f"Applying season carryover for {new_year}...")
@@ -76,9 +270,17 @@ class AFLEloPredictor:
         # Store current ratings before carryover
         ratings_before = self.team_ratings.copy()
         
-        for team in self.team_ratings:
-            # Regress ratings toward base rating
-            self.team_ratings[team] = self.base_rating + self.season_carryover * (self.team_ratings[team] - self.base_rating)
+        if self.member_weights is not None:
+            # Regress every member's ratings toward its base rating
+            base = self.member_params['base_rating']
+            self.member_ratings = base + self.member_params['season_carryover'] * (self.member_ratings - base)
+            self._sync_ensemble_ratings()
+        else:
+            for team in self.team_ratings:
+                # Regress ratings toward base rating
+                self.team_ratings[team] = self.base_rating + self.season_carryover * (self.team_ratings[team] - self.base_rating)
+        
+        self.ratings_version += 1
         
         # Store the ratings transition in history
         self.rating_history.append({
@@ -111,12 +313,19 @@ class AFLEloPredictor:
         match_date: str
             Optional match date for tracking
         venue: str
-            Optional venue for tracking
+            Optional venue (used for venue-specific home advantage)
             
         Returns:
         --------
         dict with updated prediction information
         """
+        if self.member_weights is not None:
+            raise ValueError("Ensemble ratings are updated through predict_matches, not update_ratings")
+        
+        # Aliases continue the ratings of the club they refer to
+        home_team = self.teams.canonical_name(home_team)
+        away_team = self.teams.canonical_name(away_team)
+        
         # Ensure teams exist in ratings
         if home_team not in self.team_ratings:
             print(f"Warning: {home_team} not found in ratings, using base rating")
@@ -131,7 +340,11 @@ class AFLEloPredictor:
         away_rating = self.team_ratings[away_team]
         
         # Calculate win probability
-        home_win_prob = self.calculate_win_probability(home_team, away_team)
+        venue_id = self.get_venue_id(venue)
+        home_advantage = self.get_home_advantage(venue_id)
+        home_win_prob = self.calculate_win_probability(home_team, away_team, venue)
+        adjusted_diff = (home_rating + home_advantage) - away_rating
+        margin_scale, margin_std = self.get_margin_model()
         
         # Store the pre-update prediction info
         prediction_info = {
@@ -145,11 +358,13 @@ class AFLEloPredictor:
             'pre_match_home_rating': home_rating,
             'pre_match_away_rating': away_rating,
             'rating_difference': home_rating - away_rating,
-            'adjusted_rating_difference': (home_rating + self.home_advantage) - away_rating,
+            'adjusted_rating_difference': adjusted_diff,
             'home_win_probability': home_win_prob,
             'away_win_probability': 1 - home_win_prob,
             'predicted_winner': home_team if home_win_prob > 0.5 else away_team,
-            'confidence': max(home_win_prob, 1 - home_win_prob)
+            'confidence': max(home_win_prob, 1 - home_win_prob),
+            'expected_margin': margin_scale * adjusted_diff,
+            'margin_std': margin_std
         }
         
         # If scores are provided, update ratings and add result info
@@ -177,6 +392,17 @@ class AFLEloPredictor:
             self.team_ratings[home_team] += rating_change
             self.team_ratings[away_team] -= rating_change
             
+            # Keep learning the venue's home advantage adjustment
+            if self.venue_k_factor > 0 and venue_id >= 0:
+                self.venue_advantages[venue_id] += self.venue_k_factor * margin_multiplier * (actual_result - home_win_prob)
+            
+            # Add this match to the margin fit
+            self.margin_sxx += adjusted_diff * adjusted_diff
+            self.margin_sxy += adjusted_diff * margin
+            self.margin_syy += margin * margin
+            self.margin_n += 1
+            self.ratings_version += 1
+            
             # Add result info to prediction
             prediction_info.update({
                 'hscore': hscore,
@@ -233,12 +459,28 @@ class AFLEloPredictor:
         match_date: str
             Optional match date for tracking
         venue: str
-            Optional venue for tracking
+            Optional venue (used for venue-specific home advantage)
             
         Returns:
         --------
         dict with prediction information
         """
+        # Aliases continue the ratings of the club they refer to
+        home_team = self.teams.canonical_name(home_team)
+        away_team = self.teams.canonical_name(away_team)
+        
+        if self.member_weights is not None:
+            # Weighted over the members, as for upcoming fixtures (teams without ratings use each member's base rating)
+            for team in (home_team, away_team):
+                if team not in self.team_ratings:
+                    print(f"Warning: {team} not found in ratings, using base rating")
+            prediction = self._fixture_prediction({
+                'home_team': home_team, 'away_team': away_team, 'venue': venue, 'match_id': match_id,
+                'year': year, 'round_number': round_number, 'match_date': match_date
+            })
+            self.predictions.append(prediction)
+            return prediction
+        
         # Check if teams exist in ratings
         if home_team not in self.team_ratings:
             print(f"Warning: {home_team} not found in ratings, using base rating")
@@ -253,7 +495,11 @@ class AFLEloPredictor:
         away_rating = self.team_ratings[away_team]
         
         # Calculate win probability
-        home_win_prob = self.calculate_win_probability(home_team, away_team)
+        venue_id = self.get_venue_id(venue)
+        home_advantage = self.get_home_advantage(venue_id)
+        home_win_prob = self.calculate_win_probability(home_team, away_team, venue)
+        adjusted_diff = (home_rating + home_advantage) - away_rating
+        margin_scale, margin_std = self.get_margin_model()
         
         # Create prediction result
         prediction = {
@@ -267,11 +513,13 @@ class AFLEloPredictor:
             'pre_match_home_rating': home_rating,
             'pre_match_away_rating': away_rating,
             'rating_difference': home_rating - away_rating,
-            'adjusted_rating_difference': (home_rating + self.home_advantage) - away_rating,
+            'adjusted_rating_difference': adjusted_diff,
             'home_win_probability': home_win_prob,
             'away_win_probability': 1 - home_win_prob,
             'predicted_winner': home_team if home_win_prob > 0.5 else away_team,
-            'confidence': max(home_win_prob, 1 - home_win_prob)
+            'confidence': max(home_win_prob, 1 - home_win_prob),
+            'expected_margin': margin_scale * adjusted_diff,
+            'margin_std': margin_std
         }
         
         # Store the prediction
@@ -279,6 +527,160 @@ class AFLEloPredictor:
         
         return prediction
     
+    def publish_snapshot(self):
+        """
+        Publish the current ratings as an immutable RatingSnapshot for concurrent readers
+        
+        Only the thread applying results should call this, after update_ratings,
+        apply_season_carryover or a replay (replay_predictions and stream_predict
+        publish when they finish each batch). Readers take current_snapshot
+        without a lock: the attribute is replaced in one step, so a reader
+        sees either the previous snapshot or the new one, never a partly
+        applied result.
+        
+        Returns:
+        --------
+        The published RatingSnapshot
+        """
+        if self.current_snapshot is None or self.current_snapshot.version != self.ratings_version:
+            self.current_snapshot = RatingSnapshot(self)
+        return self.current_snapshot
+    
+    def ratings_etag(self):
+        """
+        ETag for the current ratings: the ratings version and a digest of the
+        rating state (ratings, venue adjustments and margin model)
+        
+        The digest makes the tag comparable across processes: replaying the
+        same results from the same model with the same engine always gives
+        the same tag. Engines can differ in the last bits of ensemble ratings,
+        so their tags then differ while their ratings versions agree.
+        """
+        version, etag = self._etag
+        if version != self.ratings_version:
+            if self.member_weights is not None:
+                state = [self.member_ratings, self.member_venue_advantages, self.member_margin_sums]
+            else:
+                state = [self.get_ratings_array(), self.venue_advantages,
+                         np.array([self.margin_sxx, self.margin_sxy, self.margin_syy, self.margin_n], dtype=float)]
+            digest = hashlib.sha1(b''.join(np.ascontiguousarray(array, dtype=float).tobytes() for array in state))
+            etag = f"v{self.ratings_version}-{digest.hexdigest()[:16]}"
+            self._etag = (self.ratings_version, etag)
+        return etag
+    
+    def _fixture_prediction(self, fixture):
+        """Prediction for one fixture from the current ratings, without changing the predictor"""
+        home_team = self.teams.canonical_name(fixture['home_team'], register=False) or fixture['home_team']
+        away_team = self.teams.canonical_name(fixture['away_team'], register=False) or fixture['away_team']
+        venue = fixture.get('venue')
+        match_date = fixture.get('match_date')
+        if match_date is not None and pd.isna(match_date):
+            match_date = None
+        elif hasattr(match_date, 'isoformat'):
+            match_date = match_date.isoformat()
+        
+        prediction = {
+            'match_id': fixture.get('match_id'),
+            'round_number': fixture.get('round_number'),
+            'match_date': match_date,
+            'venue': venue,
+            'year': fixture.get('year'),
+            'home_team': home_team,
+            'away_team': away_team
+        }
+        
+        if self.member_weights is not None:
+            # Weighted means over the members, as recorded by the ensemble replay
+            weights = self.member_weights
+            home_ratings, away_ratings, diffs = self._member_rating_differences(home_team, away_team, venue)
+            member_probs = 1.0 / (1.0 + 10.0 ** (-diffs / 400))
+            sxx, sxy, syy, n = self.member_margin_sums
+            scale = np.where(sxx > 0, sxy / np.where(sxx > 0, sxx, 1.0), 0.0)
+            residual_ss = syy - 2 * scale * sxy + scale * scale * sxx
+            spread = np.where(n > 0, np.sqrt(np.maximum(residual_ss, 0.0) / np.maximum(n, 1.0)), 0.0)
+            home_rating = float(np.broadcast_to(home_ratings, weights.shape) @ weights)
+            away_rating = float(np.broadcast_to(away_ratings, weights.shape) @ weights)
+            adjusted_diff = float(diffs @ weights)
+            home_win_prob = float(member_probs @ weights)
+            expected_margin = float((scale * diffs) @ weights)
+            margin_std = float(np.sqrt(max((spread ** 2 + (scale * diffs) ** 2) @ weights - expected_margin ** 2, 0.0)))
+        else:
+            home_rating = self.team_ratings.get(home_team, self.base_rating)
+            away_rating = self.team_ratings.get(away_team, self.base_rating)
+            venue_id = self.venue_ids.get(venue, -1)
+            adjusted_diff = (home_rating + self.get_home_advantage(venue_id)) - away_rating
+            home_win_prob = self.calculate_win_probability(home_team, away_team, venue)
+            margin_scale, margin_std = self.get_margin_model()
+            expected_margin = margin_scale * adjusted_diff
+        
+        prediction.update({
+            'pre_match_home_rating': home_rating,
+            'pre_match_away_rating': away_rating,
+            'rating_difference': home_rating - away_rating,
+            'adjusted_rating_difference': adjusted_diff,
+            'home_win_probability': home_win_prob,
+            'away_win_probability': 1 - home_win_prob,
+            'predicted_winner': home_team if home_win_prob > 0.5 else away_team,
+            'confidence': max(home_win_prob, 1 - home_win_prob),
+            'expected_margin': expected_margin,
+            'margin_std': margin_std
+        })
+        if self.member_weights is not None:
+            for k, prob in enumerate(member_probs.tolist()):
+                prediction[f'member_{k + 1}_home_win_probability'] = prob
+        return prediction
+    
+    def predict_fixtures(self, fixtures, if_none_match=None):
+        """
+        Predict upcoming fixtures, caching the predictions until the ratings change
+        
+        Predictions depend only on the current ratings, so they are cached
+        per fixture under the ratings version and recomputed only after
+        update_ratings or apply_season_carryover (or a replay) changes the
+        ratings. Unlike predict_match, nothing is added to the predictions
+        list or the ratings.
+        
+        The returned ETag is the ratings ETag (see ratings_etag) followed by
+        a digest of the fixtures asked for, so a tag for one fixture list
+        never validates another.
+        
+        Parameters:
+        -----------
+        fixtures: list of dict or pandas DataFrame
+            Fixtures with home_team and away_team, and optionally venue,
+            match_id, year, round_number and match_date
+        if_none_match: str
+            ETag returned by an earlier call, for the predictions the caller
+            already holds
+            
+        Returns:
+        --------
+        (ETag, list of prediction dicts), or (ETag, None) when if_none_match
+        is the ETag of these fixtures under the current ratings and the
+        caller's copy is current
+        """
+        if isinstance(fixtures, pd.DataFrame):
+            fixtures = fixtures.to_dict('records')
+        keys = [tuple(str(fixture.get(field)) for field in
+                      ['home_team', 'away_team', 'venue', 'match_id', 'year', 'round_number', 'match_date'])
+                for fixture in fixtures]
+        digest = hashlib.sha1(json.dumps(keys).encode('utf-8'))
+        etag = f"{self.ratings_etag()}-{digest.hexdigest()[:8]}"
+        if if_none_match is not None and if_none_match == etag:
+            return etag, None
+        
+        if self._fixture_cache_version != self.ratings_version:
+            self._fixture_cache = {}
+            self._fixture_cache_version = self.ratings_version
+        
+        predictions = []
+        for fixture, key in zip(fixtures, keys):
+            prediction = self._fixture_cache.get(key)
+            if prediction is None:
+                prediction = self._fixture_cache[key] = self._fixture_prediction(fixture)
+            predictions.append(dict(prediction))
+        return etag, predictions
+    
     def save_predictions_to_csv(self, filename):
         """Save predictions to CSV file"""
         if not self.predictions:
@@ -377,6 +779,68 @@ class AFLEloPredictor:
         print(f"Saved rating history with {len(df)} records to {filename}")
 
 
+class RatingSnapshot:
+    def __init__(self, predictor):
+        """
+        Immutable copy of a predictor's ratings at one ratings version
+        
+        Snapshots are built by the writer (see AFLEloPredictor.publish_snapshot)
+        and never change afterwards, so any number of threads can query one
+        while the writer applies further results to the predictor. Queries
+        give the same values as the predictor's own methods at that version,
+        but unknown teams and venues are never registered: they get the base
+        rating and the global home advantage.
+        
+        Parameters:
+        -----------
+        predictor: AFLEloPredictor
+            Predictor to copy (only read while the snapshot is built)
+        """
+        # A private predictor holding copies of everything that replays change in place
+        state = copy.copy(predictor)
+        state.team_ratings = dict(predictor.team_ratings)
+        state.teams = predictor.teams.copy()
+        state.venue_ids = dict(predictor.venue_ids)
+        state.predictions = []
+        state.rating_history = []
+        state.current_snapshot = None
+        state._fixture_cache = {}
+        for name in ['venue_advantages', 'member_ratings', 'member_venue_advantages', 'member_margin_sums']:
+            if hasattr(predictor, name):
+                array = getattr(predictor, name).copy()
+                array.flags.writeable = False
+                setattr(state, name, array)
+        self._state = state
+        
+        self.version = predictor.ratings_version
+        self.etag = state.ratings_etag()
+        self.team_ratings = MappingProxyType(state.team_ratings)
+    
+    def rating(self, team):
+        """Rating of a team (the base rating for unknown teams)"""
+        name = self._state.teams.canonical_name(team, register=False) or team
+        return self.team_ratings.get(name, self._state.base_rating)
+    
+    def win_probability(self, home_team, away_team, venue=None):
+        """Probability of the home team winning (see AFLEloPredictor.calculate_win_probability)"""
+        return self._state.calculate_win_probability(home_team, away_team, venue)
+    
+    def predict(self, home_team, away_team, venue=None, **fields):
+        """
+        Prediction dict for one match, as in AFLEloPredictor.predict_fixtures
+        
+        Optional fields (match_id, year, round_number, match_date) are copied
+        into the prediction.
+        """
+        return self._state._fixture_prediction(dict(fields, home_team=home_team, away_team=away_team, venue=venue))
+    
+    def predict_fixtures(self, fixtures):
+        """Predictions for a list of fixture dicts or a DataFrame of fixtures"""
+        if isinstance(fixtures, pd.DataFrame):
+            fixtures = fixtures.to_dict('records')
+        return [self._state._fixture_prediction(fixture) for fixture in fixtures]
+
+
 def fetch_matches(db_path, start_year):
     """
     Fetch AFL matches from the database starting from a specific year
@@ -423,7 +887,442 @@ def fetch_matches(db_path, start_year):
     return matches
 
 
-def predict_matches(model_path, db_path, start_year, output_dir='.'):
+def _predict_with_kernel(predictor, matches, kernel):
+    """
+    Replay matches through an array kernel, producing the same ratings, predictions
+    and rating history as calling update_ratings/predict_match row by row
+    """
+    margin_sums = np.array([predictor.margin_sxx, predictor.margin_sxy, predictor.margin_syy, predictor.margin_n],
+                           dtype=float)
+    
+    # Ratings are indexed by registry team ID, so aliases share their club's slot
+    home_idx = predictor.teams.get_team_ids(matches['home_team'])
+    away_idx = predictor.teams.get_team_ids(matches['away_team'])
+    home_teams = [predictor.teams.get_team_name(team_id) for team_id in home_idx.tolist()]
+    away_teams = [predictor.teams.get_team_name(team_id) for team_id in away_idx.tolist()]
+    matches = matches.assign(home_team=home_teams, away_team=away_teams)
+    venues = matches['venue'].tolist()
+    venue_idx = np.array([predictor.get_venue_id(venue) for venue in venues], dtype=np.int64)
+    hscore = matches['hscore'].to_numpy(dtype=float)
+    ascore = matches['ascore'].to_numpy(dtype=float)
+    years = matches['year'].to_numpy()
+    match_dates = [d.isoformat() if pd.notna(d) else None for d in matches['match_date']]
+    multipliers = margin_multipliers(hscore, ascore, predictor.margin_factor, predictor.max_margin)
+    completed = ~(np.isnan(hscore) | np.isnan(ascore))
+    
+    outputs = replay_outputs(len(matches))
+    params = {
+        'k_factor': predictor.k_factor,
+        'home_advantage': predictor.home_advantage,
+        'venue_k_factor': predictor.venue_k_factor
+    }
+    
+    # Run the kernel one season at a time, applying carryover between seasons
+    season_starts = np.flatnonzero(np.diff(years)) + 1
+    bounds = [0] + season_starts.tolist() + [len(matches)]
+    ratings = predictor.get_ratings_array()
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        if start > 0:
+            predictor.set_ratings_array(ratings)
+            predictor.apply_season_carryover(years[start])
+        
+        # Add teams missing from the model as they first appear
+        for team in dict.fromkeys(team for pair in zip(home_teams[start:end], away_teams[start:end]) for team in pair):
+            if team not in predictor.team_ratings:
+                print(f"Warning: {team} not found in ratings, using base rating")
+                predictor.team_ratings[team] = predictor.base_rating
+        ratings = predictor.get_ratings_array()
+        
+        run_replay(kernel, home_idx, away_idx, venue_idx, hscore, ascore, multipliers, ratings,
+                   predictor.venue_advantages, margin_sums, params, outputs, start, end)
+        # One ratings version per completed match, as with update_ratings
+        predictor.ratings_version += int(np.count_nonzero(completed[start:end]))
+        
+        # Record the season's predictions before the next carryover event
+        _record_kernel_outputs(predictor, matches.iloc[start:end], match_dates[start:end],
+                               {name: values[start:end] for name, values in outputs.items()})
+    
+    predictor.set_ratings_array(ratings)
+    predictor.margin_sxx, predictor.margin_sxy, predictor.margin_syy = margin_sums[:3].tolist()
+    predictor.margin_n = int(margin_sums[3])
+
+
+def _record_kernel_outputs(predictor, matches, match_dates, outputs):
+    """Append prediction and rating history records for a block of replayed matches"""
+    columns = zip(matches['match_id'].tolist(), matches['round_number'].tolist(), match_dates,
+                  matches['venue'].tolist(), matches['year'].tolist(), matches['home_team'].tolist(),
+                  matches['away_team'].tolist(), matches['hscore'].tolist(), matches['ascore'].tolist(),
+                  outputs['pre_home'].tolist(), outputs['pre_away'].tolist(), outputs['adjusted_diff'].tolist(),
+                  outputs['probs'].tolist(), outputs['expected_margin'].tolist(), outputs['margin_std'].tolist(),
+                  outputs['rating_change'].tolist())
+    
+    for (match_id, round_number, match_date, venue, year, home_team, away_team, hs, as_,
+         home_rating, away_rating, adjusted_diff, home_win_prob, expected_margin, margin_std,
+         rating_change) in columns:
+        prediction_info = {
+            'match_id': match_id,
+            'round_number': round_number,
+            'match_date': match_date,
+            'venue': venue,
+            'year': year,
+            'home_team': home_team,
+            'away_team': away_team,
+            'pre_match_home_rating': home_rating,
+            'pre_match_away_rating': away_rating,
+            'rating_difference': home_rating - away_rating,
+            'adjusted_rating_difference': adjusted_diff,
+            'home_win_probability': home_win_prob,
+            'away_win_probability': 1 - home_win_prob,
+            'predicted_winner': home_team if home_win_prob > 0.5 else away_team,
+            'confidence': max(home_win_prob, 1 - home_win_prob),
+            'expected_margin': expected_margin,
+            'margin_std': margin_std
+        }
+        
+        if not pd.isna(hs) and not pd.isna(as_):
+            prediction_info.update({
+                'hscore': hs,
+                'ascore': as_,
+                'actual_result': 'home_win' if hs > as_ else ('away_win' if hs < as_ else 'draw'),
+                'margin': hs - as_,
+                'rating_change': rating_change,
+                'post_match_home_rating': home_rating + rating_change,
+                'post_match_away_rating': away_rating - rating_change,
+                'correct': (home_win_prob > 0.5 and hs > as_) or 
+                           (home_win_prob < 0.5 and hs < as_) or 
+                           (home_win_prob == 0.5 and hs == as_)
+            })
+            
+            predictor.rating_history.append({
+                'event': 'match',
+                'match_id': match_id,
+                'year': year,
+                'round_number': round_number,
+                'match_date': match_date,
+                'home_team': home_team,
+                'away_team': away_team,
+                'home_score': hs,
+                'away_score': as_,
+                'home_rating_before': home_rating,
+                'away_rating_before': away_rating,
+                'home_rating_after': home_rating + rating_change,
+                'away_rating_after': away_rating - rating_change,
+                'rating_change': rating_change
+            })
+        
+        predictor.predictions.append(prediction_info)
+
+
+def _predict_ensemble_with_kernel(predictor, matches, kernel):
+    """
+    Replay matches for every ensemble member at once through the batch kernel,
+    recording the weighted ensemble prediction alongside each member's probability
+    """
+    n_members = len(predictor.member_weights)
+    weights = predictor.member_weights
+    team_names = predictor.member_team_names
+    
+    # Member ratings are indexed by registry team ID, with rows added for newly registered teams
+    home_idx = predictor.teams.get_team_ids(matches['home_team'])
+    away_idx = predictor.teams.get_team_ids(matches['away_team'])
+    home_teams = [predictor.teams.get_team_name(team_id) for team_id in home_idx.tolist()]
+    away_teams = [predictor.teams.get_team_name(team_id) for team_id in away_idx.tolist()]
+    matches = matches.assign(home_team=home_teams, away_team=away_teams)
+    new_rows = predictor.teams.size - len(predictor.member_ratings)
+    predictor.member_ratings = np.vstack([predictor.member_ratings,
+                                          np.tile(predictor.member_params['base_rating'], (new_rows, 1))])
+    venues = matches['venue'].tolist()
+    
+    # Intern venues not seen in training, with no adjustment for any member
+    venue_idx = np.array([predictor.venue_ids.setdefault(venue, len(predictor.venue_ids)) if pd.notna(venue) else -1
+                          for venue in venues], dtype=np.int64)
+    new_venues = len(predictor.venue_ids) - len(predictor.member_venue_advantages)
+    predictor.member_venue_advantages = np.vstack([predictor.member_venue_advantages, np.zeros((new_venues, n_members))])
+    
+    hscore = matches['hscore'].to_numpy(dtype=float)
+    ascore = matches['ascore'].to_numpy(dtype=float)
+    years = matches['year'].to_numpy()
+    match_dates = [d.isoformat() if pd.notna(d) else None for d in matches['match_date']]
+    multipliers = margin_multipliers_batch(hscore, ascore, predictor.member_params['margin_factor'],
+                                           predictor.member_params['max_margin'])
+    completed = ~(np.isnan(hscore) | np.isnan(ascore))
+    
+    outputs = replay_outputs(len(matches), n_members)
+    
+    # Run the kernel one season at a time, applying carryover between seasons
+    season_starts = np.flatnonzero(np.diff(years)) + 1
+    bounds = [0] + season_starts.tolist() + [len(matches)]
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        if start > 0:
+            predictor.apply_season_carryover(years[start])
+        
+        # Add teams missing from the model as they first appear
+        for team in dict.fromkeys(team for pair in zip(home_teams[start:end], away_teams[start:end]) for team in pair):
+            if team not in team_names:
+                print(f"Warning: {team} not found in ratings, using base rating")
+                team_names.append(team)
+        
+        run_replay_batch(kernel, home_idx, away_idx, venue_idx, hscore, ascore, multipliers, predictor.member_ratings,
+                         predictor.member_venue_advantages, predictor.member_margin_sums, predictor.member_params,
+                         outputs, start, end)
+        predictor._sync_ensemble_ratings()
+        predictor.ratings_version += int(np.count_nonzero(completed[start:end]))
+        
+        # Combine members into the ensemble prediction (probabilities, ratings and margins are weighted means)
+        block = {name: values[start:end] for name, values in outputs.items()}
+        combined = {name: values @ weights for name, values in block.items()}
+        # Spread of the mixture of member margin distributions
+        combined['margin_std'] = np.sqrt(np.maximum(
+            (block['margin_std'] ** 2 + block['expected_margin'] ** 2) @ weights - combined['expected_margin'] ** 2, 0.0))
+        
+        first_record = len(predictor.predictions)
+        _record_kernel_outputs(predictor, matches.iloc[start:end], match_dates[start:end], combined)
+        for record, member_probs in zip(predictor.predictions[first_record:], block['probs'].tolist()):
+            for k, prob in enumerate(member_probs):
+                record[f'member_{k + 1}_home_win_probability'] = prob
+
+
+def replay_predictions(predictor, matches, engine='auto'):
+    """
+    Replay matches through a predictor, recording its predictions and rating history
+    
+    Completed matches update the ratings and upcoming matches are predicted
+    only, with season carryover between seasons.
+    
+    Parameters:
+    -----------
+    predictor: AFLEloPredictor
+        Predictor with a loaded model or ensemble
+    matches: pandas DataFrame
+        Matches in chronological order (see fetch_matches)
+    engine: str
+        Replay engine: 'reference' (row by row), 'python' (array kernel),
+        'numba' (JIT-compiled array kernel), 'rounds' (one vectorised update
+        per round) or 'auto' (fastest available)
+    """
+    engine = resolve_engine(engine)
+    if predictor.member_weights is not None:
+        if engine == 'reference':
+            print("Ensembles are replayed with the array engines, using the python engine")
+            engine = 'python'
+        _predict_ensemble_with_kernel(predictor, matches, get_batch_replay_kernel(engine))
+    elif engine != 'reference':
+        _predict_with_kernel(predictor, matches, get_replay_kernel(engine))
+    else:
+        # Track the current year to detect year changes
+        current_year = None
+    
+        # Process matches in chronological order
+        for i, match in matches.iterrows():
+            match_year = match['year']
+        
+            # Apply season carryover at the start of a new season
+            if current_year is not None and match_year != current_year:
+                predictor.apply_season_carryover(match_year)
+        
+            current_year = match_year
+        
+            # Determine if match has scores (completed)
+            has_scores = not pd.isna(match['hscore']) and not pd.isna(match['ascore'])
+        
+            if has_scores:
+                # For completed matches, update ratings
+                predictor.update_ratings(
+                    home_team=match['home_team'],
+                    away_team=match['away_team'],
+                    hscore=match['hscore'],
+                    ascore=match['ascore'],
+                    match_id=match['match_id'],
+                    year=match['year'],
+                    round_number=match['round_number'],
+                    match_date=match['match_date'].isoformat() if pd.notna(match['match_date']) else None,
+                    venue=match['venue']
+                )
+            else:
+                # For future matches, just predict without updating
+                predictor.predict_match(
+                    home_team=match['home_team'],
+                    away_team=match['away_team'],
+                    match_id=match['match_id'],
+                    year=match['year'],
+                    round_number=match['round_number'],
+                    match_date=match['match_date'].isoformat() if pd.notna(match['match_date']) else None,
+                    venue=match['venue']
+                )
+    
+    predictor.publish_snapshot()
+
+
+def save_upcoming_predictions(predictor, fixtures, filename):
+    """
+    Save predictions for upcoming fixtures as JSON, tagged with their ETag
+    
+    The ETag is the one predict_fixtures returns, which covers both the
+    ratings and the fixture list. The file is left untouched when it already
+    holds these fixtures under the current ETag, so its modification time (and
+    anything serving it with the ETag) only changes when a result, carryover
+    or fixture change moves the predictions.
+    
+    Returns:
+    --------
+    True if the file was written
+    """
+    previous = None
+    if os.path.exists(filename):
+        with open(filename, 'r') as f:
+            try:
+                previous = json.load(f)
+            except ValueError:
+                previous = None
+    
+    etag, predictions = predictor.predict_fixtures(fixtures)
+    payload = {
+        'etag': etag,
+        'ratings_etag': predictor.ratings_etag(),
+        'ratings_version': predictor.ratings_version,
+        'predictions': json.loads(pd.DataFrame(predictions).to_json(orient='records', double_precision=15)) if predictions else []
+    }
+    if previous == payload:
+        print(f"Upcoming predictions unchanged since ratings version {predictor.ratings_version} ({etag})")
+        return False
+    
+    tmp_path = filename + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(payload, f, indent=4)
+    os.replace(tmp_path, filename)
+    print(f"Saved {len(predictions)} upcoming predictions to {filename} ({etag})")
+    return True
+
+
+def _loss_probabilities(diffs):
+    """Probability that the side a rating difference favours loses"""
+    return 1.0 - 1.0 / (1.0 + 10 ** (-np.asarray(diffs, dtype=float) / 400))
+
+
+def strength_of_schedule(predictor, upcoming=None):
+    """
+    Strength of schedule for every team and season of a replay
+    
+    Played matches use the opponents' pre-match ratings recorded by the
+    replay (see replay_predictions). Remaining fixtures use the current
+    ratings through batch_win_probabilities. Difficulties are the mean
+    probability that an average team (at the base rating) would lose the
+    same fixtures, with the same home grounds, so they compare schedules
+    without the team's own strength.
+    
+    Parameters:
+    -----------
+    predictor: AFLEloPredictor
+        Predictor after replay_predictions
+    upcoming: pandas DataFrame
+        Fixtures without results (home_team, away_team, venue, match_id,
+        year and round_number)
+        
+    Returns:
+    --------
+    dict mapping each season to a dict of teams, each with arrays of
+    opponents, match IDs, rounds, home flags and opponent ratings for the
+    played and remaining fixtures, and the derived indices:
+    schedule_strength (mean opponent pre-match rating), schedule_index
+    (schedule_strength less the season's average), played_difficulty,
+    remaining_difficulty and remaining_expected_wins
+    """
+    if predictor.member_weights is not None:
+        base_rating = float(predictor.member_params['base_rating'] @ predictor.member_weights)
+    else:
+        base_rating = float(predictor.base_rating)
+    
+    # One row per team per played match, in replay order
+    records = pd.DataFrame(predictor.predictions)
+    if 'hscore' in records:
+        records = records[records['hscore'].notna()]
+    else:
+        records = records.iloc[:0]
+    advantage = (records['adjusted_rating_difference'] - records['rating_difference']).to_numpy(dtype=float)
+    home_rating = records['pre_match_home_rating'].to_numpy(dtype=float)
+    away_rating = records['pre_match_away_rating'].to_numpy(dtype=float)
+    played = pd.DataFrame({
+        'year': np.concatenate([records['year'], records['year']]),
+        'team': np.concatenate([records['home_team'], records['away_team']]),
+        'opponent': np.concatenate([records['away_team'], records['home_team']]),
+        'match_id': np.concatenate([records['match_id'], records['match_id']]),
+        'round': np.concatenate([records['round_number'], records['round_number']]),
+        'home': np.repeat([True, False], len(records)),
+        'opponent_rating': np.concatenate([away_rating, home_rating]),
+        'difficulty': np.concatenate([_loss_probabilities((base_rating + advantage) - away_rating),
+                                      _loss_probabilities(base_rating - (home_rating + advantage))])
+    })
+    
+    # Remaining fixtures from the current ratings
+    if upcoming is None:
+        upcoming = pd.DataFrame(columns=['home_team', 'away_team', 'venue', 'match_id', 'year', 'round_number'])
+    home_teams = [predictor.teams.canonical_name(team, register=False) or team for team in upcoming['home_team']]
+    away_teams = [predictor.teams.canonical_name(team, register=False) or team for team in upcoming['away_team']]
+    venues = upcoming['venue'].tolist()
+    home_probs = predictor.batch_win_probabilities(home_teams, away_teams, venues)
+    # An average team in place of each side
+    average_home_probs = predictor.batch_win_probabilities([None] * len(upcoming), away_teams, venues)
+    average_away_probs = predictor.batch_win_probabilities(home_teams, [None] * len(upcoming), venues)
+    ratings = predictor.team_ratings
+    remaining = pd.DataFrame({
+        'year': np.concatenate([upcoming['year'], upcoming['year']]),
+        'team': home_teams + away_teams,
+        'opponent': away_teams + home_teams,
+        'match_id': np.concatenate([upcoming['match_id'], upcoming['match_id']]),
+        'round': np.concatenate([upcoming['round_number'], upcoming['round_number']]),
+        'home': np.repeat([True, False], len(upcoming)),
+        'opponent_rating': [ratings.get(team, base_rating) for team in away_teams + home_teams],
+        'difficulty': np.concatenate([1.0 - average_home_probs, average_away_probs]),
+        'win_probability': np.concatenate([home_probs, 1.0 - home_probs])
+    })
+    
+    season_averages = played.groupby('year')['opponent_rating'].mean()
+    played_groups = dict(list(played.groupby(['year', 'team'], sort=False)))
+    remaining_groups = dict(list(remaining.groupby(['year', 'team'], sort=False)))
+    
+    schedule = {}
+    for year, team in sorted(set(played_groups) | set(remaining_groups)):
+        team_played = played_groups.get((year, team), played.iloc[:0])
+        team_remaining = remaining_groups.get((year, team), remaining.iloc[:0])
+        strength = float(team_played['opponent_rating'].mean()) if len(team_played) else None
+        schedule.setdefault(int(year), {})[team] = {
+            'opponents': team_played['opponent'].tolist(),
+            'match_ids': team_played['match_id'].tolist(),
+            'rounds': team_played['round'].tolist(),
+            'home': team_played['home'].tolist(),
+            'opponent_ratings': team_played['opponent_rating'].tolist(),
+            'played': len(team_played),
+            'schedule_strength': strength,
+            'schedule_index': strength - float(season_averages[year]) if strength is not None else None,
+            'played_difficulty': float(team_played['difficulty'].mean()) if len(team_played) else None,
+            'remaining_opponents': team_remaining['opponent'].tolist(),
+            'remaining_match_ids': team_remaining['match_id'].tolist(),
+            'remaining_rounds': team_remaining['round'].tolist(),
+            'remaining_home': team_remaining['home'].tolist(),
+            'remaining_opponent_ratings': team_remaining['opponent_rating'].tolist(),
+            'remaining': len(team_remaining),
+            'remaining_difficulty': float(team_remaining['difficulty'].mean()) if len(team_remaining) else None,
+            'remaining_expected_wins': float(team_remaining['win_probability'].sum())
+        }
+    return schedule
+
+
+def save_strength_of_schedule(predictor, schedule, filename):
+    """Save strength of schedule (see strength_of_schedule) as JSON, tagged with the ratings ETag"""
+    payload = {
+        'etag': predictor.ratings_etag(),
+        'ratings_version': predictor.ratings_version,
+        'seasons': {str(year): teams for year, teams in schedule.items()}
+    }
+    tmp_path = filename + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(payload, f, indent=4, default=lambda value: value.item() if hasattr(value, 'item') else str(value))
+    os.replace(tmp_path, filename)
+    print(f"Saved strength of schedule for {sum(len(teams) for teams in schedule.values())} team seasons "
+          f"to {filename}")
+
+
+def predict_matches(model_path, db_path, start_year, output_dir='.', engine='auto', force=False):
     """
     Make predictions for matches starting from specified year
     
@@ -437,11 +1336,37 @@ def predict_matches(model_path, db_path, start_year, output_dir='.'):
         Year to start predictions from
     output_dir: str
         Directory to save output files
+    engine: str
+        Replay engine: 'reference' (row by row), 'python' (array kernel),
+        'numba' (JIT-compiled array kernel), 'rounds' (one vectorised update
+        per round) or 'auto' (fastest available)
+    force: bool
+        Predict even when the matches, model and code are unchanged since
+        the last run with these outputs
         
     Returns:
     --------
     None
     """
+    predictions_file = os.path.join(output_dir, f"afl_elo_predictions_from_{start_year}.csv")
+    history_file = os.path.join(output_dir, f"afl_elo_rating_history_from_{start_year}.csv")
+    upcoming_file = os.path.join(output_dir, "afl_elo_upcoming_predictions.json")
+    schedule_file = os.path.join(output_dir, "afl_elo_strength_of_schedule.json")
+    
+    # Skip the replay when the inputs of the last run are unchanged
+    outputs = [predictions_file, history_file, upcoming_file, schedule_file]
+    fingerprint_file = fingerprint_path(predictions_file)
+    fingerprint = {
+        'matches': db_fingerprint(db_path, start_year),
+        'model': file_fingerprint(model_path),
+        'parameters': {'start_year': start_year, 'engine': engine},
+        'code': code_fingerprint()
+    }
+    if not force and outputs_current(fingerprint_file, fingerprint, outputs):
+        print(f"Matches, model and code unchanged since the last run ({fingerprint_file}); "
+              f"leaving the predictions as they are")
+        return
+    
     # Load the predictor
     predictor = AFLEloPredictor(model_path)
     
@@ -458,64 +1383,30 @@ def predict_matches(model_path, db_path, start_year, output_dir='.'):
     
     print(f"Found {len(matches)} matches from {years.min()} to {years.max()}")
     
-    # Track the current year to detect year changes
-    current_year = None
-    
-    # Process matches in chronological order
-    for i, match in matches.iterrows():
-        match_year = match['year']
-        
-        # Apply season carryover at the start of a new season
-        if current_year is not None and match_year != current_year:
-            predictor.apply_season_carryover(match_year)
-        
-        current_year = match_year
-        
-        # Determine if match has scores (completed)
-        has_scores = not pd.isna(match['hscore']) and not pd.isna(match['ascore'])
-        
-        if has_scores:
-            # For completed matches, update ratings
-            predictor.update_ratings(
-                home_team=match['home_team'],
-                away_team=match['away_team'],
-                hscore=match['hscore'],
-                ascore=match['ascore'],
-                match_id=match['match_id'],
-                year=match['year'],
-                round_number=match['round_number'],
-                match_date=match['match_date'].isoformat() if pd.notna(match['match_date']) else None,
-                venue=match['venue']
-            )
-        else:
-            # For future matches, just predict without updating
-            predictor.predict_match(
-                home_team=match['home_team'],
-                away_team=match['away_team'],
-                match_id=match['match_id'],
-                year=match['year'],
-                round_number=match['round_number'],
-                match_date=match['match_date'].isoformat() if pd.notna(match['match_date']) else None,
-                venue=match['venue']
-            )
+    replay_predictions(predictor, matches, engine=engine)
     
     # Save predictions and rating history
     os.makedirs(output_dir, exist_ok=True)
     
-    predictions_file = os.path.join(output_dir, f"afl_elo_predictions_from_{start_year}.csv")
-    history_file = os.path.join(output_dir, f"afl_elo_rating_history_from_{start_year}.csv")
-    
     predictor.save_predictions_to_csv(predictions_file)
     predictor.save_rating_history_to_csv(history_file)
     
+    # Predictions for fixtures without results, from the final ratings
+    upcoming = matches[matches['hscore'].isna() | matches['ascore'].isna()]
+    save_upcoming_predictions(predictor, upcoming, upcoming_file)
+    save_strength_of_schedule(predictor, strength_of_schedule(predictor, upcoming), schedule_file)
+    save_fingerprint(fingerprint_file, fingerprint, outputs)
+    
     # Evaluate the model on completed matches
     completed_predictions = [p for p in predictor.predictions if 'actual_result' in p]
     
     if completed_predictions:
         correct_count = sum(1 for p in completed_predictions if p.get('correct', False))
         accuracy = correct_count / len(completed_predictions)
+        margin_mae = np.mean([abs(p['margin'] - p['expected_margin']) for p in completed_predictions])
         
         print(f"\nPrediction Accuracy on {len(completed_predictions)} completed matches: {accuracy:.4f}")
+        print(f"Margin MAE on completed matches: {margin_mae:.2f} points")
     else:
         print("\nNo completed matches found to evaluate prediction accuracy")
     
@@ -532,11 +1423,16 @@ def main():
     parser.add_argument('--start-year', type=int, required=True,
                         help='Start year for predictions (inclusive)')
     parser.add_argument('--model-path', type=str, required=True,
-                        help='Path to the trained ELO model JSON file')
+                        help='Path to the trained ELO model (JSON or binary .elo) or ensemble JSON file')
     parser.add_argument('--db-path', type=str, default='data/afl_predictions.db',
                         help='Path to the SQLite database')
     parser.add_argument('--output-dir', type=str, default='.',
                         help='Directory to save output files')
+    parser.add_argument('--engine', type=str, default='auto',
+                        choices=['auto', 'numba', 'python', 'rounds', 'reference'],
+                        help='Replay engine (auto uses numba when installed, otherwise the pure-Python array engine)')
+    parser.add_argument('--force', action='store_true',
+                        help='Predict even if the matches, model and code are unchanged since the last run')
     
     args = parser.parse_args()
     
@@ -555,7 +1451,8 @@ def main():
         return
     
     # Make predictions
-    predict_matches(args.model_path, args.db_path, args.start_year, args.output_dir)
+    predict_matches(args.model_path, args.db_path, args.start_year, args.output_dir, engine=args.engine,
+                    force=args.force)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,240 @@
+import os
+import json
+import time
+import socket
+import sqlite3
+import argparse
+
+
+# Seconds a claimed task is held before other workers may take it over
+DEFAULT_LEASE = 900
+
+# Parameter sets scored together by one task
+DEFAULT_TASK_SIZE = 50
+
+# Claims (including ones lost to crashed workers) before a task is set aside as failed
+MAX_ATTEMPTS = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS queue_config (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    task_id INTEGER PRIMARY KEY,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    results TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks (status, lease_expires);
+"""
+
+
+def default_worker_id():
+    """Worker name from the host name and process ID"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class TuningQueue:
+    def __init__(self, path, timeout=60):
+        """
+        Parameter tuning work queue stored in a SQLite file
+
+        A coordinator fills the queue with tasks (batches of parameter sets)
+        and any number of workers, in other processes, containers or hosts
+        sharing the file, claim tasks and write their scores back. A claim is
+        a lease: if a worker crashes, its task becomes claimable again once
+        the lease expires. Claims run in an immediate transaction, so two
+        workers never hold the same task.
+
+        The database keeps SQLite's default rollback journal, which relies on
+        file locks only (WAL mode needs shared memory and does not work
+        across hosts). Lease expiry uses each worker's clock, so hosts should
+        keep their clocks in sync to well within the lease.
+
+        Parameters:
+        -----------
+        path: str
+            Queue database file (created if missing)
+        timeout: float
+            Seconds to wait for another process's lock before failing
+        """
+        self.path = path
+        self.connection = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def _transaction(self):
+        """Start a write transaction, taking the database lock up front"""
+        self.connection.execute("BEGIN IMMEDIATE")
+
+    def create(self, config, param_sets, task_size=DEFAULT_TASK_SIZE):
+        """
+        Fill an empty queue with parameter sets
+
+        Parameters:
+        -----------
+        config: dict
+            Tuning settings shared by every worker (stored as JSON)
+        param_sets: list of dict
+            Parameter sets to score
+        task_size: int
+            Parameter sets per task
+
+        Returns:
+        --------
+        Number of tasks created
+        """
+        self._transaction()
+        try:
+            if self.connection.execute("SELECT COUNT(*) FROM tasks").fetchone()[0] > 0:
+                raise ValueError(f"Tuning queue {self.path} already has tasks")
+            self.connection.executemany("INSERT INTO queue_config (key, value) VALUES (?, ?)",
+                                        [(key, json.dumps(value)) for key, value in config.items()])
+            tasks = [(json.dumps(param_sets[start:start + task_size]),)
+                     for start in range(0, len(param_sets), task_size)]
+            self.connection.executemany("INSERT INTO tasks (params) VALUES (?)", tasks)
+            self.connection.execute("COMMIT")
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            raise
+        return len(tasks)
+
+    def config(self):
+        """Tuning settings stored by the coordinator"""
+        return {key: json.loads(value) for key, value in self.connection.execute("SELECT key, value FROM queue_config")}
+
+    def claim(self, worker, lease=DEFAULT_LEASE):
+        """
+        Claim the next pending task, or one whose lease has expired
+
+        Returns:
+        --------
+        (task_id, list of parameter sets), or None if no task is available
+        """
+        now = time.time()
+        self._transaction()
+        try:
+            # Tasks that keep losing their workers are set aside rather than retried forever
+            self.connection.execute(
+                "UPDATE tasks SET status = 'failed', error = COALESCE(error, 'lease expired'), worker = NULL "
+                "WHERE status = 'running' AND lease_expires < ? AND attempts >= ?", (now, MAX_ATTEMPTS))
+            row = self.connection.execute(
+                "SELECT task_id, params FROM tasks "
+                "WHERE status = 'pending' OR (status = 'running' AND lease_expires < ?) "
+                "ORDER BY task_id LIMIT 1", (now,)).fetchone()
+            if row is not None:
+                self.connection.execute(
+                    "UPDATE tasks SET status = 'running', worker = ?, lease_expires = ?, attempts = attempts + 1 "
+                    "WHERE task_id = ?", (worker, now + lease, row[0]))
+            self.connection.execute("COMMIT")
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            raise
+        return None if row is None else (row[0], json.loads(row[1]))
+
+    def complete(self, task_id, worker, results):
+        """
+        Store a task's results
+
+        Scores are deterministic, so if the task was taken over after this
+        worker's lease expired, whichever worker finishes first is kept.
+
+        Returns:
+        --------
+        True if these results were stored
+        """
+        cursor = self.connection.execute(
+            "UPDATE tasks SET status = 'done', worker = ?, lease_expires = NULL, error = NULL, results = ? "
+            "WHERE task_id = ? AND status != 'done'", (worker, json.dumps(results), task_id))
+        return cursor.rowcount > 0
+
+    def release(self, task_id, worker, error):
+        """Return a task this worker could not finish to the queue (failed after MAX_ATTEMPTS claims)"""
+        self.connection.execute(
+            "UPDATE tasks SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+            "worker = NULL, lease_expires = NULL, error = ? "
+            "WHERE task_id = ? AND status = 'running' AND worker = ?", (MAX_ATTEMPTS, error, task_id, worker))
+
+    def retry_failed(self):
+        """Return failed tasks to the queue; returns the number of tasks"""
+        cursor = self.connection.execute(
+            "UPDATE tasks SET status = 'pending', attempts = 0, error = NULL WHERE status = 'failed'")
+        return cursor.rowcount
+
+    def counts(self):
+        """Number of tasks in each status"""
+        counts = {'pending': 0, 'running': 0, 'done': 0, 'failed': 0}
+        counts.update(self.connection.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status"))
+        return counts
+
+    def is_finished(self):
+        """Whether every task is done or failed"""
+        counts = self.counts()
+        return counts['pending'] == 0 and counts['running'] == 0
+
+    def results(self):
+        """Results of every completed task, in task order"""
+        results = []
+        for (task_results,) in self.connection.execute(
+                "SELECT results FROM tasks WHERE status = 'done' ORDER BY task_id"):
+            results.extend(json.loads(task_results))
+        return results
+
+    def failures(self):
+        """(task_id, number of parameter sets, error) for every failed task"""
+        return [(task_id, len(json.loads(params)), error) for task_id, params, error in self.connection.execute(
+            "SELECT task_id, params, error FROM tasks WHERE status = 'failed' ORDER BY task_id")]
+
+
+def main():
+    """Main function to inspect or repair a tuning queue"""
+    parser = argparse.ArgumentParser(description='Inspect a distributed AFL ELO tuning queue')
+    parser.add_argument('action', type=str, choices=['status', 'retry'],
+                        help='Show progress and the best results so far, or return failed tasks to the queue')
+    parser.add_argument('--queue', type=str, required=True,
+                        help='Tuning queue database (see afl_elo_training.py --tuning-queue)')
+
+    args = parser.parse_args()
+
+    if not os.path.exists(args.queue):
+        print(f"Error: Tuning queue not found at {args.queue}")
+        return
+
+    queue = TuningQueue(args.queue)
+    if args.action == 'retry':
+        print(f"Returned {queue.retry_failed()} failed tasks to the queue")
+        return
+
+    config = queue.config()
+    counts = queue.counts()
+    print(f"Tuning queue {args.queue}: {config.get('matches')} matches from {config.get('start_year')} to "
+          f"{config.get('end_year')}, {config.get('cv')}-fold cross-validation, objective {config.get('objective')}")
+    print(f"Tasks: {counts['done']} done, {counts['running']} running, {counts['pending']} pending, "
+          f"{counts['failed']} failed")
+
+    for task_id, n_params, error in queue.failures():
+        print(f"  Task {task_id} ({n_params} parameter sets) failed: {error}")
+
+    now = time.time()
+    for task_id, worker, lease_expires in queue.connection.execute(
+            "SELECT task_id, worker, lease_expires FROM tasks WHERE status = 'running' ORDER BY task_id"):
+        state = "lease expired" if lease_expires < now else f"lease ends in {lease_expires - now:.0f}s"
+        print(f"  Task {task_id} running on {worker} ({state})")
+
+    results = sorted(queue.results(), key=lambda x: x[config.get('objective', 'log_loss')])
+    if results:
+        print(f"\nBest of {len(results)} parameter sets scored so far:")
+        for i, result in enumerate(results[:3]):
+            print(f"  {i+1}. Log loss: {result['log_loss']:.4f}, ECE: {result['ece']:.4f}, "
+                  f"Margin MAE: {result['margin_mae']:.2f}, Parameters: {result['params']}")
+
+
+if __name__ == "__main__":
+    main()
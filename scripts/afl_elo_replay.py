@@ -0,0 +1,432 @@
+import math
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+
+# Replay engines ('auto' picks numba when installed, otherwise python)
+ENGINES = ['numba', 'python', 'rounds', 'reference']
+
+
+def _replay_matches(home_idx, away_idx, venue_idx, hscore, ascore, margin_multiplier, ratings, venue_advantages,
+                    margin_sums, k_factor, home_advantage, venue_k_factor,
+                    pre_home, pre_away, adjusted_diff, probs, expected_margin, margin_std, rating_change):
+    """
+    Replay a block of matches from one season, updating ratings in place
+
+    Written against plain arrays and scalars so the same function runs as
+    pure Python or as a Numba-compiled kernel. The arithmetic mirrors
+    AFLEloModel.update_ratings operation for operation so both engines
+    reproduce the reference results.
+
+    Parameters:
+    -----------
+    home_idx, away_idx: int array
+        Team indexes into ratings for each match
+    venue_idx: int array
+        Venue indexes into venue_advantages (-1 for unknown)
+    hscore, ascore: float array
+        Scores for each match (NaN for matches not yet played, which are predicted only)
+    margin_multiplier: float array
+        K-factor multiplier for each match's capped margin (see margin_multipliers)
+    ratings: float array
+        Team ratings, updated in place
+    venue_advantages: float array
+        Per-venue home advantage adjustments, updated in place
+    margin_sums: float array
+        Margin fit running sums [sxx, sxy, syy, n], updated in place
+    k_factor, home_advantage, venue_k_factor: float
+        Model parameters
+    pre_home, pre_away, adjusted_diff, probs, expected_margin, margin_std, rating_change: float array
+        Output arrays filled for each match (rating_change is NaN for unplayed matches)
+    """
+    for i in range(home_idx.shape[0]):
+        h = home_idx[i]
+        a = away_idx[i]
+        v = venue_idx[i]
+        home_rating = ratings[h]
+        away_rating = ratings[a]
+
+        advantage = home_advantage
+        if v >= 0:
+            advantage = home_advantage + venue_advantages[v]
+        diff = (home_rating + advantage) - away_rating
+        prob = 1.0 / (1.0 + 10 ** (-diff / 400))
+
+        # Expected margin from the fit so far
+        scale = 0.0
+        spread = 0.0
+        if margin_sums[3] > 0:
+            if margin_sums[0] > 0:
+                scale = margin_sums[1] / margin_sums[0]
+            residual_ss = margin_sums[2] - 2 * scale * margin_sums[1] + scale * scale * margin_sums[0]
+            spread = math.sqrt(max(residual_ss, 0.0) / margin_sums[3])
+
+        pre_home[i] = home_rating
+        pre_away[i] = away_rating
+        adjusted_diff[i] = diff
+        probs[i] = prob
+        expected_margin[i] = scale * diff
+        margin_std[i] = spread
+
+        # Matches without scores are predicted but leave ratings untouched
+        if hscore[i] != hscore[i] or ascore[i] != ascore[i]:
+            rating_change[i] = np.nan
+            continue
+
+        margin = hscore[i] - ascore[i]
+        if margin > 0:
+            actual_result = 1.0
+        elif margin < 0:
+            actual_result = 0.0
+        else:
+            actual_result = 0.5
+
+        change = k_factor * margin_multiplier[i] * (actual_result - prob)
+        ratings[h] = home_rating + change
+        ratings[a] = away_rating - change
+        rating_change[i] = change
+
+        if venue_k_factor > 0 and v >= 0:
+            venue_advantages[v] += venue_k_factor * margin_multiplier[i] * (actual_result - prob)
+
+        margin_sums[0] += diff * diff
+        margin_sums[1] += diff * margin
+        margin_sums[2] += margin * margin
+        margin_sums[3] += 1
+
+
+def _replay_matches_batch(home_idx, away_idx, venue_idx, hscore, ascore, margin_multiplier, ratings, venue_advantages,
+                          margin_sums, k_factor, home_advantage, venue_k_factor, record,
+                          pre_home, pre_away, adjusted_diff, probs, expected_margin, margin_std, rating_change):
+    """
+    Replay a block of matches for many parameter sets ("members") at once
+
+    Same update as _replay_matches, vectorised over a trailing member axis:
+    ratings is (teams, members), venue_advantages is (venues, members),
+    margin_sums is (4, members), margin_multiplier and the output arrays are
+    (matches, members) and the parameters are (members,) arrays. The output
+    arrays are only written when record is True, so callers that only need
+    the final ratings can pass empty (0, members) arrays.
+    """
+    for i in range(home_idx.shape[0]):
+        h = home_idx[i]
+        a = away_idx[i]
+        v = venue_idx[i]
+        home_rating = ratings[h, :].copy()
+        away_rating = ratings[a, :].copy()
+
+        if v >= 0:
+            diff = (home_rating + (home_advantage + venue_advantages[v, :])) - away_rating
+        else:
+            diff = (home_rating + home_advantage) - away_rating
+        prob = 1.0 / (1.0 + 10.0 ** (-diff / 400))
+
+        if record:
+            # Expected margin from each member's fit so far
+            sxx = margin_sums[0, :]
+            scale = np.where(sxx > 0, margin_sums[1, :] / np.where(sxx > 0, sxx, 1.0), 0.0)
+            residual_ss = margin_sums[2, :] - 2 * scale * margin_sums[1, :] + scale * scale * sxx
+            spread = np.where(margin_sums[3, :] > 0,
+                              np.sqrt(np.maximum(residual_ss, 0.0) / np.maximum(margin_sums[3, :], 1.0)), 0.0)
+            pre_home[i, :] = home_rating
+            pre_away[i, :] = away_rating
+            adjusted_diff[i, :] = diff
+            probs[i, :] = prob
+            expected_margin[i, :] = scale * diff
+            margin_std[i, :] = spread
+
+        # Matches without scores are predicted but leave ratings untouched
+        if hscore[i] != hscore[i] or ascore[i] != ascore[i]:
+            if record:
+                rating_change[i, :] = np.nan
+            continue
+
+        margin = hscore[i] - ascore[i]
+        if margin > 0:
+            actual_result = 1.0
+        elif margin < 0:
+            actual_result = 0.0
+        else:
+            actual_result = 0.5
+
+        change = k_factor * margin_multiplier[i, :] * (actual_result - prob)
+        ratings[h, :] = home_rating + change
+        ratings[a, :] = away_rating - change
+        if record:
+            rating_change[i, :] = change
+
+        if v >= 0:
+            venue_advantages[v, :] += venue_k_factor * margin_multiplier[i, :] * (actual_result - prob)
+
+        margin_sums[0, :] += diff * diff
+        margin_sums[1, :] += diff * margin
+        margin_sums[2, :] += margin * margin
+        margin_sums[3, :] += 1
+
+
+def round_bounds(home_idx, away_idx, venue_idx=None):
+    """
+    Split a block of matches into rounds in which no team plays twice
+
+    A round runs until the first match involving a team that has already
+    played in it (or, when venue_idx is given, a venue already used in it).
+    Every club plays once per AFL round, so this follows the round numbers,
+    and it also splits rounds where a team plays twice under one number
+    (such as an opening round listed with round 1). Teams with a bye leave
+    the round early, which is harmless because their ratings do not change.
+
+    Returns:
+    --------
+    int array of round start indexes followed by the number of matches
+    """
+    n_matches = home_idx.shape[0]
+    if n_matches == 0:
+        return np.array([0], dtype=np.int64)
+
+    # Previous match of either team (or the venue) for every match, -1 if none
+    keys = [home_idx, away_idx]
+    if venue_idx is not None:
+        # Offset venue indexes past the team indexes, and give unknown venues a unique key
+        offset = max(home_idx.max(), away_idx.max()) + 1
+        keys.append(np.where(venue_idx >= 0, venue_idx + offset, -1 - np.arange(n_matches)))
+    key = np.concatenate(keys)
+    position = np.tile(np.arange(n_matches), len(keys))
+    order = np.lexsort((position, key))
+    previous = np.full(len(key), -1)
+    same_key = key[order][1:] == key[order][:-1]
+    previous[order[1:][same_key]] = position[order][:-1][same_key]
+    previous = previous.reshape(len(keys), n_matches).max(axis=0)
+
+    bounds = [0]
+    while bounds[-1] < n_matches:
+        start = bounds[-1]
+        repeats = np.flatnonzero(previous[start + 1:] >= start)
+        bounds.append(start + 1 + repeats[0] if len(repeats) else n_matches)
+    return np.array(bounds, dtype=np.int64)
+
+
+def _replay_rounds_batch(home_idx, away_idx, venue_idx, hscore, ascore, margin_multiplier, ratings, venue_advantages,
+                         margin_sums, k_factor, home_advantage, venue_k_factor, record,
+                         pre_home, pre_away, adjusted_diff, probs, expected_margin, margin_std, rating_change,
+                         scalar_power=False):
+    """
+    Replay a block of matches one round at a time, for many members at once
+
+    Takes the same arguments as _replay_matches_batch. Within a round (see
+    round_bounds) no team plays twice, so every match sees the ratings from
+    the end of the previous round and the round's updates are one scatter
+    into the ratings array. The margin fit and venue adjustments still
+    change match by match: the sums seen by each match are cumulative sums
+    over the round, added in match order. The results are identical to the
+    match-by-match kernels with a loop iteration per round instead of per match.
+
+    NumPy's vectorised power can differ from the C library's in the last
+    bit, so scalar_power computes the win probabilities one match at a time
+    as the single-parameter kernels do (the batch kernels use NumPy's).
+    """
+    venue_learning = bool(np.any(np.asarray(venue_k_factor) > 0))
+    bounds = round_bounds(home_idx, away_idx, venue_idx if venue_learning else None)
+
+    played = (hscore == hscore) & (ascore == ascore)
+    margin = np.where(played, hscore - ascore, 0.0)
+    actual_result = np.where(margin > 0, 1.0, np.where(margin < 0, 0.0, 0.5))[:, None]
+    margin = margin[:, None]
+    # Matches played before each match of the block (whole numbers, so their sums are exact in any order)
+    played_before = np.concatenate([[0.0], np.cumsum(played)])
+
+    for start, end in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+        h = home_idx[start:end]
+        a = away_idx[start:end]
+        v = venue_idx[start:end]
+        done = played[start:end]
+        all_done = bool(done.all())
+        home_rating = ratings[h]
+        away_rating = ratings[a]
+
+        known = v >= 0
+        if known.all():
+            diff = (home_rating + (home_advantage + venue_advantages[v])) - away_rating
+        elif known.any():
+            advantage = np.where(known[:, None], home_advantage + venue_advantages[np.maximum(v, 0)], home_advantage)
+            diff = (home_rating + advantage) - away_rating
+        else:
+            diff = (home_rating + home_advantage) - away_rating
+        if scalar_power:
+            power = np.array([10 ** exponent for exponent in (-diff / 400).ravel().tolist()]).reshape(diff.shape)
+        else:
+            power = 10.0 ** (-diff / 400)
+        prob = 1.0 / (1.0 + power)
+
+        # Margin fit sums before each match, accumulated in match order
+        round_margin = margin[start:end]
+        sums = []
+        for k, increment in enumerate([diff * diff, diff * round_margin, np.broadcast_to(round_margin * round_margin,
+                                                                                          diff.shape)]):
+            running = np.empty((end - start + 1, diff.shape[1]))
+            running[0] = margin_sums[k]
+            running[1:] = increment if all_done else np.where(done[:, None], increment, 0.0)
+            np.cumsum(running, axis=0, out=running)
+            margin_sums[k] = running[-1]
+            sums.append(running[:-1])
+
+        if record:
+            sxx, sxy, syy = sums
+            n = margin_sums[3] + (played_before[start:end] - played_before[start])[:, None]
+            scale = np.where(sxx > 0, sxy / np.where(sxx > 0, sxx, 1.0), 0.0)
+            residual_ss = syy - 2 * scale * sxy + scale * scale * sxx
+            spread = np.where(n > 0, np.sqrt(np.maximum(residual_ss, 0.0) / np.maximum(n, 1.0)), 0.0)
+            pre_home[start:end] = home_rating
+            pre_away[start:end] = away_rating
+            adjusted_diff[start:end] = diff
+            probs[start:end] = prob
+            expected_margin[start:end] = scale * diff
+            margin_std[start:end] = spread
+        margin_sums[3] += played_before[end] - played_before[start]
+
+        # Matches without scores are predicted but leave ratings untouched
+        change = k_factor * margin_multiplier[start:end] * (actual_result[start:end] - prob)
+        if all_done:
+            ratings[h] = home_rating + change
+            ratings[a] = away_rating - change
+        else:
+            ratings[h[done]] = home_rating[done] + change[done]
+            ratings[a[done]] = away_rating[done] - change[done]
+        if record:
+            rating_change[start:end] = change if all_done else np.where(done[:, None], change, np.nan)
+
+        learn = done & known
+        if venue_learning and learn.any():
+            venue_advantages[v[learn]] += (venue_k_factor * margin_multiplier[start:end][learn]
+                                           * (actual_result[start:end][learn] - prob[learn]))
+
+
+def _replay_rounds(home_idx, away_idx, venue_idx, hscore, ascore, margin_multiplier, ratings, venue_advantages,
+                   margin_sums, k_factor, home_advantage, venue_k_factor,
+                   pre_home, pre_away, adjusted_diff, probs, expected_margin, margin_std, rating_change):
+    """Round-synchronous replay of a block of matches for one parameter set (see _replay_rounds_batch)"""
+    _replay_rounds_batch(home_idx, away_idx, venue_idx, hscore, ascore, margin_multiplier[:, None],
+                         ratings[:, None], venue_advantages[:, None], margin_sums[:, None],
+                         np.array([k_factor]), np.array([home_advantage]), np.array([venue_k_factor]), True,
+                         pre_home[:, None], pre_away[:, None], adjusted_diff[:, None], probs[:, None],
+                         expected_margin[:, None], margin_std[:, None], rating_change[:, None], scalar_power=True)
+
+
+_jit_replay_matches = None
+_jit_replay_matches_batch = None
+
+
+def margin_multipliers(hscore, ascore, margin_factor, max_margin):
+    """
+    K-factor multiplier for each match's capped margin
+
+    This depends only on the scores, so it is computed up front with NumPy
+    rather than inside the kernel (which also keeps np.log1p, and so the
+    exact results of the reference path, for both engines).
+    """
+    if margin_factor <= 0:
+        return np.ones(len(hscore))
+    capped_margin = np.minimum(np.abs(hscore - ascore), max_margin)
+    return np.log1p(capped_margin * margin_factor) / np.log1p(max_margin * margin_factor)
+
+
+def margin_multipliers_batch(hscore, ascore, margin_factor, max_margin):
+    """K-factor multipliers for each match (rows) and parameter set (columns)"""
+    margin_factor = np.asarray(margin_factor, dtype=float)
+    max_margin = np.asarray(max_margin, dtype=float)
+    capped_margin = np.minimum(np.abs(hscore - ascore)[:, None], max_margin[None, :])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        multipliers = np.log1p(capped_margin * margin_factor) / np.log1p(max_margin * margin_factor)
+    return np.where(margin_factor > 0, multipliers, 1.0)
+
+
+def resolve_engine(engine):
+    """
+    Resolve a requested replay engine to one that is available
+
+    'auto' picks the fastest available engine. 'numba' falls back to the
+    pure-Python array engine when Numba is not installed.
+    """
+    if engine == 'auto':
+        return 'numba' if numba is not None else 'python'
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown replay engine '{engine}', expected one of: auto, {', '.join(ENGINES)}")
+    if engine == 'numba' and numba is None:
+        print("Warning: numba is not installed, falling back to the pure-Python replay engine")
+        return 'python'
+    return engine
+
+
+def available_engines():
+    """Replay engines that can run here, fastest first"""
+    return [engine for engine in ENGINES if engine != 'numba' or numba is not None]
+
+
+def get_replay_kernel(engine):
+    """Return the match replay function for an array engine ('python', 'numba' or 'rounds')"""
+    global _jit_replay_matches
+
+    if engine == 'rounds':
+        return _replay_rounds
+    if engine == 'numba':
+        if _jit_replay_matches is None:
+            _jit_replay_matches = numba.njit(cache=True)(_replay_matches)
+        return _jit_replay_matches
+    return _replay_matches
+
+
+def get_batch_replay_kernel(engine):
+    """Return the multi-parameter replay function for an array engine ('python', 'numba' or 'rounds')"""
+    global _jit_replay_matches_batch
+
+    if engine == 'rounds':
+        return _replay_rounds_batch
+    if engine == 'numba':
+        if _jit_replay_matches_batch is None:
+            _jit_replay_matches_batch = numba.njit(cache=True)(_replay_matches_batch)
+        return _jit_replay_matches_batch
+    return _replay_matches_batch
+
+
+def replay_outputs(n_matches, n_members=None):
+    """Allocate the per-match output arrays filled by the replay kernel (with a member axis for batches)"""
+    shape = n_matches if n_members is None else (n_matches, n_members)
+    return {name: np.empty(shape) for name in
+            ['pre_home', 'pre_away', 'adjusted_diff', 'probs', 'expected_margin', 'margin_std', 'rating_change']}
+
+
+def run_replay(kernel, home_idx, away_idx, venue_idx, hscore, ascore, multipliers, ratings, venue_advantages,
+               margin_sums, params, outputs, start, end):
+    """Run the kernel over matches[start:end], writing into the matching slice of the output arrays"""
+    kernel(home_idx[start:end], away_idx[start:end], venue_idx[start:end], hscore[start:end], ascore[start:end],
+           multipliers[start:end], ratings, venue_advantages, margin_sums,
+           float(params['k_factor']), float(params['home_advantage']), float(params['venue_k_factor']),
+           outputs['pre_home'][start:end], outputs['pre_away'][start:end], outputs['adjusted_diff'][start:end],
+           outputs['probs'][start:end], outputs['expected_margin'][start:end], outputs['margin_std'][start:end],
+           outputs['rating_change'][start:end])
+
+
+def run_replay_batch(kernel, home_idx, away_idx, venue_idx, hscore, ascore, multipliers, ratings, venue_advantages,
+                     margin_sums, params, outputs, start, end, record=True):
+    """
+    Run the batch kernel over matches[start:end] for every member
+
+    params holds (members,) arrays for k_factor, home_advantage and
+    venue_k_factor. outputs may be None when record is False.
+    """
+    if outputs is None or not record:
+        n_members = ratings.shape[1]
+        outputs = {name: np.empty((0, n_members)) for name in replay_outputs(0)}
+        sliced = outputs
+    else:
+        sliced = {name: values[start:end] for name, values in outputs.items()}
+    kernel(home_idx[start:end], away_idx[start:end], venue_idx[start:end], hscore[start:end], ascore[start:end],
+           multipliers[start:end], ratings, venue_advantages, margin_sums,
+           np.asarray(params['k_factor'], dtype=float), np.asarray(params['home_advantage'], dtype=float),
+           np.asarray(params['venue_k_factor'], dtype=float), record,
+           sliced['pre_home'], sliced['pre_away'], sliced['adjusted_diff'], sliced['probs'],
+           sliced['expected_margin'], sliced['margin_std'], sliced['rating_change'])
+
@@ -0,0 +1,586 @@
+import os
+import csv
+import json
+import sqlite3
+import argparse
+import resource
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from afl_elo_training import AFLEloModel, DEFAULT_PARAMS, _replay_with_kernel, match_log_losses
+from afl_elo_predictions import AFLEloPredictor, _predict_with_kernel, _predict_ensemble_with_kernel
+from afl_elo_replay import resolve_engine, get_replay_kernel, get_batch_replay_kernel
+from afl_match_cache import CACHE_DIR, iter_games
+from afl_elo_model_file import BINARY_EXTENSION
+from afl_teams import TEAMS
+
+
+# Matches held in memory at once
+DEFAULT_CHUNK_SIZE = 5000
+
+# Same columns, joins and order as fetch_afl_data / fetch_matches
+MATCH_QUERY = """
+SELECT
+    m.match_id, m.match_number, m.round_number, m.match_date,
+    m.venue, m.year, m.hscore, m.ascore,
+    ht.name as home_team, at.name as away_team
+FROM
+    matches m
+JOIN
+    teams ht ON m.home_team_id = ht.team_id
+JOIN
+    teams at ON m.away_team_id = at.team_id
+{where_clause}
+ORDER BY
+    m.year, m.match_date
+"""
+
+# Squiggle is_final codes -> round names, as stored by sync-games.js
+FINALS_ROUNDS = {
+    2: 'Elimination Final',
+    3: 'Qualifying Final',
+    4: 'Semi Final',
+    5: 'Preliminary Final',
+    6: 'Grand Final'
+}
+
+# Columns of the streamed prediction CSV from afl_elo_predictions.py (completed match columns last)
+PREDICTION_COLUMNS = [
+    'match_id', 'round_number', 'match_date', 'venue', 'year', 'home_team', 'away_team',
+    'pre_match_home_rating', 'pre_match_away_rating', 'rating_difference', 'adjusted_rating_difference',
+    'home_win_probability', 'away_win_probability', 'predicted_winner', 'confidence', 'expected_margin',
+    'margin_std', 'hscore', 'ascore', 'actual_result', 'margin', 'rating_change', 'post_match_home_rating',
+    'post_match_away_rating', 'correct'
+]
+
+# Columns of the streamed rating history CSV (as written by save_rating_history_to_csv)
+HISTORY_COLUMNS = ['event', 'match_id', 'date', 'year', 'round', 'team', 'opponent', 'score', 'opponent_score',
+                   'result', 'rating_before', 'rating_after', 'rating_change']
+
+# Equal-width probability bins for the running expected calibration error
+ECE_BINS = 10
+
+
+def iter_db_matches(db_path, start_year=None, end_year=None, completed_only=True, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Stream matches from the SQLite database in chronological chunks
+
+    Rows are read from the cursor with fetchmany, so at most chunk_size
+    matches are held in memory regardless of the length of the history.
+
+    Parameters:
+    -----------
+    db_path: str
+        Path to SQLite database
+    start_year: int
+        Optional first year (inclusive)
+    end_year: int
+        Optional last year (inclusive)
+    completed_only: bool
+        Only matches with scores (as fetch_afl_data), or every match (as fetch_matches)
+    chunk_size: int
+        Maximum number of matches per chunk
+
+    Returns:
+    --------
+    generator of pandas DataFrames with the columns of fetch_afl_data
+    """
+    conditions = []
+    params = []
+    if completed_only:
+        conditions.append("m.hscore IS NOT NULL AND m.ascore IS NOT NULL")
+    if start_year:
+        conditions.append("m.year >= ?")
+        params.append(start_year)
+    if end_year:
+        conditions.append("m.year <= ?")
+        params.append(end_year)
+    where_clause = "WHERE \n    " + " AND ".join(conditions) if conditions else ""
+
+    conn = sqlite3.connect(db_path)
+    try:
+        cursor = conn.execute(MATCH_QUERY.format(where_clause=where_clause), params)
+        columns = [description[0] for description in cursor.description]
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)
+    finally:
+        conn.close()
+
+
+def _cache_games_to_matches(games):
+    """
+    Convert indexed Squiggle games to match rows, mapping rounds and dates as sync-games.js does
+
+    Fixtures whose teams are not known yet (stored with an empty team name)
+    are dropped, as the database query's joins on the teams table drop them.
+    """
+    games = games[(games['hteam'] != '') & (games['ateam'] != '')]
+    round_numbers = games['round'].astype(str).to_numpy(dtype=object)
+    round_numbers[(games['roundname'] == 'Opening Round').to_numpy()] = 'OR'
+    finals = (games['is_final'] > 0).to_numpy()
+    round_numbers[finals] = [FINALS_ROUNDS.get(code, 'Finals') for code in games['is_final'][finals].tolist()]
+
+    timestamps = pd.to_datetime(games['unixtime'].where(games['unixtime'] > 0), unit='s')
+    match_dates = timestamps.dt.strftime('%Y-%m-%dT%H:%M:%S.000Z').where(timestamps.notna(), games['date'])
+
+    matches = pd.DataFrame({
+        'match_id': games['id'].to_numpy(),
+        'match_number': games['id'].to_numpy(),
+        'round_number': round_numbers,
+        'match_date': match_dates.to_numpy(),
+        'venue': games['venue'].to_numpy(),
+        'year': games['year'].to_numpy(),
+        'hscore': games['hscore'].to_numpy(),
+        'ascore': games['ascore'].to_numpy(),
+        'home_team': games['hteam'].to_numpy(),
+        'away_team': games['ateam'].to_numpy()
+    })
+    return matches.sort_values(['year', 'match_date'], kind='stable').reset_index(drop=True)
+
+
+def iter_cache_matches(start_year=None, end_year=None, completed_only=True, chunk_size=DEFAULT_CHUNK_SIZE,
+                       cache_dir=CACHE_DIR):
+    """
+    Stream matches from the columnar match cache in chronological chunks
+
+    Seasons are loaded one at a time from the pre-parsed yearly binaries
+    (see afl_match_cache.py). The Squiggle game ID is used as the match ID.
+
+    Parameters:
+    -----------
+    start_year: int
+        Optional first year (inclusive)
+    end_year: int
+        Optional last year (inclusive)
+    completed_only: bool
+        Only completed matches, or every match
+    chunk_size: int
+        Maximum number of matches per chunk
+    cache_dir: str
+        Directory holding the cached Squiggle responses
+
+    Returns:
+    --------
+    generator of pandas DataFrames with the columns of fetch_afl_data
+    """
+    # Cache files are named by four-digit year, and years without one are skipped
+    years = range(start_year or 1000, (end_year or 9999) + 1) if start_year or end_year else None
+    for year, games in iter_games(years, cache_dir=cache_dir):
+        matches = _cache_games_to_matches(games)
+        if completed_only:
+            matches = matches[matches['hscore'].notna() & matches['ascore'].notna()]
+        for start in range(0, len(matches), chunk_size):
+            yield matches.iloc[start:start + chunk_size]
+
+
+def iter_synthetic_matches(n_matches, matches_per_season=200, start_year=1900, seed=None,
+                           chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Generate random completed matches between the current clubs, for stress testing
+
+    Parameters:
+    -----------
+    n_matches: int
+        Total number of matches
+    matches_per_season: int
+        Matches per season (seasons then run on past the current year as needed)
+    start_year: int
+        Year of the first season
+    seed: int
+        Random seed
+    chunk_size: int
+        Maximum number of matches per chunk
+
+    Returns:
+    --------
+    generator of pandas DataFrames with the columns of fetch_afl_data
+    """
+    rng = np.random.default_rng(seed)
+    teams = np.array([team for team, team_id in TEAMS.items() if team_id <= 18], dtype=object)
+    venues = np.array([f"Venue {i + 1}" for i in range(12)], dtype=object)
+
+    for start in range(0, n_matches, chunk_size):
+        index = np.arange(start, min(start + chunk_size, n_matches))
+        home = rng.integers(0, len(teams), size=len(index))
+        away = (home + rng.integers(1, len(teams), size=len(index))) % len(teams)
+        years = start_year + index // matches_per_season
+        rounds = (index % matches_per_season) // (len(teams) // 2) + 1
+        yield pd.DataFrame({
+            'match_id': index + 1,
+            'match_number': index + 1,
+            'round_number': rounds.astype(str),
+            'match_date': [f"{year}-{3 + (r - 1) // 4:02d}-{1 + 7 * ((r - 1) % 4):02d}"
+                           for year, r in zip(years.tolist(), rounds.tolist())],
+            'venue': venues[home % len(venues)],
+            'year': years,
+            'hscore': np.maximum(rng.normal(88, 25, size=len(index)), 10).round().astype(np.int64),
+            'ascore': np.maximum(rng.normal(80, 25, size=len(index)), 10).round().astype(np.int64),
+            'home_team': teams[home],
+            'away_team': teams[away]
+        })
+
+
+def _new_metric_totals():
+    """Running sums for streamed evaluation metrics"""
+    return {
+        'matches': 0,
+        'correct': 0.0,
+        'brier': 0.0,
+        'log_loss': 0.0,
+        'margin_error': 0.0,
+        'bin_probs': np.zeros(ECE_BINS),
+        'bin_results': np.zeros(ECE_BINS)
+    }
+
+
+def _add_metric_totals(totals, predictions):
+    """Add a chunk of completed prediction records to the running metric sums"""
+    probs = predictions['home_win_probability'].to_numpy(dtype=float)
+    hscore = predictions['hscore'].to_numpy(dtype=float)
+    ascore = predictions['ascore'].to_numpy(dtype=float)
+    results = np.where(hscore > ascore, 1.0, np.where(hscore < ascore, 0.0, 0.5))
+
+    # Same definitions as AFLEloModel.evaluate_model (draws count as correct)
+    totals['matches'] += len(probs)
+    totals['correct'] += float((((probs >= 0.5) & (results == 1.0)) | ((probs < 0.5) & (results == 0.0))
+                                | (results == 0.5)).sum())
+    totals['brier'] += float(((probs - results) ** 2).sum())
+    totals['log_loss'] += float(match_log_losses(np.clip(probs, 0.001, 0.999), results).sum())
+    totals['margin_error'] += float(np.abs((hscore - ascore) - predictions['expected_margin'].to_numpy(dtype=float)).sum())
+    bins = np.minimum((probs * ECE_BINS).astype(np.int64), ECE_BINS - 1)
+    totals['bin_probs'] += np.bincount(bins, weights=probs, minlength=ECE_BINS)
+    totals['bin_results'] += np.bincount(bins, weights=results, minlength=ECE_BINS)
+
+
+def _finish_metrics(totals):
+    """Evaluation metrics (as AFLEloModel.evaluate_model) from running sums"""
+    n = totals['matches']
+    if n == 0:
+        return {'matches': 0, 'accuracy': 0, 'brier_score': 1.0, 'log_loss': float('inf'),
+                'margin_mae': float('inf'), 'ece': 1.0}
+    return {
+        'matches': n,
+        'accuracy': totals['correct'] / n,
+        'brier_score': totals['brier'] / n,
+        'log_loss': totals['log_loss'] / n,
+        'margin_mae': totals['margin_error'] / n,
+        'ece': float(np.abs(totals['bin_probs'] - totals['bin_results']).sum() / n)
+    }
+
+
+def _resolve_stream_engine(engine):
+    """Streaming replays use the array engines (the reference engine is row by row over a DataFrame)"""
+    engine = resolve_engine(engine)
+    if engine == 'reference':
+        print("Streaming replays use the array engines, using the python engine")
+        engine = 'python'
+    return engine
+
+
+def stream_train(chunks, params=None, engine='auto', predictions_file=None):
+    """
+    Train an ELO model from a stream of match chunks with constant memory
+
+    Each chunk is replayed through the array kernel, continuing the ratings,
+    venue adjustments and margin model of the previous chunk (with season
+    carryover when a chunk starts a new season). Predictions are appended to
+    the CSV and discarded after each chunk, and evaluation metrics are kept
+    as running sums, so memory does not grow with the number of matches.
+    Ratings and predictions are identical to train_elo_model on the same
+    matches; teams enter the ratings (and yearly snapshots) when they first play.
+
+    Parameters:
+    -----------
+    chunks: iterable of pandas DataFrame
+        Completed matches in chronological order (e.g. from iter_db_matches)
+    params: dict
+        Optional model parameters (defaults for any not given)
+    engine: str
+        Replay engine: 'python', 'numba', 'rounds' or 'auto'
+    predictions_file: str
+        Optional CSV for the predictions (same columns as save_predictions_to_csv)
+
+    Returns:
+    --------
+    (trained model, evaluation metrics dict)
+    """
+    model = AFLEloModel(**dict(DEFAULT_PARAMS, **(params or {})))
+    kernel = get_replay_kernel(_resolve_stream_engine(engine))
+    totals = _new_metric_totals()
+
+    if predictions_file:
+        os.makedirs(os.path.dirname(os.path.abspath(predictions_file)), exist_ok=True)
+
+    prev_year = None
+    for chunk in chunks:
+        if len(chunk) == 0:
+            continue
+
+        # Carry over between seasons that meet at a chunk boundary
+        first_year = chunk['year'].iloc[0]
+        if prev_year is not None and first_year != prev_year:
+            model.save_yearly_ratings(prev_year)
+            model.apply_season_carryover(first_year)
+
+        for team in model.teams.canonical_names(pd.concat([chunk['home_team'], chunk['away_team']]).unique()):
+            model.team_ratings.setdefault(team, model.base_rating)
+
+        _replay_with_kernel(model, chunk, kernel)
+
+        predictions = pd.DataFrame(model.predictions)
+        if predictions_file:
+            predictions.to_csv(predictions_file, mode='w' if prev_year is None else 'a',
+                               header=prev_year is None, index=False)
+        _add_metric_totals(totals, predictions)
+        model.predictions.clear()
+        model.rating_history.clear()
+        prev_year = chunk['year'].iloc[-1]
+
+    return model, _finish_metrics(totals)
+
+
+def _history_rows(events):
+    """Rating history CSV rows for a list of predictor rating history events"""
+    rows = []
+    for event in events:
+        if event['event'] == 'match':
+            for team, opponent, score, opponent_score, before, after, change in [
+                    (event['home_team'], event['away_team'], event['home_score'], event['away_score'],
+                     event['home_rating_before'], event['home_rating_after'], event['rating_change']),
+                    (event['away_team'], event['home_team'], event['away_score'], event['home_score'],
+                     event['away_rating_before'], event['away_rating_after'], -event['rating_change'])]:
+                rows.append({
+                    'event': 'match',
+                    'match_id': event['match_id'],
+                    'date': event['match_date'],
+                    'year': event['year'],
+                    'round': event['round_number'],
+                    'team': team,
+                    'opponent': opponent,
+                    'score': score,
+                    'opponent_score': opponent_score,
+                    'result': 'win' if score > opponent_score else ('loss' if score < opponent_score else 'draw'),
+                    'rating_before': before,
+                    'rating_after': after,
+                    'rating_change': change
+                })
+        elif event['event'] == 'season_carryover':
+            for team, rating_before in event['ratings_before'].items():
+                rating_after = event['ratings_after'][team]
+                rows.append({
+                    'event': 'season_carryover',
+                    'year': event['year'],
+                    'team': team,
+                    'rating_before': rating_before,
+                    'rating_after': rating_after,
+                    'rating_change': rating_after - rating_before
+                })
+    return rows
+
+
+def stream_predict(predictor, chunks, engine='auto', predictions_file=None, history_file=None):
+    """
+    Replay and predict a stream of match chunks with constant memory
+
+    The streaming counterpart of predict_matches: completed matches update
+    the ratings and upcoming matches are predicted only. Predictions and the
+    rating history are appended to their CSVs after each chunk; the history
+    is written in replay order (season carryover rows at the start of each
+    season) rather than sorted by date.
+
+    Parameters:
+    -----------
+    predictor: AFLEloPredictor
+        Predictor with a loaded model or ensemble
+    chunks: iterable of pandas DataFrame
+        Matches in chronological order (e.g. from iter_db_matches with completed_only=False)
+    engine: str
+        Replay engine: 'python', 'numba', 'rounds' or 'auto'
+    predictions_file: str
+        Optional CSV for the predictions
+    history_file: str
+        Optional CSV for the rating history
+
+    Returns:
+    --------
+    evaluation metrics dict for the completed matches
+    """
+    engine = _resolve_stream_engine(engine)
+    is_ensemble = predictor.member_weights is not None
+    if is_ensemble:
+        kernel = get_batch_replay_kernel(engine)
+        columns = PREDICTION_COLUMNS + [f'member_{k + 1}_home_win_probability'
+                                        for k in range(len(predictor.member_weights))]
+    else:
+        kernel = get_replay_kernel(engine)
+        columns = PREDICTION_COLUMNS
+    totals = _new_metric_totals()
+
+    history_handle = None
+    if history_file:
+        os.makedirs(os.path.dirname(os.path.abspath(history_file)), exist_ok=True)
+        history_handle = open(history_file, 'w', newline='')
+        history_writer = csv.DictWriter(history_handle, fieldnames=HISTORY_COLUMNS)
+        history_writer.writeheader()
+    if predictions_file:
+        os.makedirs(os.path.dirname(os.path.abspath(predictions_file)), exist_ok=True)
+
+    try:
+        prev_year = None
+        for chunk in chunks:
+            if len(chunk) == 0:
+                continue
+
+            # Parse dates and scores as fetch_matches does (scores are NaN for upcoming matches)
+            chunk = chunk.assign(match_date=pd.to_datetime(chunk['match_date'], errors='coerce'),
+                                 hscore=chunk['hscore'].astype(float), ascore=chunk['ascore'].astype(float))
+            chunk = chunk.sort_values(['year', 'match_date'])
+
+            first_year = chunk['year'].iloc[0]
+            if prev_year is not None and first_year != prev_year:
+                predictor.apply_season_carryover(first_year)
+
+            if is_ensemble:
+                _predict_ensemble_with_kernel(predictor, chunk, kernel)
+            else:
+                _predict_with_kernel(predictor, chunk, kernel)
+
+            predictions = pd.DataFrame(predictor.predictions).reindex(columns=columns)
+            if predictions_file:
+                predictions.to_csv(predictions_file, mode='w' if prev_year is None else 'a',
+                                   header=prev_year is None, index=False)
+            if history_handle:
+                history_writer.writerows(_history_rows(predictor.rating_history))
+            _add_metric_totals(totals, predictions[predictions['actual_result'].notna()])
+            predictor.predictions.clear()
+            predictor.rating_history.clear()
+            predictor.publish_snapshot()
+            prev_year = chunk['year'].iloc[-1]
+    finally:
+        if history_handle:
+            history_handle.close()
+
+    return _finish_metrics(totals)
+
+
+def peak_memory_mb():
+    """Peak resident memory of this process in megabytes"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    """Main function to train or predict with a constant-memory streaming replay"""
+    parser = argparse.ArgumentParser(description='Streaming (constant-memory) AFL ELO replay')
+    parser.add_argument('mode', type=str, choices=['train', 'predict'],
+                        help='Train a model (as afl_elo_training.py without tuning) or make predictions '
+                             '(as afl_elo_predictions.py)')
+    parser.add_argument('--start-year', type=int,
+                        help='First year of matches (inclusive; required for predict, and for train defaults to '
+                             'the tuned start year if any, otherwise 1990)')
+    parser.add_argument('--end-year', type=int, default=datetime.now().year,
+                        help='Last year of training matches (inclusive)')
+    parser.add_argument('--db-path', type=str, default='data/afl_predictions.db',
+                        help='Path to the SQLite database')
+    parser.add_argument('--cache-dir', type=str,
+                        help='Stream matches from this match cache instead of the database')
+    parser.add_argument('--synthetic-matches', type=int,
+                        help='Train on this many synthetic matches (stress test) instead of real data')
+    parser.add_argument('--model-path', type=str,
+                        help='Trained ELO model (or ensemble) JSON file (predict mode)')
+    parser.add_argument('--tuning-results', type=str,
+                        help='Tuning results JSON providing the training parameters '
+                             '(default: afl_elo_tuning_results_<end-year>.json in the output directory, '
+                             'falling back to the default parameters)')
+    parser.add_argument('--output-dir', type=str, default='.',
+                        help='Directory to save output files')
+    parser.add_argument('--model-format', type=str, default='json', choices=['json', 'binary'],
+                        help='Model file format in train mode (see afl_elo_training.py)')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help='Matches held in memory at once')
+    parser.add_argument('--engine', type=str, default='auto', choices=['auto', 'numba', 'python', 'rounds'],
+                        help='Replay engine (auto uses numba when installed, otherwise the pure-Python array engine)')
+
+    args = parser.parse_args()
+
+    params = dict(DEFAULT_PARAMS)
+    if args.mode == 'train':
+        tuning_file = args.tuning_results or os.path.join(args.output_dir,
+                                                          f"afl_elo_tuning_results_{args.end_year}.json")
+        if os.path.exists(tuning_file):
+            with open(tuning_file, 'r') as f:
+                params.update(json.load(f)['best_params'])
+            print(f"Using the best parameters from {tuning_file}")
+        else:
+            print("Using the default parameters")
+        # A tuned training window sets the default start year
+        tuned_start_year = params.pop('start_year', None)
+        if args.start_year is None:
+            args.start_year = tuned_start_year or 1990
+
+    if args.synthetic_matches:
+        chunks = iter_synthetic_matches(args.synthetic_matches, seed=0, chunk_size=args.chunk_size)
+    elif args.cache_dir:
+        chunks = iter_cache_matches(args.start_year, args.end_year if args.mode == 'train' else None,
+                                    completed_only=args.mode == 'train', chunk_size=args.chunk_size,
+                                    cache_dir=args.cache_dir)
+    elif not os.path.exists(args.db_path):
+        print(f"Error: Database not found at {args.db_path}")
+        return
+    else:
+        chunks = iter_db_matches(args.db_path, args.start_year, args.end_year if args.mode == 'train' else None,
+                                 completed_only=args.mode == 'train', chunk_size=args.chunk_size)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    start_time = datetime.now()
+
+    if args.mode == 'train':
+        output_prefix = (f"afl_elo_synthetic_{args.synthetic_matches}" if args.synthetic_matches
+                         else f"afl_elo_trained_to_{args.end_year}")
+        predictions_file = os.path.join(args.output_dir, f"{output_prefix}_predictions.csv")
+        model, metrics = stream_train(chunks, params, engine=args.engine, predictions_file=predictions_file)
+
+        model_file = os.path.join(args.output_dir,
+                                  output_prefix + (BINARY_EXTENSION if args.model_format == 'binary' else '.json'))
+        model.save_model(model_file)
+        print(f"Model saved to {model_file}")
+        print(f"Saved {metrics['matches']} predictions to {predictions_file}")
+        team_ratings = model.team_ratings
+    else:
+        if not args.model_path or not args.start_year:
+            print("Error: predict mode needs --model-path and --start-year")
+            return
+        if not os.path.exists(args.model_path):
+            print(f"Error: Model file not found at {args.model_path}")
+            return
+
+        predictor = AFLEloPredictor(args.model_path)
+        predictions_file = os.path.join(args.output_dir, f"afl_elo_predictions_from_{args.start_year}.csv")
+        history_file = os.path.join(args.output_dir, f"afl_elo_rating_history_from_{args.start_year}.csv")
+        metrics = stream_predict(predictor, chunks, engine=args.engine, predictions_file=predictions_file,
+                                 history_file=history_file)
+        print(f"Saved predictions to {predictions_file} and rating history to {history_file}")
+        team_ratings = predictor.team_ratings
+
+    elapsed = (datetime.now() - start_time).total_seconds()
+    print(f"\nReplayed in {elapsed:.1f} seconds, peak memory {peak_memory_mb():.0f} MB")
+
+    if metrics['matches'] > 0:
+        print(f"\nEvaluation on {metrics['matches']} completed matches:")
+        print(f"  Accuracy: {metrics['accuracy']:.4f}")
+        print(f"  Brier Score: {metrics['brier_score']:.4f}")
+        print(f"  Log Loss: {metrics['log_loss']:.4f}")
+        print(f"  Margin MAE: {metrics['margin_mae']:.2f} points")
+        print(f"  Expected Calibration Error: {metrics['ece']:.4f}")
+
+    print("\nFinal Team Ratings:")
+    for team, rating in sorted(team_ratings.items(), key=lambda x: x[1], reverse=True):
+        print(f"  {team}: {rating:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,12 +5,56 @@ from sklearn.model_selection import TimeSeriesSplit
 import matplotlib.pyplot as plt
 import json
 import os
+import time
+import hashlib
 import argparse
 from datetime import datetime
 
+from afl_elo_replay import (resolve_engine, get_replay_kernel, get_batch_replay_kernel, margin_multipliers,
+                            margin_multipliers_batch, replay_outputs, run_replay, run_replay_batch)
+from afl_teams import TeamRegistry
+from afl_elo_calibration import expected_calibration_error
+from afl_elo_bootstrap import METRICS as BOOTSTRAP_METRICS, bootstrap_differences
+from afl_elo_model_file import BINARY_EXTENSION, save_model_file
+from afl_elo_queue import DEFAULT_LEASE, DEFAULT_TASK_SIZE, TuningQueue, default_worker_id
+from afl_elo_checkpoints import ReplayCheckpoints, params_key, season_prefix_hashes
+from afl_elo_fingerprint import (db_fingerprint, file_fingerprint, code_fingerprint, fingerprint_path,
+                                outputs_current, save_fingerprint)
+
+# Default ranges explored by parameter surfaces
+SURFACE_RANGES = {
+    'k_factor': (5, 60),
+    'home_advantage': (0, 100),
+    'margin_factor': (0.05, 1.0),
+    'season_carryover': (0.3, 1.0),
+    'max_margin': (40, 200),
+    'venue_k_factor': (0, 10)
+}
+
+# Initial steps of the neighbourhood searched by warm-start retuning (halved each round)
+WARM_START_STEPS = {
+    'k_factor': 4,
+    'home_advantage': 8,
+    'margin_factor': 0.08,
+    'season_carryover': 0.08,
+    'max_margin': 16,
+    'venue_k_factor': 2
+}
+
+DEFAULT_PARAMS = {
+    'base_rating': 1500,
+    'k_factor': 20,
+    'home_advantage': 50,
+    'margin_factor': 0.3,
+    'season_carryover': 0.6,
+    'max_margin': 120,
+    'venue_k_factor': 0
+}
+
 class AFLEloModel:
     def __init__(self, base_rating=1500, k_factor=20, home_advantage=50, 
-                 margin_factor=0.3, season_carryover=0.6, max_margin=120):
+                 margin_factor=0.3, season_carryover=0.6, max_margin=120,
+                 venue_k_factor=0):
         """
         Initialize the AFL ELO model with configurable parameters
         
@@ -28,6 +72,9 @@ class AFLEloModel:
             Percentage of rating retained between seasons (0.75 = 75%)
         max_margin: int
             Maximum margin to consider (to limit effect of blowouts)
+        venue_k_factor: float
+            How quickly per-venue home advantage adjustments are learned
+            (0 = single global home advantage)
         """
         self.base_rating = base_rating
         self.k_factor = k_factor
@@ -35,32 +82,123 @@ class AFLEloModel:
         self.margin_factor = margin_factor
         self.season_carryover = season_carryover
         self.max_margin = max_margin
-        self.team_ratings = {}
+        self.venue_k_factor = venue_k_factor
+        self.teams = TeamRegistry()  # Team names and aliases -> stable integer IDs
+        self.team_ratings = {}  # Keyed by canonical team name
+        self.venue_ids = {}  # Venue name -> index into venue_advantages
+        self.venue_advantages = np.zeros(0)  # Per-venue adjustment on top of home_advantage
+        # Running sums for the rating-difference-to-margin fit (margin ~ scale * rating difference)
+        self.margin_sxx = 0.0
+        self.margin_sxy = 0.0
+        self.margin_syy = 0.0
+        self.margin_n = 0
         self.yearly_ratings = {}  # Track ratings at the end of each year
         self.rating_history = []  # To track rating changes over time
         self.predictions = []     # To store model predictions
     
     def initialize_ratings(self, teams):
         """Initialize all team ratings to the base rating"""
-        self.team_ratings = {team: self.base_rating for team in teams}
+        self.team_ratings = {team: self.base_rating for team in self.teams.canonical_names(teams)}
+    
+    def get_ratings_array(self):
+        """Team ratings as an array indexed by team ID (base rating for teams without a rating)"""
+        ratings = np.full(self.teams.size, float(self.base_rating))
+        for team, rating in self.team_ratings.items():
+            ratings[self.teams.team_ids[team]] = rating
+        return ratings
+    
+    def set_ratings_array(self, ratings):
+        """Update team_ratings from an array indexed by team ID"""
+        self.team_ratings = {team: float(ratings[self.teams.team_ids[team]]) for team in self.team_ratings}
+    
+    def initialize_venues(self, venues):
+        """Intern venue names to integer IDs with a zero home advantage adjustment"""
+        for venue in venues:
+            self.get_venue_id(venue)
+    
+    def get_venue_id(self, venue):
+        """Return the integer ID for a venue, interning it if not seen before (-1 for unknown)"""
+        if venue is None or venue != venue:  # None or NaN
+            return -1
+        venue_id = self.venue_ids.get(venue)
+        if venue_id is None:
+            venue_id = len(self.venue_ids)
+            self.venue_ids[venue] = venue_id
+            self.venue_advantages = np.append(self.venue_advantages, 0.0)
+        return venue_id
+    
+    def get_home_advantage(self, venue_id):
+        """Home advantage in rating points for a venue ID"""
+        if venue_id < 0:
+            return self.home_advantage
+        return self.home_advantage + self.venue_advantages[venue_id]
     
     def _cap_margin(self, margin):
         """Cap margin to reduce effect of blowouts"""
         return min(abs(margin), self.max_margin) * np.sign(margin)
     
-    def calculate_win_probability(self, home_team, away_team):
+    def calculate_win_probability(self, home_team, away_team, venue=None):
         """Calculate probability of home team winning based on ELO difference"""
-        home_rating = self.team_ratings.get(home_team, self.base_rating)
-        away_rating = self.team_ratings.get(away_team, self.base_rating)
+        home_rating = self.team_ratings.get(self.teams.canonical_name(home_team, register=False), self.base_rating)
+        away_rating = self.team_ratings.get(self.teams.canonical_name(away_team, register=False), self.base_rating)
         
-        # Apply home ground advantage
-        rating_diff = (home_rating + self.home_advantage) - away_rating
+        # Apply home ground advantage (global plus any learned venue adjustment)
+        venue_id = self.venue_ids.get(venue, -1)
+        rating_diff = (home_rating + self.get_home_advantage(venue_id)) - away_rating
         
         # Convert rating difference to win probability using logistic function
         win_probability = 1.0 / (1.0 + 10 ** (-rating_diff / 400))
         
         return win_probability
     
+    def get_margin_model(self):
+        """
+        Current rating-difference-to-margin mapping fitted from all matches replayed so far
+        
+        Returns:
+        --------
+        tuple of (margin points per rating point, residual standard deviation of the margin)
+        """
+        if self.margin_n == 0:
+            return 0.0, 0.0
+        scale = self.margin_sxy / self.margin_sxx if self.margin_sxx > 0 else 0.0
+        residual_ss = self.margin_syy - 2 * scale * self.margin_sxy + scale * scale * self.margin_sxx
+        return scale, np.sqrt(max(residual_ss, 0.0) / self.margin_n)
+    
+    def calculate_rating_differences(self, home_teams, away_teams, venues=None):
+        """
+        Calculate home-advantage-adjusted rating differences for many matches at once
+        
+        Parameters:
+        -----------
+        home_teams, away_teams: sequence of str
+            Team names (or aliases) for each match
+        venues: sequence of str
+            Optional venue names for each match
+            
+        Returns:
+        --------
+        numpy array of adjusted rating differences (home minus away)
+        """
+        home_ids = self.teams.get_team_ids(home_teams)
+        away_ids = self.teams.get_team_ids(away_teams)
+        ratings = self.get_ratings_array()
+        home_ratings = ratings[home_ids]
+        away_ratings = ratings[away_ids]
+        
+        advantages = np.full(len(home_ratings), float(self.home_advantage))
+        if venues is not None and len(self.venue_advantages) > 0:
+            venue_ids = np.array([self.venue_ids.get(v, -1) for v in venues], dtype=np.int64)
+            known = venue_ids >= 0
+            advantages[known] += self.venue_advantages[venue_ids[known]]
+        
+        return (home_ratings + advantages) - away_ratings
+    
+    def calculate_win_probabilities(self, home_teams, away_teams, venues=None):
+        """Calculate home win probabilities for many matches at once using current ratings"""
+        rating_diff = self.calculate_rating_differences(home_teams, away_teams, venues)
+        return 1.0 / (1.0 + 10 ** (-rating_diff / 400))
+    
     def update_ratings(self, home_team, away_team, hscore, ascore, year, match_id=None, round_number=None, match_date=None, venue=None):
         """
         Update team ratings based on match result
@@ -84,12 +222,16 @@ class AFLEloModel:
         match_date: str
             Optional match date for tracking
         venue: str
-            Optional venue for tracking
+            Optional venue (used for venue-specific home advantage)
         
         Returns:
         --------
         dict with updated ratings and prediction information
         """
+        # Aliases continue the ratings of the club they refer to
+        home_team = self.teams.canonical_name(home_team)
+        away_team = self.teams.canonical_name(away_team)
+        
         # Ensure teams exist in ratings
         if home_team not in self.team_ratings:
             self.team_ratings[home_team] = self.base_rating
@@ -101,7 +243,14 @@ class AFLEloModel:
         away_rating = self.team_ratings[away_team]
         
         # Calculate win probability
-        home_win_prob = self.calculate_win_probability(home_team, away_team)
+        venue_id = self.get_venue_id(venue)
+        home_advantage = self.get_home_advantage(venue_id)
+        adjusted_diff = (home_rating + home_advantage) - away_rating
+        home_win_prob = 1.0 / (1.0 + 10 ** (-adjusted_diff / 400))
+        
+        # Expected margin from the fit so far (uses only earlier matches)
+        margin_scale, margin_std = self.get_margin_model()
+        expected_margin = margin_scale * adjusted_diff
         
         # Determine actual result (1 for home win, 0 for away win)
         actual_result = 1.0 if hscore > ascore else 0.0
@@ -126,6 +275,16 @@ class AFLEloModel:
         self.team_ratings[home_team] += rating_change
         self.team_ratings[away_team] -= rating_change
         
+        # Learn the venue's home advantage adjustment from the same prediction error
+        if self.venue_k_factor > 0 and venue_id >= 0:
+            self.venue_advantages[venue_id] += self.venue_k_factor * margin_multiplier * (actual_result - home_win_prob)
+        
+        # Add this match to the margin fit
+        self.margin_sxx += adjusted_diff * adjusted_diff
+        self.margin_sxy += adjusted_diff * margin
+        self.margin_syy += margin * margin
+        self.margin_n += 1
+        
         # Store the prediction and outcome
         prediction_info = {
             'match_id': match_id,
@@ -140,7 +299,7 @@ class AFLEloModel:
             'pre_match_home_rating': home_rating,
             'pre_match_away_rating': away_rating,
             'rating_difference': home_rating - away_rating,
-            'adjusted_rating_difference': (home_rating + self.home_advantage) - away_rating,
+            'adjusted_rating_difference': adjusted_diff,
             'home_win_probability': home_win_prob,
             'away_win_probability': 1 - home_win_prob,
             'predicted_winner': home_team if home_win_prob > 0.5 else away_team,
@@ -148,6 +307,8 @@ class AFLEloModel:
             'actual_result': 'home_win' if hscore > ascore else ('away_win' if hscore < ascore else 'draw'),
             'correct': (home_win_prob > 0.5 and hscore > ascore) or (home_win_prob < 0.5 and hscore < ascore) or (home_win_prob == 0.5 and hscore == ascore),
             'margin': margin,
+            'expected_margin': expected_margin,
+            'margin_std': margin_std,
             'rating_change': rating_change
         }
         
@@ -185,7 +346,9 @@ class AFLEloModel:
             return {
                 'accuracy': 0,
                 'brier_score': 1.0,  # Worst possible Brier score
-                'log_loss': float('inf')
+                'log_loss': float('inf'),
+                'margin_mae': float('inf'),
+                'ece': 1.0
             }
         
         y_true = [1 if p['actual_result'] == 'home_win' else (0.5 if p['actual_result'] == 'draw' else 0) for p in self.predictions]
@@ -217,14 +380,21 @@ class AFLEloModel:
             logloss += loss
         logloss /= len(y_true)
         
+        # Mean absolute error of the expected margin (points)
+        margins = np.array([p['margin'] for p in self.predictions], dtype=float)
+        expected_margins = np.array([p['expected_margin'] for p in self.predictions], dtype=float)
+        margin_mae = float(np.mean(np.abs(margins - expected_margins)))
+        
         return {
             'accuracy': accuracy,
             'brier_score': brier,
-            'log_loss': logloss
+            'log_loss': logloss,
+            'margin_mae': margin_mae,
+            'ece': expected_calibration_error(y_pred, y_true)
         }
     
-    def save_model(self, filename):
-        """Save the model parameters and team ratings"""
+    def get_model_data(self, include_yearly_ratings=True):
+        """Model parameters, ratings and learned adjustments as a JSON-serialisable dict"""
         model_data = {
             'parameters': {
                 'base_rating': self.base_rating,
@@ -233,13 +403,28 @@ class AFLEloModel:
                 'margin_factor': self.margin_factor,
                 'season_carryover': self.season_carryover,
                 'max_margin': self.max_margin,
+                'venue_k_factor': self.venue_k_factor,
             },
             'team_ratings': self.team_ratings,
-            'yearly_ratings': self.yearly_ratings
+            'team_ids': self.teams.to_dict(),
+            'venue_advantages': {venue: float(self.venue_advantages[venue_id])
+                                 for venue, venue_id in self.venue_ids.items()},
+            'margin_model': {
+                'scale': float(self.get_margin_model()[0]),
+                'std': float(self.get_margin_model()[1]),
+                'sxx': float(self.margin_sxx),
+                'sxy': float(self.margin_sxy),
+                'syy': float(self.margin_syy),
+                'n': self.margin_n
+            },
         }
-        
-        with open(filename, 'w') as f:
-            json.dump(model_data, f, indent=4)
+        if include_yearly_ratings:
+            model_data['yearly_ratings'] = self.yearly_ratings
+        return model_data
+    
+    def save_model(self, filename):
+        """Save the model parameters and team ratings (binary format for a .elo filename, otherwise JSON)"""
+        save_model_file(self.get_model_data(), filename)
     
     def save_predictions_to_csv(self, filename):
         """Save all predictions to a CSV file"""
@@ -252,6 +437,51 @@ class AFLEloModel:
         print(f"Saved {len(df)} predictions to {filename}")
 
 
+def match_log_losses(probs, results):
+    """
+    Per-match log loss for home win probabilities
+    
+    Parameters:
+    -----------
+    probs: numpy array
+        Home win probabilities (already clipped away from 0 and 1)
+    results: numpy array
+        Actual results (1 for home win, 0 for away win, 0.5 for draw)
+        
+    Returns:
+    --------
+    numpy array of losses
+    """
+    # For a draw, use proximity to 0.5 for the loss calculation
+    return np.where(results == 1.0, -np.log(probs),
+                    np.where(results == 0.0, -np.log(1 - probs), -np.log(1 - np.abs(0.5 - probs))))
+
+
+def save_ensemble(models, weights, filename):
+    """
+    Save several trained models as a weighted ensemble for AFLEloPredictor
+    
+    Parameters:
+    -----------
+    models: list of AFLEloModel
+        Trained member models (best first)
+    weights: list of float
+        Weight of each member's win probability in the ensemble
+    filename: str
+        Output JSON file
+    """
+    total_weight = float(sum(weights))
+    ensemble_data = {
+        'members': [
+            dict(model.get_model_data(include_yearly_ratings=False), weight=float(weight) / total_weight)
+            for model, weight in zip(models, weights)
+        ]
+    }
+    
+    with open(filename, 'w') as f:
+        json.dump(ensemble_data, f, indent=4)
+
+
 def fetch_afl_data(db_path, start_year=None, end_year=None):
     """
     Fetch historical AFL match data from SQLite database
@@ -301,7 +531,7 @@ def fetch_afl_data(db_path, start_year=None, end_year=None):
     return df
 
 
-def train_elo_model(data, params=None):
+def train_elo_model(data, params=None, engine='auto'):
     """
     Train the ELO model on the provided data with optional parameters
     
@@ -311,6 +541,10 @@ def train_elo_model(data, params=None):
         Historical match data
     params: dict
         Optional model parameters
+    engine: str
+        Replay engine: 'reference' (row by row through update_ratings), 'python'
+        (array kernel), 'numba' (JIT-compiled array kernel), 'rounds' (one
+        vectorised update per round) or 'auto' (fastest available)
         
     Returns:
     --------
@@ -325,14 +559,21 @@ def train_elo_model(data, params=None):
             home_advantage=params.get('home_advantage', 50),
             margin_factor=params.get('margin_factor', 0.3),
             season_carryover=params.get('season_carryover', 0.6),
-            max_margin=params.get('max_margin', 120)
+            max_margin=params.get('max_margin', 120),
+            venue_k_factor=params.get('venue_k_factor', 0)
         )
     
     # Get unique teams
     all_teams = pd.concat([data['home_team'], data['away_team']]).unique()
     
-    # Initialize ratings
+    # Initialize ratings and intern venues
     model.initialize_ratings(all_teams)
+    model.initialize_venues(data['venue'].dropna().unique())
+    
+    engine = resolve_engine(engine)
+    if engine != 'reference':
+        _replay_with_kernel(model, data, get_replay_kernel(engine))
+        return model
     
     # Process matches chronologically
     prev_year = None
@@ -367,25 +608,201 @@ def train_elo_model(data, params=None):
     return model
 
 
-def parameter_tuning(data, param_grid, cv=5, max_combinations=None):
+def _replay_with_kernel(model, data, kernel):
+    """
+    Replay matches through an array kernel, producing the same ratings, predictions
+    and rating history as the row-by-row reference path
+    """
+    # Ratings are indexed by registry team ID, so aliases share their club's slot
+    home_idx = model.teams.get_team_ids(data['home_team'])
+    away_idx = model.teams.get_team_ids(data['away_team'])
+    home_teams = [model.teams.get_team_name(team_id) for team_id in home_idx.tolist()]
+    away_teams = [model.teams.get_team_name(team_id) for team_id in away_idx.tolist()]
+    ratings = model.get_ratings_array()
+    margin_sums = np.array([model.margin_sxx, model.margin_sxy, model.margin_syy, model.margin_n], dtype=float)
+    
+    venues = data['venue'].tolist()
+    venue_idx = np.array([model.get_venue_id(venue) for venue in venues], dtype=np.int64)
+    hscore = data['hscore'].to_numpy(dtype=float)
+    ascore = data['ascore'].to_numpy(dtype=float)
+    years = data['year'].to_numpy()
+    multipliers = margin_multipliers(hscore, ascore, model.margin_factor, model.max_margin)
+    
+    outputs = replay_outputs(len(data))
+    params = {
+        'k_factor': model.k_factor,
+        'home_advantage': model.home_advantage,
+        'venue_k_factor': model.venue_k_factor
+    }
+    
+    # Run the kernel one season at a time, applying carryover between seasons
+    season_starts = np.flatnonzero(np.diff(years)) + 1
+    bounds = [0] + season_starts.tolist() + [len(data)]
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        if start > 0:
+            model.set_ratings_array(ratings)
+            model.save_yearly_ratings(years[start - 1])
+            model.apply_season_carryover(years[start])
+            ratings = model.get_ratings_array()
+        run_replay(kernel, home_idx, away_idx, venue_idx, hscore, ascore, multipliers, ratings,
+                   model.venue_advantages, margin_sums, params, outputs, start, end)
+    
+    model.set_ratings_array(ratings)
+    model.margin_sxx, model.margin_sxy, model.margin_syy = margin_sums[:3].tolist()
+    model.margin_n = int(margin_sums[3])
+    if len(data) > 0:
+        model.save_yearly_ratings(years[-1])
+    
+    # Build prediction and history records from the kernel outputs
+    columns = zip(data['match_id'].tolist(), data['round_number'].tolist(), data['match_date'].tolist(),
+                  venues, years.tolist(), home_teams, away_teams,
+                  data['hscore'].tolist(), data['ascore'].tolist(),
+                  outputs['pre_home'].tolist(), outputs['pre_away'].tolist(), outputs['adjusted_diff'].tolist(),
+                  outputs['probs'].tolist(), outputs['expected_margin'].tolist(), outputs['margin_std'].tolist(),
+                  outputs['rating_change'].tolist())
+    
+    for (match_id, round_number, match_date, venue, year, home_team, away_team, hs, as_,
+         home_rating, away_rating, adjusted_diff, home_win_prob, expected_margin, margin_std,
+         rating_change) in columns:
+        model.predictions.append({
+            'match_id': match_id,
+            'round_number': round_number,
+            'match_date': match_date,
+            'venue': venue,
+            'year': year,
+            'home_team': home_team,
+            'away_team': away_team,
+            'hscore': hs,
+            'ascore': as_,
+            'pre_match_home_rating': home_rating,
+            'pre_match_away_rating': away_rating,
+            'rating_difference': home_rating - away_rating,
+            'adjusted_rating_difference': adjusted_diff,
+            'home_win_probability': home_win_prob,
+            'away_win_probability': 1 - home_win_prob,
+            'predicted_winner': home_team if home_win_prob > 0.5 else away_team,
+            'confidence': max(home_win_prob, 1 - home_win_prob),
+            'actual_result': 'home_win' if hs > as_ else ('away_win' if hs < as_ else 'draw'),
+            'correct': (home_win_prob > 0.5 and hs > as_) or (home_win_prob < 0.5 and hs < as_) or (home_win_prob == 0.5 and hs == as_),
+            'margin': hs - as_,
+            'expected_margin': expected_margin,
+            'margin_std': margin_std,
+            'rating_change': rating_change
+        })
+        model.rating_history.append({
+            'year': year,
+            'match_id': match_id,
+            'match_date': match_date,
+            'home_team': home_team,
+            'away_team': away_team,
+            'home_rating': home_rating + rating_change,
+            'away_rating': away_rating - rating_change
+        })
+
+
+def parameter_combinations(param_grid, max_combinations=None):
+    """
+    Parameter sets to test for a tuning grid
+    
+    Parameters:
+    -----------
+    param_grid: dict
+        Dictionary of parameter ranges (see parameter_tuning)
+    max_combinations: int
+        Maximum number of combinations to sample at random (None for all), per start year
+        
+    Returns:
+    --------
+    list of parameter dicts
+    """
+    param_combinations = []
+    
+    # Simple grid search using loops
+    for k_factor in param_grid['k_factor']:
+        for home_advantage in param_grid['home_advantage']:
+            for margin_factor in param_grid['margin_factor']:
+                for season_carryover in param_grid['season_carryover']:
+                    for max_margin in param_grid['max_margin']:
+                        for venue_k_factor in param_grid.get('venue_k_factor', [0]):
+                            params = {
+                                'base_rating': param_grid['base_rating'][0],  # Use first value
+                                'k_factor': k_factor,
+                                'home_advantage': home_advantage,
+                                'margin_factor': margin_factor,
+                                'season_carryover': season_carryover,
+                                'max_margin': max_margin,
+                                'venue_k_factor': venue_k_factor
+                            }
+                            param_combinations.append(params)
+    
+    # Limit the number of combinations if specified
+    if max_combinations and len(param_combinations) > max_combinations:
+        print(f"Limiting to {max_combinations} random parameter combinations out of {len(param_combinations)} total")
+        import random
+        random.shuffle(param_combinations)
+        param_combinations = param_combinations[:max_combinations]
+    
+    if 'start_year' in param_grid:
+        # Evaluate every sampled parameter set with every candidate start year
+        param_combinations = [dict(params, start_year=start_year)
+                              for start_year in param_grid['start_year'] for params in param_combinations]
+    
+    return param_combinations
+
+
+def parameter_tuning(data, param_grid, cv=5, max_combinations=None, engine='auto', prune=None, prune_margin=None,
+                     keep_pruned=True, objective='log_loss'):
     """
     Find optimal ELO parameters using grid search
     
+    With pruning enabled, a combination is abandoned as soon as its partial
+    cross-validation results show it cannot beat the best score so far. By
+    default the test uses a lower bound on the final mean log loss (every
+    unscored match contributes at least zero), so pruning never changes the
+    chosen optimum. A prune_margin instead compares the running mean loss with
+    the best score plus the margin, which prunes far more but may drop
+    combinations that would have recovered in later folds.
+    
     Parameters:
     -----------
     data: pandas DataFrame
         Historical match data
     param_grid: dict
-        Dictionary of parameter ranges to test
+        Dictionary of parameter ranges to test. An optional 'start_year' entry
+        lists candidate training start years, searched jointly with the other
+        parameters (see _tune_start_years)
     cv: int
         Number of cross-validation splits
     max_combinations: int
-        Maximum number of parameter combinations to test (None for all)
+        Maximum number of parameter combinations to test (None for all), per start year
+    engine: str
+        Replay engine used for each training fold (see train_elo_model)
+    prune: str
+        None to run every fold, 'fold' to test after each fold or 'season' to
+        also test after each season of a test fold
+    prune_margin: float
+        None for the exact lower-bound test, otherwise prune when the running
+        mean log loss exceeds the best score by more than this margin
+    keep_pruned: bool
+        Keep pruned combinations in all_results (ranked after the completed
+        ones, with their running mean log loss) rather than dropping them
+    objective: str
+        Cross-validated score to minimise: 'log_loss' or 'ece' (expected
+        calibration error, see afl_elo_calibration.py)
         
     Returns:
     --------
     dict with best parameters and results
     """
+    if prune not in (None, 'fold', 'season'):
+        raise ValueError(f"Unknown pruning mode '{prune}', expected 'fold' or 'season'")
+    if objective not in ('log_loss', 'ece'):
+        raise ValueError(f"Unknown tuning objective '{objective}', expected 'log_loss' or 'ece'")
+    if prune is not None and objective != 'log_loss':
+        raise ValueError("Pruning bounds the log loss, so it needs the log_loss objective")
+    if prune is not None and 'start_year' in param_grid:
+        raise ValueError("Start years are tuned in one batched replay, which cannot be pruned")
+    
     # Create time-based splits to avoid training on future data
     tscv = TimeSeriesSplit(n_splits=cv)
     
@@ -396,31 +813,7 @@ def parameter_tuning(data, param_grid, cv=5, max_combinations=None):
     # Sort data by date to ensure chronological order
     data = data.sort_values(['year', 'match_date'])
     
-    # Create parameter combinations
-    param_combinations = []
-    
-    # Simple grid search using loops
-    for k_factor in param_grid['k_factor']:
-        for home_advantage in param_grid['home_advantage']:
-            for margin_factor in param_grid['margin_factor']:
-                for season_carryover in param_grid['season_carryover']:
-                    for max_margin in param_grid['max_margin']:
-                        params = {
-                            'base_rating': param_grid['base_rating'][0],  # Use first value
-                            'k_factor': k_factor,
-                            'home_advantage': home_advantage,
-                            'margin_factor': margin_factor,
-                            'season_carryover': season_carryover,
-                            'max_margin': max_margin
-                        }
-                        param_combinations.append(params)
-    
-    # Limit the number of combinations if specified
-    if max_combinations and len(param_combinations) > max_combinations:
-        print(f"Limiting to {max_combinations} random parameter combinations out of {len(param_combinations)} total")
-        import random
-        random.shuffle(param_combinations)
-        param_combinations = param_combinations[:max_combinations]
+    param_combinations = parameter_combinations(param_grid, max_combinations)
     
     total_combinations = len(param_combinations)
     print(f"Testing {total_combinations} parameter combinations with {cv}-fold cross-validation...")
@@ -432,8 +825,14 @@ def parameter_tuning(data, param_grid, cv=5, max_combinations=None):
     if len(param_combinations) > 3:
         print(f"  ... plus {len(param_combinations) - 3} more combinations")
     
+    if 'start_year' in param_grid:
+        return _tune_start_years(data, param_combinations, cv, engine, objective)
+    
     # Track progress
     start_time = datetime.now()
+    splits = list(tscv.split(data))
+    pruned_count = 0
+    folds_skipped = 0
     
     for i, params in enumerate(param_combinations):
         if i % 10 == 0:  # Print progress every 10 combinations
@@ -449,17 +848,16 @@ def parameter_tuning(data, param_grid, cv=5, max_combinations=None):
         
         # Cross-validation scores for this parameter set
         cv_scores = []
+        cv_margin_maes = []
+        cv_eces = []
+        pruned = False
         
-        for train_idx, test_idx in tscv.split(data):
+        for train_idx, test_idx in splits:
             train_data = data.iloc[train_idx]
             test_data = data.iloc[test_idx]
             
             # Train model on training data
-            model = train_elo_model(train_data, params)
-            
-            # Predict on test data
-            test_probs = []
-            test_results = []
+            model = train_elo_model(train_data, params, engine=engine)
             
             # Get the year of the earliest test game
             test_year = test_data['year'].min()
@@ -468,63 +866,92 @@ def parameter_tuning(data, param_grid, cv=5, max_combinations=None):
             if test_year > train_data['year'].max():
                 model.apply_season_carryover(test_year)
             
-            for _, match in test_data.iterrows():
-                prob = model.calculate_win_probability(match['home_team'], match['away_team'])
-                test_probs.append(prob)
-                # Actual result (1 for home win, 0 for away win, 0.5 for draw)
-                if match['hscore'] > match['ascore']:
-                    result = 1.0
-                elif match['hscore'] < match['ascore']:
-                    result = 0.0
-                else:
-                    result = 0.5
-                test_results.append(result)
+            # Ratings are frozen over the test fold, so score it in one batch
+            test_diffs = model.calculate_rating_differences(
+                test_data['home_team'].values, test_data['away_team'].values, test_data['venue'].values)
+            test_probs = 1.0 / (1.0 + 10 ** (-test_diffs / 400))
+            # Actual result (1 for home win, 0 for away win, 0.5 for draw)
+            test_results = np.where(test_data['hscore'] > test_data['ascore'], 1.0,
+                                    np.where(test_data['hscore'] < test_data['ascore'], 0.0, 0.5))
             
             # Clip probabilities to avoid log(0) issues
-            test_probs = [max(min(p, 0.999), 0.001) for p in test_probs]
+            test_probs = np.clip(test_probs, 0.001, 0.999)
             
             # Calculate log loss for this fold
-            log_losses = []
-            for true_val, pred_val in zip(test_results, test_probs):
-                # Calculate loss based on actual outcome
-                if true_val == 1.0:
-                    loss = -np.log(pred_val)
-                elif true_val == 0.0:
-                    loss = -np.log(1 - pred_val)
-                else:  # Draw (0.5)
-                    # For a draw, use proximity to 0.5 for the loss calculation
-                    loss = -np.log(1 - abs(0.5 - pred_val))
-                
-                log_losses.append(loss)
-
-            fold_loss = np.mean(log_losses)
-            cv_scores.append(fold_loss)
-        
-        # Average score across CV folds
-        avg_score = np.mean(cv_scores)
+            test_losses = match_log_losses(test_probs, test_results)
+            
+            # Margin error for this fold using the margin fit from the training replay
+            margin_scale, _ = model.get_margin_model()
+            test_margins = (test_data['hscore'] - test_data['ascore']).values
+            test_margin_errors = np.abs(test_margins - margin_scale * test_diffs)
+            
+            if prune == 'season' and best_params is not None:
+                # Test the bound at the end of each season of the test fold
+                season_ends = np.flatnonzero(np.diff(test_data['year'].to_numpy())) + 1
+                for end in season_ends:
+                    if _should_prune(cv_scores, test_losses[:end].sum(), end, len(test_losses), cv,
+                                     best_score, prune_margin):
+                        cv_scores.append(test_losses[:end].mean())
+                        cv_margin_maes.append(test_margin_errors[:end].mean())
+                        cv_eces.append(expected_calibration_error(test_probs[:end], test_results[:end]))
+                        pruned = True
+                        break
+                if pruned:
+                    break
+            
+            cv_scores.append(test_losses.mean())
+            cv_margin_maes.append(test_margin_errors.mean())
+            cv_eces.append(expected_calibration_error(test_probs, test_results))
+            
+            if (prune is not None and best_params is not None and len(cv_scores) < cv
+                    and _should_prune(cv_scores[:-1], test_losses.sum(), len(test_losses), len(test_losses), cv,
+                                      best_score, prune_margin)):
+                pruned = True
+                break
         
         result = {
             'params': params,
-            'log_loss': avg_score,
-            'cv_scores': cv_scores
+            'log_loss': np.mean(cv_scores),
+            'cv_scores': cv_scores,
+            'margin_mae': np.mean(cv_margin_maes),
+            'cv_margin_maes': cv_margin_maes,
+            'ece': np.mean(cv_eces),
+            'cv_eces': cv_eces,
+            'pruned': pruned
         }
+        
+        # Average score across CV folds (the running mean for pruned combinations)
+        avg_score = result[objective]
+        
+        if pruned:
+            pruned_count += 1
+            folds_skipped += cv - len(cv_scores)
+            if keep_pruned:
+                all_results.append(result)
+            continue
         all_results.append(result)
         
         # Update best parameters if this is better
         if avg_score < best_score:
             best_score = avg_score
             best_params = params
-            print(f"\nNew best parameters found (log loss: {best_score:.4f}):")
+            print(f"\nNew best parameters found (log loss: {result['log_loss']:.4f}, ECE: {result['ece']:.4f}, "
+                  f"margin MAE: {result['margin_mae']:.2f}):")
             for k, v in best_params.items():
                 print(f"  {k}: {v}")
     
-    # Sort results by score
-    all_results.sort(key=lambda x: x['log_loss'])
+    # Sort results by score, with pruned combinations after the completed ones
+    all_results.sort(key=lambda x: (x['pruned'], x[objective]))
+    
+    if prune is not None:
+        print(f"\nPruned {pruned_count} of {total_combinations} combinations, "
+              f"skipping {folds_skipped} of {total_combinations * cv} fold replays")
+        if prune_margin is not None:
+            print(f"Pruning used a margin of {prune_margin} on the running log loss, so combinations that "
+                  f"would have recovered in later folds may have been dropped")
     
     # Print the top 3 parameter combinations
-    print("\nTop 3 parameter combinations:")
-    for i, result in enumerate(all_results[:3]):
-        print(f"  {i+1}. Log loss: {result['log_loss']:.4f}, Parameters: {result['params']}")
+    _print_top_results(all_results)
     
     total_time = datetime.now() - start_time
     print(f"\nParameter tuning completed in {total_time.total_seconds()/60:.1f} minutes")
@@ -532,10 +959,712 @@ def parameter_tuning(data, param_grid, cv=5, max_combinations=None):
     return {
         'best_params': best_params,
         'best_score': best_score,
-        'all_results': all_results
+        'all_results': all_results,
+        'pruned_combinations': pruned_count
+    }
+
+
+def _tune_start_years(data, param_combinations, cv, engine, objective):
+    """
+    Grid search over parameter sets that include a training start year
+    
+    Every combination is scored in one batched replay from the earliest
+    start year (see cross_validate_batch), so the start years share the
+    replay instead of each needing a tuning run of its own. All start years
+    are scored on the same test folds, which cover the matches from the
+    latest candidate start year onward.
+    
+    Returns:
+    --------
+    dict with best parameters (including start_year) and results, as parameter_tuning
+    """
+    start_time = datetime.now()
+    start_years = sorted(set(params['start_year'] for params in param_combinations))
+    print(f"Scoring all {len(start_years)} start years together in one batched replay "
+          f"(test folds from {start_years[-1]} onward)...")
+    
+    scores = cross_validate_batch(data, param_combinations, cv=cv, engine=engine)
+    all_results = _score_results(param_combinations, scores)
+    all_results.sort(key=lambda x: x[objective])
+    best = all_results[0]
+    
+    print("\nBest log loss by start year:")
+    for start_year in start_years:
+        result = min((result for result in all_results if result['params']['start_year'] == start_year),
+                     key=lambda x: x[objective])
+        print(f"  {start_year}: log loss {result['log_loss']:.4f}, ECE {result['ece']:.4f}, "
+              f"margin MAE {result['margin_mae']:.2f}")
+    
+    _print_top_results(all_results)
+    
+    total_time = datetime.now() - start_time
+    print(f"\nParameter tuning completed in {total_time.total_seconds()/60:.1f} minutes")
+    
+    return {
+        'best_params': best['params'],
+        'best_score': best[objective],
+        'all_results': all_results,
+        'pruned_combinations': 0
+    }
+
+
+def training_window(data, params):
+    """Matches from a parameter set's start year onward (all matches if it has none)"""
+    start_year = params.get('start_year')
+    return data if start_year is None else data[data['year'] >= start_year]
+
+
+def _should_prune(completed_scores, partial_loss_sum, partial_count, fold_size, cv, best_score, prune_margin):
+    """
+    Whether a partially cross-validated combination can be abandoned
+    
+    Parameters:
+    -----------
+    completed_scores: list of float
+        Mean log loss of each completed fold
+    partial_loss_sum: float
+        Total log loss of the matches scored so far in the current fold
+    partial_count, fold_size: int
+        Matches scored so far and in total in the current fold
+    cv: int
+        Number of folds
+    best_score: float
+        Best mean log loss seen so far
+    prune_margin: float
+        None for the exact lower bound, otherwise the allowed excess of the running mean
+    """
+    if prune_margin is None:
+        # Unscored matches and folds contribute at least zero loss
+        lower_bound = (sum(completed_scores) + partial_loss_sum / fold_size) / cv
+        return lower_bound >= best_score
+    running_mean = (sum(completed_scores) + partial_loss_sum / partial_count) / (len(completed_scores) + 1)
+    return running_mean > best_score + prune_margin
+
+
+def encode_matches(data):
+    """
+    Encode match data as integer team/venue indexes and score arrays for the replay kernels
+    
+    Teams are indexed by their registry ID (see afl_teams.py), so the team
+    axis has a row for every registered team.
+    
+    Returns:
+    --------
+    dict of numpy arrays plus team and venue counts
+    """
+    teams = TeamRegistry()
+    venues = data['venue'].dropna().unique()
+    venue_ids = {venue: i for i, venue in enumerate(venues)}
+    
+    return {
+        'home_idx': teams.get_team_ids(data['home_team']),
+        'away_idx': teams.get_team_ids(data['away_team']),
+        'venue_idx': data['venue'].map(venue_ids).fillna(-1).to_numpy(dtype=np.int64),
+        'hscore': data['hscore'].to_numpy(dtype=float),
+        'ascore': data['ascore'].to_numpy(dtype=float),
+        'years': data['year'].to_numpy(),
+        'n_teams': teams.size,
+        'n_venues': len(venues)
+    }
+
+
+def cross_validate_batch(data, params_list, cv=5, engine='auto', batch_size=1000, return_probs=False,
+                         eval_start_year=None, checkpoints=None):
+    """
+    Cross-validate many parameter sets at once with the batch replay kernel
+    
+    Time-series training folds are expanding prefixes of the data, so each
+    batch of parameter sets is replayed once, scoring every test fold as the
+    replay passes the end of its training fold. Scores match
+    parameter_tuning's per-combination cross-validation.
+    
+    Parameter sets may include a 'start_year'. Each set's ratings, venue
+    adjustments and margin model are reset at the first season from its start
+    year, so sets with different training windows share one replay. The test
+    folds then split the matches from the latest start year onward, so every
+    set is scored on the same matches.
+    
+    Parameters:
+    -----------
+    data: pandas DataFrame
+        Historical match data
+    params_list: list of dict
+        Parameter sets to evaluate
+    cv: int
+        Number of cross-validation splits
+    engine: str
+        Replay engine ('numba', 'python' or 'rounds'; 'reference' has no batch kernel and uses 'python')
+    batch_size: int
+        Number of parameter sets replayed together (bounds memory use)
+    return_probs: bool
+        Also return the test-fold probabilities (test matches x parameter sets)
+        with the matching results and years, e.g. for bootstrap comparisons
+    eval_start_year: int
+        First season of the test folds (default: the latest start year in
+        params_list), so that parameter sets scored in separate calls share
+        the same folds
+    checkpoints: ReplayCheckpoints
+        Replay states at season boundaries (see afl_elo_checkpoints.py). Each
+        fold resumes from the latest season before its training data ends
+        for which every set in the batch has a state for the current data.
+        The state at the last season start before each fold's training end is
+        stored; adding seasons only moves the folds later, so a later run
+        resumes from those instead of replaying the unchanged history.
+        
+    Returns:
+    --------
+    dict with log_loss, margin_mae and ece arrays (one value per parameter set)
+    and cv_scores, cv_margin_maes and cv_eces arrays (parameter sets x folds)
+    """
+    data = data.sort_values(['year', 'match_date'])
+    encoded = encode_matches(data)
+    years = encoded['years']
+    results = np.where(encoded['hscore'] > encoded['ascore'], 1.0,
+                       np.where(encoded['hscore'] < encoded['ascore'], 0.0, 0.5))
+    margins = encoded['hscore'] - encoded['ascore']
+    
+    engine = resolve_engine(engine)
+    if engine == 'reference':
+        engine = 'python'
+    kernel = get_batch_replay_kernel(engine)
+    
+    # Position at which each parameter set's training window starts
+    window_starts = np.searchsorted(years, [p.get('start_year', years[0]) for p in params_list])
+    eval_start = int(window_starts.max())
+    if eval_start_year is not None:
+        eval_start = max(eval_start, int(np.searchsorted(years, eval_start_year)))
+    folds = [(eval_start + train_idx[-1] + 1, eval_start + test_idx[0], eval_start + test_idx[-1] + 1)
+             for train_idx, test_idx in TimeSeriesSplit(n_splits=cv).split(data.iloc[eval_start:])]
+    
+    season_hashes = {}
+    stored = set()
+    if checkpoints is not None:
+        season_hashes = season_prefix_hashes(data)
+        keys = [params_key(p) for p in params_list]
+        stored = {max([b for b in season_hashes if b < train_end], default=0) for train_end, _, _ in folds} - {0}
+        # Batch sets that can resume from the same season together
+        depths = [max([b for b, prefix in season_hashes.items() if checkpoints.get(key, prefix) is not None],
+                      default=0) for key in keys]
+        order = np.argsort(depths, kind='stable')
+        params_list = [params_list[i] for i in order]
+        keys = [keys[i] for i in order]
+        window_starts = window_starts[order]
+    
+    n_params = len(params_list)
+    cv_scores = np.empty((n_params, cv))
+    cv_margin_maes = np.empty((n_params, cv))
+    cv_eces = np.empty((n_params, cv))
+    test_probs = np.empty((folds[-1][2] - folds[0][1], n_params)) if return_probs else None
+    
+    for first in range(0, n_params, batch_size):
+        block = params_list[first:first + batch_size]
+        params = {name: np.array([p.get(name, DEFAULT_PARAMS[name]) for p in block], dtype=float)
+                  for name in DEFAULT_PARAMS}
+        base = params['base_rating']
+        ratings = np.tile(base, (encoded['n_teams'], 1))
+        venue_advantages = np.zeros((encoded['n_venues'], len(block)))
+        margin_sums = np.zeros((4, len(block)))
+        multipliers = margin_multipliers_batch(encoded['hscore'], encoded['ascore'],
+                                               params['margin_factor'], params['max_margin'])
+        block_starts = window_starts[first:first + batch_size]
+        
+        block_keys = keys[first:first + batch_size] if checkpoints is not None else []
+        
+        position = 0
+        for fold, (train_end, test_start, test_end) in enumerate(folds):
+            if checkpoints is not None:
+                # Resume from the latest season start before train_end that every set has stored
+                for boundary in sorted((b for b in season_hashes if position < b < train_end), reverse=True):
+                    states = [checkpoints.get(key, season_hashes[boundary]) for key in block_keys]
+                    if all(state is not None for state in states):
+                        for k, (member_ratings, member_venues, member_sums) in enumerate(states):
+                            # Teams and venues first seen later keep their starting values
+                            ratings[:len(member_ratings), k] = member_ratings
+                            ratings[len(member_ratings):, k] = base[k]
+                            venue_advantages[:, k] = 0.0
+                            venue_advantages[:len(member_venues), k] = member_venues
+                            margin_sums[:, k] = member_sums
+                        checkpoints.hits += len(states)
+                        position = boundary
+                        break
+            
+            # Continue the replay to the end of this fold's training data, one season at a time
+            boundaries = [i for i in np.flatnonzero(np.diff(years[:train_end])) + 1 if i > position]
+            for start, end in zip([position] + boundaries, boundaries + [train_end]):
+                if start in stored:
+                    for k, key in enumerate(block_keys):
+                        if checkpoints.get(key, season_hashes[start]) is None:
+                            checkpoints.put(key, season_hashes[start], ratings[:, k], venue_advantages[:, k],
+                                            margin_sums[:, k])
+                if start > 0 and years[start] != years[start - 1]:
+                    ratings = base + params['season_carryover'] * (ratings - base)
+                # Start the training window of sets whose start year begins here
+                starting = block_starts == start
+                if start > 0 and starting.any():
+                    ratings[:, starting] = base[starting]
+                    venue_advantages[:, starting] = 0.0
+                    margin_sums[:, starting] = 0.0
+                run_replay_batch(kernel, encoded['home_idx'], encoded['away_idx'], encoded['venue_idx'],
+                                 encoded['hscore'], encoded['ascore'], multipliers, ratings, venue_advantages,
+                                 margin_sums, params, None, start, end, record=False)
+            position = train_end
+            
+            # Score the test fold with frozen ratings (carried over if it starts a new season)
+            test_ratings = ratings
+            if years[test_start] > years[train_end - 1]:
+                test_ratings = base + params['season_carryover'] * (ratings - base)
+            
+            test = slice(test_start, test_end)
+            advantages = np.tile(params['home_advantage'], (test_end - test_start, 1))
+            venue_idx = encoded['venue_idx'][test]
+            known = venue_idx >= 0
+            advantages[known] += venue_advantages[venue_idx[known]]
+            diffs = (test_ratings[encoded['home_idx'][test]] + advantages) - test_ratings[encoded['away_idx'][test]]
+            
+            probs = np.clip(1.0 / (1.0 + 10 ** (-diffs / 400)), 0.001, 0.999)
+            cv_scores[first:first + len(block), fold] = match_log_losses(probs, results[test, None]).mean(axis=0)
+            cv_eces[first:first + len(block), fold] = expected_calibration_error(probs, results[test])
+            if return_probs:
+                test_probs[test_start - folds[0][1]:test_end - folds[0][1], first:first + len(block)] = probs
+            
+            sxx = margin_sums[0]
+            margin_scale = np.where(sxx > 0, margin_sums[1] / np.where(sxx > 0, sxx, 1.0), 0.0)
+            cv_margin_maes[first:first + len(block), fold] = np.abs(margins[test, None] - margin_scale * diffs).mean(axis=0)
+    
+    scores = {
+        'log_loss': cv_scores.mean(axis=1),
+        'cv_scores': cv_scores,
+        'margin_mae': cv_margin_maes.mean(axis=1),
+        'cv_margin_maes': cv_margin_maes,
+        'ece': cv_eces.mean(axis=1),
+        'cv_eces': cv_eces
+    }
+    if checkpoints is not None:
+        # Back to the caller's order
+        inverse = np.argsort(order)
+        scores = {name: values[inverse] for name, values in scores.items()}
+        if return_probs:
+            test_probs = test_probs[:, inverse]
+    if return_probs:
+        scores['test_probs'] = test_probs
+        scores['test_results'] = results[folds[0][1]:folds[-1][2]]
+        scores['test_years'] = years[folds[0][1]:folds[-1][2]]
+    return scores
+
+
+def data_fingerprint(data):
+    """Hash of the matches and results, to check that tuning workers score the same data"""
+    data = data.sort_values(['year', 'match_date'])
+    columns = data[['match_id', 'year', 'hscore', 'ascore']].astype(str).agg(','.join, axis=1)
+    return hashlib.sha256('\n'.join(columns).encode('utf-8')).hexdigest()
+
+
+def _score_results(params_list, scores):
+    """Result records for parameter sets scored by cross_validate_batch"""
+    return [
+        {
+            'params': params,
+            'log_loss': float(scores['log_loss'][i]),
+            'cv_scores': scores['cv_scores'][i].tolist(),
+            'margin_mae': float(scores['margin_mae'][i]),
+            'cv_margin_maes': scores['cv_margin_maes'][i].tolist(),
+            'ece': float(scores['ece'][i]),
+            'cv_eces': scores['cv_eces'][i].tolist(),
+            'pruned': False
+        }
+        for i, params in enumerate(params_list)
+    ]
+
+
+def work_tuning_queue(queue, data, engine='auto', worker=None, lease=DEFAULT_LEASE, poll_interval=10):
+    """
+    Score tuning tasks from a work queue until every task is done
+    
+    Each task's parameter sets are cross-validated in one batched replay
+    (see cross_validate_batch) and the scores written back to the queue.
+    When no task is pending the worker keeps polling while other workers
+    still hold tasks, so it can take over a task whose worker crashed once
+    the lease runs out.
+    
+    Parameters:
+    -----------
+    queue: TuningQueue
+        Queue created by tune_with_queue
+    data: pandas DataFrame
+        Historical match data (the same matches the coordinator tuned on)
+    engine: str
+        Replay engine for the batch replay
+    worker: str
+        Worker name recorded with claimed tasks (default: host name and process ID)
+    lease: float
+        Seconds a claimed task is held before other workers may take it over
+    poll_interval: float
+        Seconds between checks for available tasks
+        
+    Returns:
+    --------
+    Number of tasks this worker completed
+    """
+    config = queue.config()
+    if data_fingerprint(data) != config['data_fingerprint']:
+        raise ValueError(f"The match data differs from the data the tuning queue {queue.path} was created for "
+                         f"({config['matches']} matches from {config['start_year']} to {config['end_year']})")
+    worker = worker or default_worker_id()
+    completed = 0
+    
+    while True:
+        task = queue.claim(worker, lease)
+        if task is None:
+            if queue.is_finished():
+                return completed
+            time.sleep(poll_interval)
+            continue
+        
+        task_id, params_list = task
+        start_time = datetime.now()
+        try:
+            scores = cross_validate_batch(data, params_list, cv=config['cv'], engine=engine,
+                                          eval_start_year=config['eval_start_year'])
+        except BaseException as e:
+            queue.release(task_id, worker, repr(e))
+            raise
+        if queue.complete(task_id, worker, _score_results(params_list, scores)):
+            completed += 1
+        counts = queue.counts()
+        print(f"Task {task_id}: scored {len(params_list)} parameter sets in "
+              f"{(datetime.now() - start_time).total_seconds():.1f}s "
+              f"({counts['done']} done, {counts['running']} running, {counts['pending']} pending)")
+
+
+def tune_with_queue(data, param_grid, queue_path, cv=5, max_combinations=None, engine='auto', objective='log_loss',
+                    task_size=DEFAULT_TASK_SIZE, lease=DEFAULT_LEASE, start_year=None, end_year=None):
+    """
+    Grid search shared with other worker processes through a SQLite work queue
+    
+    The first call fills the queue with batches of parameter sets. This
+    process then works through the queue like any other worker (see
+    work_tuning_queue) until every task is finished, and assembles the
+    ranking from the scores in the queue. Calling it again with an existing
+    queue resumes it, so a coordinator that stopped part way does not
+    requeue the grid. Scores match parameter_tuning without pruning.
+    
+    Parameters:
+    -----------
+    data: pandas DataFrame
+        Historical match data
+    param_grid: dict
+        Dictionary of parameter ranges (see parameter_tuning)
+    queue_path: str
+        Queue database, on a volume shared with the workers
+    cv, max_combinations, engine, objective:
+        As for parameter_tuning
+    task_size: int
+        Parameter sets per task
+    lease: float
+        Seconds a claimed task is held before other workers may take it over
+    start_year, end_year: int
+        Years of the match data, recorded for the workers
+        
+    Returns:
+    --------
+    dict with best parameters and results, as parameter_tuning
+    """
+    if objective not in ('log_loss', 'ece'):
+        raise ValueError(f"Unknown tuning objective '{objective}', expected 'log_loss' or 'ece'")
+    
+    start_time = datetime.now()
+    queue = TuningQueue(queue_path)
+    config = {
+        'start_year': int(start_year if start_year is not None else data['year'].min()),
+        'end_year': int(end_year if end_year is not None else data['year'].max()),
+        'matches': len(data),
+        'data_fingerprint': data_fingerprint(data),
+        'cv': cv,
+        'objective': objective,
+        'eval_start_year': max(param_grid['start_year']) if 'start_year' in param_grid else None
+    }
+    
+    if sum(queue.counts().values()) == 0:
+        param_combinations = parameter_combinations(param_grid, max_combinations)
+        n_tasks = queue.create(config, param_combinations, task_size=task_size)
+        print(f"Queued {len(param_combinations)} parameter combinations as {n_tasks} tasks in {queue_path}")
+    else:
+        existing = queue.config()
+        if any(existing.get(key) != config[key] for key in ('data_fingerprint', 'cv', 'objective')):
+            raise ValueError(f"Tuning queue {queue_path} was created for different data or settings; "
+                             f"use a new queue file")
+        print(f"Resuming tuning queue {queue_path}")
+    
+    print(f"Start workers with: python scripts/afl_elo_training.py --tuning-queue {queue_path} --queue-worker")
+    completed = work_tuning_queue(queue, data, engine=engine, lease=lease)
+    print(f"This process completed {completed} tasks")
+    
+    for task_id, n_params, error in queue.failures():
+        print(f"Warning: task {task_id} ({n_params} parameter sets) failed and is left out: {error}")
+    
+    all_results = queue.results()
+    queue.close()
+    if not all_results:
+        raise ValueError(f"No parameter sets in {queue_path} were scored")
+    all_results.sort(key=lambda x: x[objective])
+    best = all_results[0]
+    
+    _print_top_results(all_results)
+    total_time = datetime.now() - start_time
+    print(f"\nParameter tuning completed in {total_time.total_seconds()/60:.1f} minutes")
+    
+    return {
+        'best_params': best['params'],
+        'best_score': best[objective],
+        'all_results': all_results,
+        'pruned_combinations': 0
+    }
+
+
+def neighbourhood_grid(center, scale=1.0):
+    """
+    Parameter grid around a parameter set: each tuned parameter at its value and one step either side
+    
+    Steps are WARM_START_STEPS times scale. Values are kept in range
+    (season_carryover between 0 and 1, the rest non-negative) and other
+    entries, such as base_rating and start_year, are fixed at the centre.
+    """
+    param_grid = {}
+    for name, value in center.items():
+        if name not in WARM_START_STEPS:
+            param_grid[name] = [value]
+            continue
+        step = WARM_START_STEPS[name] * scale
+        upper = 1.0 if name == 'season_carryover' else np.inf
+        values = np.clip(np.round([value - step, value, value + step], 6), 0.0, upper)
+        param_grid[name] = sorted(set(float(v) for v in values))
+    return param_grid
+
+
+def warm_start_tuning(data, previous_results_file, cv=5, engine='auto', objective='log_loss', rounds=3, top=10,
+                      checkpoint_file=None):
+    """
+    Retune around the results of a previous tuning run (e.g. after adding a season)
+    
+    The best parameters rarely move far when a season is added, so rather
+    than searching the full grid again, each round scores the full grid of
+    one step either side of the best parameters so far (see
+    neighbourhood_grid) and the next round halves the steps around the new
+    best. The first round also rescores the previous run's top results on
+    the new data. Parameter sets are scored in batched replays (see
+    cross_validate_batch) and each set is scored once however many rounds
+    revisit it.
+    
+    With a checkpoint file, replay states at season boundaries are loaded
+    from and saved to it (see afl_elo_checkpoints.py), so parameter sets
+    scored by an earlier run resume from the unchanged seasons instead of
+    replaying the full history. Scores are identical with or without it.
+    
+    Parameters:
+    -----------
+    data: pandas DataFrame
+        Historical match data
+    previous_results_file: str
+        Tuning results JSON from an earlier run (afl_elo_tuning_results_<year>.json)
+    cv, engine, objective:
+        As for parameter_tuning
+    rounds: int
+        Number of neighbourhood rounds
+    top: int
+        Number of the previous run's top results to rescore
+    checkpoint_file: str
+        Replay checkpoint file (.npz), or None to replay the full history
+        
+    Returns:
+    --------
+    dict with best parameters and results, as parameter_tuning
+    """
+    if objective not in ('log_loss', 'ece'):
+        raise ValueError(f"Unknown tuning objective '{objective}', expected 'log_loss' or 'ece'")
+    
+    start_time = datetime.now()
+    with open(previous_results_file, 'r') as f:
+        previous = json.load(f)
+    previous_results = [result['params'] for result in previous['all_results'] if not result.get('pruned')][:top]
+    center = dict(DEFAULT_PARAMS, **previous['best_params'])
+    print(f"Warm-starting from {previous_results_file} (previous best {previous.get('objective', 'log_loss')} "
+          f"{previous['best_score']:.4f})")
+    
+    checkpoints = ReplayCheckpoints(checkpoint_file) if checkpoint_file else None
+    if checkpoints is not None:
+        print(f"Loaded {len(checkpoints)} replay checkpoints from {checkpoint_file}")
+    
+    # Every round scores on the same folds, whatever start years it includes
+    eval_start_year = max([params.get('start_year', data['year'].min()) for params in previous_results + [center]])
+    scored = {}
+    for round_number in range(rounds):
+        candidates = parameter_combinations(neighbourhood_grid(center, 0.5 ** round_number))
+        if round_number == 0:
+            candidates = [dict(DEFAULT_PARAMS, **params) for params in previous_results] + candidates
+        new_params = list({params_key(params): params for params in candidates
+                           if params_key(params) not in scored}.values())
+        if new_params:
+            scores = cross_validate_batch(data, new_params, cv=cv, engine=engine, eval_start_year=eval_start_year,
+                                          checkpoints=checkpoints)
+            for result in _score_results(new_params, scores):
+                scored[params_key(result['params'])] = result
+        
+        best = min(scored.values(), key=lambda x: x[objective])
+        center = best['params']
+        print(f"Round {round_number + 1}/{rounds}: scored {len(new_params)} new parameter sets, "
+              f"best {objective.replace('_', ' ')} {best[objective]:.4f}")
+    
+    if checkpoints is not None:
+        print(f"Resumed {checkpoints.hits} fold replays from checkpoints")
+        kept = checkpoints.save(checkpoint_file,
+                                keep_prefixes=season_prefix_hashes(data.sort_values(['year', 'match_date'])).values())
+        print(f"Saved {kept} replay checkpoints to {checkpoint_file}")
+    
+    all_results = sorted(scored.values(), key=lambda x: x[objective])
+    best = all_results[0]
+    
+    _print_top_results(all_results)
+    total_time = datetime.now() - start_time
+    print(f"\nParameter tuning completed in {total_time.total_seconds()/60:.1f} minutes")
+    
+    return {
+        'best_params': best['params'],
+        'best_score': best[objective],
+        'all_results': all_results,
+        'pruned_combinations': 0
+    }
+
+
+def _print_top_results(all_results, top=3):
+    """Print the best tuning results"""
+    print(f"\nTop {top} parameter combinations:")
+    for i, result in enumerate(all_results[:top]):
+        print(f"  {i+1}. Log loss: {result['log_loss']:.4f}, ECE: {result['ece']:.4f}, "
+              f"Margin MAE: {result['margin_mae']:.2f}, "
+              f"Parameters: {result['params']}")
+
+
+def bootstrap_top_results(data, all_results, cv=5, top=5, n_resamples=2000, block='season', engine='auto', n_jobs=1):
+    """
+    Paired bootstrap comparison of the top tuning results against the best
+    
+    Re-scores the top parameter sets' test folds in one batch replay and
+    bootstraps the metric differences on shared resamples, so it shows
+    whether a small gap in cross-validated log loss is real.
+    
+    Parameters:
+    -----------
+    data: pandas DataFrame
+        Historical match data used for tuning
+    all_results: list of dict
+        Tuning results, best first (see parameter_tuning)
+    cv: int
+        Number of cross-validation splits used for tuning
+    top: int
+        Number of results to compare (including the best)
+    n_resamples: int
+        Number of bootstrap resamples
+    block: str
+        'season' or 'match' resampling (see afl_elo_bootstrap.py)
+    engine: str
+        Replay engine for the batch replay
+    n_jobs: int
+        Worker processes for the resampling
+        
+    Returns:
+    --------
+    dict of metric differences from bootstrap_differences
+    """
+    results = [result for result in all_results if not result.get('pruned')][:top]
+    scores = cross_validate_batch(data, [result['params'] for result in results], cv=cv, engine=engine,
+                                  return_probs=True)
+    differences = bootstrap_differences(scores['test_probs'], scores['test_results'], scores['test_years'],
+                                        block=block, n_resamples=n_resamples, n_jobs=n_jobs)
+    
+    print(f"\nBootstrap comparison with the best parameters ({n_resamples} {block}-block resamples, 95% intervals):")
+    for i, result in enumerate(results[1:]):
+        print(f"  {i + 2}. {result['params']}")
+        for metric in BOOTSTRAP_METRICS:
+            difference = differences[metric]
+            print(f"     {metric}: {difference['estimate'][i]:+.4f} "
+                  f"({difference['lower'][i]:+.4f} to {difference['upper'][i]:+.4f}, "
+                  f"better than the best in {difference['prob_better'][i]:.0%} of resamples)")
+    
+    return differences
+
+
+def parameter_surface(data, base_params, x_param, x_values, y_param, y_values, cv=5, engine='auto'):
+    """
+    Evaluate cross-validated log loss over a 2-D slice of the parameter space
+    
+    Parameters:
+    -----------
+    data: pandas DataFrame
+        Historical match data
+    base_params: dict
+        Values for the parameters held fixed
+    x_param, y_param: str
+        Names of the two parameters to vary
+    x_values, y_values: sequence of float
+        Values to evaluate for each parameter
+    cv: int
+        Number of cross-validation splits
+    engine: str
+        Replay engine for the batch replay
+        
+    Returns:
+    --------
+    dict with the axis values and log_loss / margin_mae / ece grids of shape (len(y_values), len(x_values))
+    """
+    x_values = np.asarray(x_values, dtype=float)
+    y_values = np.asarray(y_values, dtype=float)
+    params_list = [dict(base_params, **{x_param: x, y_param: y}) for y in y_values for x in x_values]
+    
+    print(f"Evaluating {len(y_values)}x{len(x_values)} {y_param} x {x_param} surface "
+          f"with {cv}-fold cross-validation...")
+    start_time = datetime.now()
+    scores = cross_validate_batch(data, params_list, cv=cv, engine=engine)
+    print(f"Surface evaluated in {(datetime.now() - start_time).total_seconds():.1f} seconds")
+    
+    shape = (len(y_values), len(x_values))
+    return {
+        'x_param': x_param,
+        'y_param': y_param,
+        'x_values': x_values,
+        'y_values': y_values,
+        'log_loss': scores['log_loss'].reshape(shape),
+        'margin_mae': scores['margin_mae'].reshape(shape),
+        'ece': scores['ece'].reshape(shape)
     }
 
 
+def save_surface(surface, base_params, output_prefix):
+    """Save a parameter surface as a .npz of arrays and a heatmap .png"""
+    x_param, y_param = surface['x_param'], surface['y_param']
+    
+    np.savez(f"{output_prefix}.npz", x_values=surface['x_values'], y_values=surface['y_values'],
+             log_loss=surface['log_loss'], margin_mae=surface['margin_mae'], ece=surface['ece'],
+             base_params=json.dumps(base_params))
+    
+    fig, axes = plt.subplots(1, 2, figsize=(14, 6))
+    extent = [surface['x_values'][0], surface['x_values'][-1], surface['y_values'][0], surface['y_values'][-1]]
+    for ax, metric, title in zip(axes, ['log_loss', 'margin_mae'], ['Log loss', 'Margin MAE (points)']):
+        grid = surface[metric]
+        image = ax.imshow(grid, origin='lower', aspect='auto', extent=extent, cmap='viridis_r')
+        best_y, best_x = np.unravel_index(np.argmin(grid), grid.shape)
+        ax.plot(surface['x_values'][best_x], surface['y_values'][best_y], 'r*', markersize=12)
+        ax.set_xlabel(x_param)
+        ax.set_ylabel(y_param)
+        ax.set_title(f"{title} (best {grid[best_y, best_x]:.4f} at {x_param}="
+                     f"{surface['x_values'][best_x]:g}, {y_param}={surface['y_values'][best_y]:g})", fontsize=9)
+        fig.colorbar(image, ax=ax)
+    fig.tight_layout()
+    fig.savefig(f"{output_prefix}.png", dpi=120)
+    plt.close(fig)
+    
+    print(f"Surface saved to {output_prefix}.npz and {output_prefix}.png")
+
+
 def main():
     """Main function to train the ELO model"""
     parser = argparse.ArgumentParser(description='Train AFL ELO model')
@@ -543,6 +1672,9 @@ def main():
                     default=1990)
     parser.add_argument('--end-year', type=int, help='End year for training data (inclusive)', 
                         default=datetime.now().year)
+    parser.add_argument('--start-years', type=int, nargs='+',
+                        help='Candidate training start years to tune jointly with the ELO parameters '
+                             '(overrides --start-year; scored on the matches from the latest candidate onward)')
     parser.add_argument('--db-path', type=str, default='data/afl_predictions.db',
                         help='Path to the SQLite database')
     parser.add_argument('--output-dir', type=str, default='.',
@@ -553,12 +1685,90 @@ def main():
                         help='Number of cross-validation folds for parameter tuning')
     parser.add_argument('--max-combinations', type=int, default=500,
                         help='Maximum number of parameter combinations to test (None for all)')
+    parser.add_argument('--engine', type=str, default='auto',
+                        choices=['auto', 'numba', 'python', 'rounds', 'reference'],
+                        help='Replay engine (auto uses numba when installed, otherwise the pure-Python array engine)')
+    parser.add_argument('--prune', type=str, choices=['fold', 'season'],
+                        help='Abandon parameter combinations once partial cross-validation shows they cannot win '
+                             '(tested after each fold, or after each season of a test fold)')
+    parser.add_argument('--prune-margin', type=float,
+                        help='Prune when the running mean log loss exceeds the best by this margin '
+                             '(default: only prune when the lower bound on the final loss cannot beat the best)')
+    parser.add_argument('--objective', type=str, default='log_loss', choices=['log_loss', 'ece'],
+                        help='Cross-validated score minimised by parameter tuning (ece = expected calibration error)')
+    parser.add_argument('--bootstrap', type=int, default=0,
+                        help='Bootstrap resamples for comparing the top tuned parameter sets (0 to disable)')
+    parser.add_argument('--bootstrap-top', type=int, default=5,
+                        help='Number of top tuned parameter sets to compare with --bootstrap')
+    parser.add_argument('--bootstrap-block', type=str, default='season', choices=['season', 'match'],
+                        help='Resample whole seasons or individual matches')
+    parser.add_argument('--model-format', type=str, default='json', choices=['json', 'binary'],
+                        help=f'Model file format (binary writes a compact {BINARY_EXTENSION} file whose yearly '
+                             'ratings are read on demand)')
+    parser.add_argument('--ensemble-size', type=int, default=1,
+                        help='Also save an ensemble of the top N tuned parameter sets (1 to disable)')
+    parser.add_argument('--surface-params', type=str, nargs=2, metavar=('X_PARAM', 'Y_PARAM'),
+                        choices=list(SURFACE_RANGES),
+                        help='Export a log loss surface over two parameters instead of training '
+                             '(other parameters fixed at the best tuned values)')
+    parser.add_argument('--surface-steps', type=int, default=50,
+                        help='Number of values per surface axis')
+    parser.add_argument('--surface-ranges', type=float, nargs=4, metavar=('X_MIN', 'X_MAX', 'Y_MIN', 'Y_MAX'),
+                        help='Surface axis ranges (defaults depend on the parameter)')
+    parser.add_argument('--tuning-results', type=str,
+                        help='Tuning results JSON providing the fixed surface parameters '
+                             '(default: afl_elo_tuning_results_<end-year>.json in the output directory)')
+    parser.add_argument('--tuning-queue', type=str,
+                        help='Share parameter tuning with worker processes through this SQLite work queue '
+                             '(a file on a volume every worker can reach; an existing queue is resumed)')
+    parser.add_argument('--queue-worker', action='store_true',
+                        help='Score tasks from --tuning-queue until it is finished, then exit '
+                             '(the years and folds come from the queue)')
+    parser.add_argument('--task-size', type=int, default=DEFAULT_TASK_SIZE,
+                        help='Parameter sets per tuning queue task')
+    parser.add_argument('--lease', type=float, default=DEFAULT_LEASE,
+                        help='Seconds a worker holds a queue task before others may take it over '
+                             '(should be well above the time to score one task)')
+    parser.add_argument('--force', action='store_true',
+                        help='Train even if the matches, parameters and code are unchanged since the last run')
+    parser.add_argument('--warm-start', type=str, metavar='TUNING_RESULTS',
+                        help='Retune around the results of an earlier run (e.g. afl_elo_tuning_results_2024.json) '
+                             'instead of searching the full grid')
+    parser.add_argument('--warm-start-rounds', type=int, default=3,
+                        help='Neighbourhood rounds for --warm-start, halving the steps each round')
+    parser.add_argument('--checkpoint-cache', type=str,
+                        help='Replay checkpoints reused across --warm-start runs '
+                             '(default: afl_elo_replay_checkpoints.npz in the output directory)')
     
     args = parser.parse_args()
     
     print("AFL ELO Model Training")
     print("=====================")
-    print(f"Training with data from year {args.start_year} up to and including year {args.end_year}")
+    if args.queue_worker:
+        if not os.path.exists(args.db_path):
+            print(f"Error: Database not found at {args.db_path}")
+            return
+        if not args.tuning_queue or not os.path.exists(args.tuning_queue):
+            print("Error: --queue-worker needs an existing --tuning-queue (start the coordinator first)")
+            return
+        queue = TuningQueue(args.tuning_queue)
+        config = queue.config()
+        if not config:
+            print(f"Error: Tuning queue {args.tuning_queue} has not been filled yet")
+            return
+        print(f"Working on tuning queue {args.tuning_queue} "
+              f"(matches from {config['start_year']} to {config['end_year']})")
+        data = fetch_afl_data(args.db_path, start_year=config['start_year'], end_year=config['end_year'])
+        completed = work_tuning_queue(queue, data, engine=args.engine, lease=args.lease)
+        print(f"Completed {completed} tasks; the tuning queue is finished")
+        return
+    
+    if args.start_years:
+        args.start_year = min(args.start_years)
+        print(f"Tuning the training start year over {', '.join(str(year) for year in sorted(args.start_years))}, "
+              f"up to and including year {args.end_year}")
+    else:
+        print(f"Training with data from year {args.start_year} up to and including year {args.end_year}")
     
     # Check if database exists
     if not os.path.exists(args.db_path):
@@ -569,11 +1779,63 @@ def main():
     # Make sure output directory exists
     os.makedirs(args.output_dir, exist_ok=True)
     
+    output_prefix = f"afl_elo_trained_to_{args.end_year}"
+    model_file = os.path.join(args.output_dir,
+                              output_prefix + (BINARY_EXTENSION if args.model_format == 'binary' else '.json'))
+    predictions_file = os.path.join(args.output_dir, f"{output_prefix}_predictions.csv")
+    tuning_file = os.path.join(args.output_dir, f"afl_elo_tuning_results_{args.end_year}.json")
+    ensemble_file = os.path.join(args.output_dir, f"afl_elo_ensemble_trained_to_{args.end_year}.json")
+    
+    # Skip training when the inputs of the last run are unchanged (not for parameter surfaces)
+    outputs = [model_file, predictions_file]
+    if not args.no_tune_parameters:
+        outputs.append(tuning_file)
+        if args.ensemble_size > 1:
+            outputs.append(ensemble_file)
+    fingerprint_file = fingerprint_path(model_file)
+    ignored_args = ['db_path', 'output_dir', 'force', 'tuning_queue', 'queue_worker', 'task_size', 'lease',
+                    'checkpoint_cache']
+    fingerprint = {
+        'matches': db_fingerprint(args.db_path, args.start_year, args.end_year, completed_only=True),
+        'parameters': {name: value for name, value in vars(args).items() if name not in ignored_args},
+        'code': code_fingerprint()
+    }
+    if args.warm_start:
+        if not os.path.exists(args.warm_start):
+            print(f"Error: Earlier tuning results not found at {args.warm_start}")
+            return
+        # Retuning starts from the earlier results, so rerun when they change
+        fingerprint['warm_start'] = file_fingerprint(args.warm_start)
+    if not args.surface_params and not args.force and outputs_current(fingerprint_file, fingerprint, outputs):
+        print(f"Matches, parameters and code unchanged since the last run ({fingerprint_file}); "
+              f"leaving {model_file} as it is (use --force to retrain)")
+        return
+    
     # Fetch data from database
     print("Fetching AFL match data from database...")
     data = fetch_afl_data(args.db_path, start_year=args.start_year, end_year=args.end_year)
     print(f"Fetched {len(data)} matches from {data['year'].min()} to {data['year'].max()}")
     
+    if args.surface_params:
+        x_param, y_param = args.surface_params
+        tuning_file = args.tuning_results or os.path.join(args.output_dir, f"afl_elo_tuning_results_{args.end_year}.json")
+        if os.path.exists(tuning_file):
+            with open(tuning_file, 'r') as f:
+                base_params = dict(DEFAULT_PARAMS, **json.load(f)['best_params'])
+            print(f"Fixing other parameters at the best values from {tuning_file}")
+        else:
+            base_params = dict(DEFAULT_PARAMS)
+            print(f"No tuning results found at {tuning_file}, fixing other parameters at their defaults")
+        
+        ranges = args.surface_ranges or (SURFACE_RANGES[x_param] + SURFACE_RANGES[y_param])
+        surface = parameter_surface(data, base_params,
+                                    x_param, np.linspace(ranges[0], ranges[1], args.surface_steps),
+                                    y_param, np.linspace(ranges[2], ranges[3], args.surface_steps),
+                                    cv=args.cv_folds, engine=args.engine)
+        output_prefix = os.path.join(args.output_dir, f"afl_elo_surface_{x_param}_{y_param}_{args.end_year}")
+        save_surface(surface, base_params, output_prefix)
+        return
+    
     if not args.no_tune_parameters:
         print("\nPerforming parameter tuning...")
         
@@ -584,40 +1846,73 @@ def main():
             'home_advantage': [20, 30, 40, 50, 60, 70],  # Home ground advantage in rating points
             'margin_factor': [0.1, 0.2, 0.3, 0.4, 0.5, 0.7],  # How much margin affects rating changes
             'season_carryover': [0.5, 0.6, 0.7, 0.75, 0.8, 0.9],  # How much rating carries over between seasons
-            'max_margin': [60, 80, 100, 120, 140, 160]  # Maximum margin to consider
+            'max_margin': [60, 80, 100, 120, 140, 160],  # Maximum margin to consider
+            'venue_k_factor': [0, 2, 5]  # How quickly per-venue home advantage is learned (0 = global only)
         }
+        if args.start_years:
+            param_grid['start_year'] = sorted(set(args.start_years))  # First season of the training window
         
         # Report the total number of combinations
         total_combos = (len(param_grid['k_factor']) * 
                         len(param_grid['home_advantage']) * 
                         len(param_grid['margin_factor']) * 
                         len(param_grid['season_carryover']) * 
-                        len(param_grid['max_margin']))
+                        len(param_grid['max_margin']) *
+                        len(param_grid['venue_k_factor']))
         
-        print(f"Parameter grid has {total_combos} possible combinations")
+        if args.start_years:
+            print(f"Parameter grid has {total_combos} possible combinations per start year")
+        else:
+            print(f"Parameter grid has {total_combos} possible combinations")
         
         # Perform parameter tuning
-        tuning_results = parameter_tuning(data, param_grid, cv=args.cv_folds, max_combinations=args.max_combinations)
+        if args.warm_start:
+            if args.start_years:
+                print("Warm-start retuning keeps the start year of the earlier results, so --start-years is ignored")
+            checkpoint_file = args.checkpoint_cache or os.path.join(args.output_dir, 'afl_elo_replay_checkpoints.npz')
+            tuning_results = warm_start_tuning(data, args.warm_start, cv=args.cv_folds, engine=args.engine,
+                                               objective=args.objective, rounds=args.warm_start_rounds,
+                                               checkpoint_file=checkpoint_file)
+        elif args.tuning_queue:
+            if args.prune:
+                print("Queued tasks are scored in batched replays, which are not pruned")
+            tuning_results = tune_with_queue(data, param_grid, args.tuning_queue, cv=args.cv_folds,
+                                             max_combinations=args.max_combinations, engine=args.engine,
+                                             objective=args.objective, task_size=args.task_size, lease=args.lease,
+                                             start_year=args.start_year, end_year=args.end_year)
+        else:
+            tuning_results = parameter_tuning(data, param_grid, cv=args.cv_folds,
+                                              max_combinations=args.max_combinations, engine=args.engine,
+                                              prune=args.prune, prune_margin=args.prune_margin,
+                                              objective=args.objective)
         
         # Display best parameters
         best_params = tuning_results['best_params']
         print(f"\nBest parameters found:")
         for key, value in best_params.items():
             print(f"  {key}: {value}")
-        print(f"Best log loss: {tuning_results['best_score']:.4f}")
+        print(f"Best {args.objective.replace('_', ' ')}: {tuning_results['best_score']:.4f}")
+        if 'start_year' in best_params:
+            print(f"Best training window: {best_params['start_year']} to {args.end_year}")
         
         # Save tuning results
-        tuning_file = os.path.join(args.output_dir, f"afl_elo_tuning_results_{args.end_year}.json")
         with open(tuning_file, 'w') as f:
             # Convert numpy arrays to lists for JSON serialization
             tuning_results_json = {
                 'best_params': best_params,
+                'objective': args.objective,
                 'best_score': float(tuning_results['best_score']),
+                'pruned_combinations': tuning_results['pruned_combinations'],
                 'all_results': [
                     {
                         'params': result['params'],
                         'log_loss': float(result['log_loss']),
-                        'cv_scores': [float(score) for score in result['cv_scores']]
+                        'cv_scores': [float(score) for score in result['cv_scores']],
+                        'margin_mae': float(result['margin_mae']),
+                        'cv_margin_maes': [float(mae) for mae in result['cv_margin_maes']],
+                        'ece': float(result['ece']),
+                        'cv_eces': [float(ece) for ece in result['cv_eces']],
+                        'pruned': result['pruned']
                     }
                     for result in tuning_results['all_results']
                 ]
@@ -626,26 +1921,35 @@ def main():
         
         print(f"Tuning results saved to {tuning_file}")
         
+        if args.bootstrap > 0:
+            bootstrap_top_results(data, tuning_results['all_results'], cv=args.cv_folds, top=args.bootstrap_top,
+                                  n_resamples=args.bootstrap, block=args.bootstrap_block, engine=args.engine)
+        
         # Train model with best parameters
         print("\nTraining model with best parameters...")
-        model = train_elo_model(data, best_params)
+        model = train_elo_model(training_window(data, best_params), best_params, engine=args.engine)
+        
+        if args.ensemble_size > 1:
+            # Train the top-N parameter sets as an equally weighted ensemble
+            members = [result for result in tuning_results['all_results'] if not result['pruned']][:args.ensemble_size]
+            print(f"\nTraining ensemble of the top {len(members)} parameter sets...")
+            member_models = [model] + [train_elo_model(training_window(data, result['params']), result['params'],
+                                                       engine=args.engine)
+                                       for result in members[1:]]
+            save_ensemble(member_models, [1.0] * len(member_models), ensemble_file)
+            print(f"Ensemble saved to {ensemble_file}")
     else:
         # Use default parameters
-        params = {
-            'base_rating': 1500,
-            'k_factor': 20,
-            'home_advantage': 50,
-            'margin_factor': 0.3,
-            'season_carryover': 0.6,
-            'max_margin': 120
-        }
+        params = dict(DEFAULT_PARAMS)
         print("\nSkipping parameter tuning and using default parameters...")
         print("Use --tune-parameters flag to find optimal parameters")
+        if args.ensemble_size > 1:
+            print("Ensembles are built from tuning results, so --ensemble-size is ignored without tuning")
         for key, value in params.items():
             print(f"  {key}: {value}")
         
         # Train model with default parameters
-        model = train_elo_model(data, params)
+        model = train_elo_model(data, params, engine=args.engine)
     
     # Evaluate model
     metrics = model.evaluate_model()
@@ -653,16 +1957,17 @@ def main():
     print(f"  Accuracy: {metrics['accuracy']:.4f}")
     print(f"  Brier Score: {metrics['brier_score']:.4f}")
     print(f"  Log Loss: {metrics['log_loss']:.4f}")
+    print(f"  Margin MAE: {metrics['margin_mae']:.2f} points")
+    print(f"  Expected Calibration Error: {metrics['ece']:.4f}")
+    margin_scale, margin_std = model.get_margin_model()
+    print(f"  Margin model: {margin_scale:.3f} points per rating point, residual std {margin_std:.1f} points")
     
     # Save model and predictions
-    output_prefix = f"afl_elo_trained_to_{args.end_year}"
-    model_file = os.path.join(args.output_dir, f"{output_prefix}.json")
-    predictions_file = os.path.join(args.output_dir, f"{output_prefix}_predictions.csv")
-    
     model.save_model(model_file)
     print(f"\nModel saved to {model_file}")
     
     model.save_predictions_to_csv(predictions_file)
+    save_fingerprint(fingerprint_file, fingerprint, outputs)
     
     # Display final team ratings
     print("\nFinal Team Ratings:")
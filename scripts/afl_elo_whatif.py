@@ -0,0 +1,339 @@
+import os
+import argparse
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from afl_elo_predictions import AFLEloPredictor, fetch_matches
+from afl_elo_replay import (resolve_engine, get_replay_kernel, get_batch_replay_kernel, margin_multipliers,
+                             replay_outputs, run_replay, run_replay_batch)
+
+
+class AFLEloWhatIf:
+    def __init__(self, predictor, matches, engine='auto'):
+        """
+        Replay matches once, keeping rating snapshots so hypothetical results
+        can be recomputed from the nearest snapshot instead of from scratch
+
+        The baseline replay matches predict_matches: ratings are carried over
+        between seasons, and matches without scores are predicted only.
+        Snapshots are taken before the first match of every round.
+
+        Parameters:
+        -----------
+        predictor: AFLEloPredictor
+            Predictor with a single loaded model (ensembles are not supported)
+        matches: pandas DataFrame
+            Matches in chronological order (see fetch_matches)
+        engine: str
+            Array replay engine: 'python', 'numba', 'rounds' or 'auto'
+        """
+        if predictor.member_weights is not None:
+            raise ValueError("What-if scenarios are replayed for a single model, not an ensemble")
+
+        engine = resolve_engine(engine)
+        if engine == 'reference':
+            print("What-if scenarios are replayed with the array engines, using the python engine")
+            engine = 'python'
+        self.kernel = get_replay_kernel(engine)
+        self.batch_kernel = get_batch_replay_kernel(engine)
+        self.predictor = predictor
+        self.matches = matches.reset_index(drop=True)
+
+        teams = predictor.teams
+        self.home_idx = teams.get_team_ids(self.matches['home_team'])
+        self.away_idx = teams.get_team_ids(self.matches['away_team'])
+        self.home_teams = [teams.get_team_name(team_id) for team_id in self.home_idx.tolist()]
+        self.away_teams = [teams.get_team_name(team_id) for team_id in self.away_idx.tolist()]
+        self.venue_idx = np.array([predictor.get_venue_id(venue) for venue in self.matches['venue']], dtype=np.int64)
+        self.hscore = self.matches['hscore'].to_numpy(dtype=float)
+        self.ascore = self.matches['ascore'].to_numpy(dtype=float)
+        self.years = self.matches['year'].to_numpy()
+        self.multipliers = margin_multipliers(self.hscore, self.ascore, predictor.margin_factor, predictor.max_margin)
+        self.match_positions = {match_id: i for i, match_id in enumerate(self.matches['match_id'].tolist())}
+        self.params = {
+            'k_factor': predictor.k_factor,
+            'home_advantage': predictor.home_advantage,
+            'venue_k_factor': predictor.venue_k_factor
+        }
+
+        # Teams reported in the ratings (the model's teams plus any that first appear in the matches)
+        self.rated_teams = list(dict.fromkeys(list(predictor.team_ratings) + self.home_teams + self.away_teams))
+        self.rated_ids = np.array([teams.team_ids[team] for team in self.rated_teams], dtype=np.int64)
+
+        # Carryover is applied before the first match of each new season
+        self.season_starts = set((np.flatnonzero(np.diff(self.years)) + 1).tolist())
+        rounds = self.matches['round_number'].astype(str).to_numpy()
+        new_round = np.r_[True, (self.years[1:] != self.years[:-1]) | (rounds[1:] != rounds[:-1])]
+        self.snapshot_positions = np.flatnonzero(new_round)
+
+        n_snapshots = len(self.snapshot_positions)
+        self.snapshot_ratings = np.empty((n_snapshots, teams.size))
+        self.snapshot_venue_advantages = np.empty((n_snapshots, len(predictor.venue_advantages)))
+        self.snapshot_margin_sums = np.empty((n_snapshots, 4))
+
+        margin_sums = np.array([predictor.margin_sxx, predictor.margin_sxy, predictor.margin_syy, predictor.margin_n],
+                               dtype=float)
+        self.baseline_outputs = replay_outputs(len(self.matches))
+        self.baseline_ratings = self._replay(self.hscore, self.ascore, self.multipliers, 0,
+                                             predictor.get_ratings_array(), predictor.venue_advantages.copy(),
+                                             margin_sums, self.baseline_outputs, record_snapshots=True)
+
+    def _replay(self, hscore, ascore, multipliers, start, ratings, venue_advantages, margin_sums, outputs,
+                record_snapshots=False):
+        """Replay matches[start:] from the given state, returning the final ratings array"""
+        breaks = sorted(b for b in self.season_starts | set(self.snapshot_positions.tolist()) if b > start)
+        bounds = [start] + breaks + [len(self.matches)]
+        snapshot = np.searchsorted(self.snapshot_positions, start)
+
+        for block_start, block_end in zip(bounds[:-1], bounds[1:]):
+            if block_start > start and block_start in self.season_starts:
+                base = self.predictor.base_rating
+                ratings = base + self.predictor.season_carryover * (ratings - base)
+            if (record_snapshots and snapshot < len(self.snapshot_positions)
+                    and self.snapshot_positions[snapshot] == block_start):
+                self.snapshot_ratings[snapshot] = ratings
+                self.snapshot_venue_advantages[snapshot] = venue_advantages
+                self.snapshot_margin_sums[snapshot] = margin_sums
+                snapshot += 1
+            run_replay(self.kernel, self.home_idx, self.away_idx, self.venue_idx, hscore, ascore, multipliers,
+                       ratings, venue_advantages, margin_sums, self.params, outputs, block_start, block_end)
+
+        return ratings
+
+    def _check_match_ids(self, scenarios):
+        """Raise ValueError for empty scenarios or match IDs outside the replayed matches"""
+        if any(len(results) == 0 for results in scenarios):
+            raise ValueError("Each scenario needs at least one hypothetical result")
+        unknown = list(dict.fromkeys(match_id for results in scenarios for match_id in results
+                                     if match_id not in self.match_positions))
+        if unknown:
+            raise ValueError(f"Unknown match IDs (not among the {len(self.matches)} replayed matches): "
+                             f"{', '.join(str(match_id) for match_id in unknown)}")
+
+    def _scenario_result(self, first, hscore, ascore, final, baseline, outputs, baseline_outputs):
+        """Build a scenario's result from its final ratings and per-match outputs against the baseline's"""
+        changed = final != baseline
+        downstream = self.matches.iloc[first:]
+        predictions = pd.DataFrame({
+            'match_id': downstream['match_id'].to_numpy(),
+            'year': downstream['year'].to_numpy(),
+            'round_number': downstream['round_number'].to_numpy(),
+            'home_team': self.home_teams[first:],
+            'away_team': self.away_teams[first:],
+            'hscore': hscore[first:],
+            'ascore': ascore[first:],
+            'home_win_probability': outputs['probs'][first:],
+            'baseline_home_win_probability': baseline_outputs['probs'][first:],
+            'expected_margin': outputs['expected_margin'][first:],
+            'baseline_expected_margin': baseline_outputs['expected_margin'][first:]
+        })
+
+        return {
+            'ratings': dict(zip(self.rated_teams, final.tolist())),
+            'rating_changes': {team: change for team, change, moved in
+                               zip(self.rated_teams, (final - baseline).tolist(), changed) if moved},
+            'predictions': predictions
+        }
+
+    def run_scenario(self, results):
+        """
+        Recompute ratings and predictions with hypothetical results
+
+        Parameters:
+        -----------
+        results: dict
+            match_id -> (home score, away score) for each changed match
+            (unplayed matches can be given a result too)
+
+        Returns:
+        --------
+        dict with the scenario's final 'ratings', the 'rating_changes' against
+        the baseline for teams that moved, and a 'predictions' DataFrame for
+        every match from the earliest changed match onward
+
+        Raises ValueError if results is empty or names a match that is not
+        among the replayed matches.
+        """
+        self._check_match_ids([results])
+        positions = np.array([self.match_positions[match_id] for match_id in results], dtype=np.int64)
+        first = int(positions.min())
+
+        hscore = self.hscore.copy()
+        ascore = self.ascore.copy()
+        hscore[positions] = [float(scores[0]) for scores in results.values()]
+        ascore[positions] = [float(scores[1]) for scores in results.values()]
+        multipliers = self.multipliers.copy()
+        multipliers[positions] = margin_multipliers(hscore[positions], ascore[positions],
+                                                    self.predictor.margin_factor, self.predictor.max_margin)
+
+        # Start from the latest snapshot at or before the first changed match
+        snapshot = np.searchsorted(self.snapshot_positions, first, side='right') - 1
+        start = int(self.snapshot_positions[snapshot])
+        outputs = replay_outputs(len(self.matches))
+        ratings = self._replay(hscore, ascore, multipliers, start, self.snapshot_ratings[snapshot].copy(),
+                               self.snapshot_venue_advantages[snapshot].copy(),
+                               self.snapshot_margin_sums[snapshot].copy(), outputs)
+
+        return self._scenario_result(first, hscore, ascore, ratings[self.rated_ids],
+                                     self.baseline_ratings[self.rated_ids], outputs, self.baseline_outputs)
+
+    def run_scenarios(self, scenarios):
+        """
+        Evaluate a batch of scenarios (each a dict as taken by run_scenario)
+
+        Scenarios that restart from the same snapshot are replayed together
+        by the batch kernel, one member column per scenario. Every match
+        between the changed ones is replayed once for the whole group.
+
+        Returns:
+        --------
+        list of results as returned by run_scenario, in the order of scenarios
+        """
+        self._check_match_ids(scenarios)
+
+        groups = {}
+        for i, results in enumerate(scenarios):
+            first = min(self.match_positions[match_id] for match_id in results)
+            snapshot = int(np.searchsorted(self.snapshot_positions, first, side='right') - 1)
+            groups.setdefault(snapshot, []).append(i)
+
+        outcomes = [None] * len(scenarios)
+        for snapshot, members in groups.items():
+            for i, outcome in zip(members, self._replay_group(snapshot, [scenarios[i] for i in members])):
+                outcomes[i] = outcome
+        return outcomes
+
+    def _replay_group(self, snapshot, scenarios):
+        """
+        Replay scenarios that start from the same snapshot as columns of one batch
+
+        Column 0 keeps the actual results. The batch kernels can differ from
+        the single-model kernel in the last bit, so each scenario's rating
+        changes and baseline predictions are measured against that column.
+        """
+        n_matches = len(self.matches)
+        n_members = len(scenarios) + 1
+        hscore = np.repeat(self.hscore[:, None], n_members, axis=1)
+        ascore = np.repeat(self.ascore[:, None], n_members, axis=1)
+        firsts = []
+        for member, results in enumerate(scenarios, start=1):
+            positions = [self.match_positions[match_id] for match_id in results]
+            hscore[positions, member] = [float(scores[0]) for scores in results.values()]
+            ascore[positions, member] = [float(scores[1]) for scores in results.values()]
+            firsts.append(min(positions))
+
+        changed_positions = {self.match_positions[match_id] for results in scenarios for match_id in results}
+        changed = sorted(changed_positions)
+        multipliers = np.repeat(self.multipliers[:, None], n_members, axis=1)
+        multipliers[changed] = margin_multipliers(hscore[changed].ravel(), ascore[changed].ravel(),
+                                                  self.predictor.margin_factor,
+                                                  self.predictor.max_margin).reshape(len(changed), n_members)
+
+        start = int(self.snapshot_positions[snapshot])
+        ratings = np.repeat(self.snapshot_ratings[snapshot][:, None], n_members, axis=1)
+        venue_advantages = np.repeat(self.snapshot_venue_advantages[snapshot][:, None], n_members, axis=1)
+        margin_sums = np.repeat(self.snapshot_margin_sums[snapshot][:, None], n_members, axis=1)
+        params = {name: np.full(n_members, float(value)) for name, value in self.params.items()}
+        outputs = replay_outputs(n_matches, n_members)
+
+        # The changed matches are replayed on their own, so the blocks between them share the actual scores
+        breaks = self.season_starts | changed_positions | {position + 1 for position in changed}
+        bounds = [start] + sorted(b for b in breaks if start < b < n_matches) + [n_matches]
+        for block_start, block_end in zip(bounds[:-1], bounds[1:]):
+            if block_start > start and block_start in self.season_starts:
+                base = self.predictor.base_rating
+                ratings = base + self.predictor.season_carryover * (ratings - base)
+            if block_start in changed_positions:
+                self._replay_changed_match(block_start, hscore, ascore, multipliers, ratings, venue_advantages,
+                                           margin_sums, params, outputs)
+            else:
+                run_replay_batch(self.batch_kernel, self.home_idx, self.away_idx, self.venue_idx, self.hscore,
+                                 self.ascore, multipliers, ratings, venue_advantages, margin_sums, params, outputs,
+                                 block_start, block_end)
+
+        final = ratings[self.rated_ids]
+        baseline_outputs = {name: values[:, 0] for name, values in outputs.items()}
+        return [self._scenario_result(first, hscore[:, member], ascore[:, member], final[:, member], final[:, 0],
+                                      {name: values[:, member] for name, values in outputs.items()},
+                                      baseline_outputs)
+                for member, first in enumerate(firsts, start=1)]
+
+    def _replay_changed_match(self, position, hscore, ascore, multipliers, ratings, venue_advantages, margin_sums,
+                              params, outputs):
+        """Replay one match whose result differs between columns, once per distinct result"""
+        columns_by_result = {}
+        for member, result in enumerate(zip(hscore[position].tolist(), ascore[position].tolist())):
+            # NaN (unplayed) never equals itself, so key it as None
+            key = tuple(None if score != score else score for score in result)
+            columns_by_result.setdefault(key, []).append(member)
+
+        match = slice(position, position + 1)
+        for columns in columns_by_result.values():
+            member_ratings = ratings[:, columns]
+            member_venue_advantages = venue_advantages[:, columns]
+            member_margin_sums = margin_sums[:, columns]
+            member_outputs = replay_outputs(1, len(columns))
+            run_replay_batch(self.batch_kernel, self.home_idx[match], self.away_idx[match], self.venue_idx[match],
+                             hscore[match, columns[0]].copy(), ascore[match, columns[0]].copy(),
+                             multipliers[match][:, columns], member_ratings, member_venue_advantages,
+                             member_margin_sums, {name: values[columns] for name, values in params.items()},
+                             member_outputs, 0, 1)
+            ratings[:, columns] = member_ratings
+            venue_advantages[:, columns] = member_venue_advantages
+            margin_sums[:, columns] = member_margin_sums
+            for name, values in member_outputs.items():
+                outputs[name][position, columns] = values[0]
+
+
+def main():
+    """Main function to evaluate a what-if scenario"""
+    parser = argparse.ArgumentParser(description='Recompute AFL ELO ratings with hypothetical match results')
+    parser.add_argument('--start-year', type=int, required=True,
+                        help='Start year of the replay (as for afl_elo_predictions.py)')
+    parser.add_argument('--model-path', type=str, required=True,
+                        help='Path to the trained ELO model file (JSON or binary .elo)')
+    parser.add_argument('--db-path', type=str, default='data/afl_predictions.db',
+                        help='Path to the SQLite database')
+    parser.add_argument('--result', type=float, nargs=3, action='append', required=True,
+                        metavar=('MATCH_ID', 'HSCORE', 'ASCORE'),
+                        help='Hypothetical result for a match (repeat for several matches)')
+    parser.add_argument('--engine', type=str, default='auto', choices=['auto', 'numba', 'python', 'rounds'],
+                        help='Replay engine (auto uses numba when installed, otherwise the pure-Python array engine)')
+
+    args = parser.parse_args()
+
+    for path, label in [(args.db_path, 'Database'), (args.model_path, 'Model file')]:
+        if not os.path.exists(path):
+            print(f"Error: {label} not found at {path}")
+            return
+
+    predictor = AFLEloPredictor(args.model_path)
+    matches = fetch_matches(args.db_path, args.start_year)
+    whatif = AFLEloWhatIf(predictor, matches, engine=args.engine)
+
+    results = {int(match_id): (hscore, ascore) for match_id, hscore, ascore in args.result}
+    start_time = datetime.now()
+    try:
+        scenario = whatif.run_scenario(results)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return
+    elapsed = (datetime.now() - start_time).total_seconds() * 1000
+
+    print(f"\nScenario recomputed in {elapsed:.1f} ms")
+    print("\nRating changes against the actual results:")
+    for team, change in sorted(scenario['rating_changes'].items(), key=lambda x: x[1], reverse=True):
+        print(f"  {team}: {scenario['ratings'][team]:.1f} ({change:+.1f})")
+
+    predictions = scenario['predictions']
+    changed = predictions[predictions['home_win_probability'] != predictions['baseline_home_win_probability']]
+    print(f"\n{len(changed)} downstream predictions changed:")
+    for _, match in changed.iterrows():
+        print(f"  {match['year']} round {match['round_number']}: {match['home_team']} v {match['away_team']} - "
+              f"home win {match['home_win_probability']:.3f} (was {match['baseline_home_win_probability']:.3f})")
+
+
+if __name__ == "__main__":
+    main()
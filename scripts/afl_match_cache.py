@@ -0,0 +1,284 @@
+import glob
+import hashlib
+import json
+import os
+import re
+import argparse
+
+import numpy as np
+import pandas as pd
+
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'cache')
+
+# Manifest and pre-parsed yearly games live in a subdirectory of the cache
+INDEX_DIR = 'index'
+MANIFEST_FILE = 'manifest.json'
+# Completed games as of the last change report (readers refresh the manifest but never this)
+ACKNOWLEDGED_FILE = 'acknowledged.json'
+MANIFEST_VERSION = 1
+
+GAMES_FILE_PATTERN = re.compile(r'_q_games_year_(\d{4})\.json$')
+
+# Columns kept in the pre-parsed yearly binaries
+STRING_COLUMNS = ['roundname', 'date', 'venue', 'hteam', 'ateam', 'updated']
+INT_COLUMNS = ['id', 'year', 'round', 'hteamid', 'ateamid', 'complete', 'is_final', 'is_grand_final', 'unixtime']
+SCORE_COLUMNS = ['hscore', 'ascore', 'hgoals', 'hbehinds', 'agoals', 'abehinds']
+
+
+def _file_sha256(path):
+    """Content hash of a file"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _write_json(path, data):
+    """Write a JSON file atomically"""
+    with open(path + '.tmp', 'w') as f:
+        json.dump(data, f, indent=4)
+    os.replace(path + '.tmp', path)
+
+
+def _games_to_columns(games):
+    """
+    Convert Squiggle game dicts to column arrays
+
+    Scores of games that are not complete are stored as NaN (Squiggle
+    reports them as 0 or null until the game finishes).
+    """
+    complete = np.array([game.get('complete') or 0 for game in games], dtype=np.int64)
+    columns = {
+        name: np.array([game.get(name) or '' for game in games], dtype=str) for name in STRING_COLUMNS
+    }
+    columns.update({
+        name: np.array([game.get(name) if game.get(name) is not None else -1 for game in games], dtype=np.int64)
+        for name in INT_COLUMNS
+    })
+    columns.update({
+        name: np.where(complete == 100,
+                       np.array([game.get(name) if game.get(name) is not None else np.nan for game in games],
+                                dtype=float),
+                       np.nan)
+        for name in SCORE_COLUMNS
+    })
+    return columns
+
+
+def load_manifest(cache_dir=CACHE_DIR):
+    """Load the cache manifest (empty if it has not been built yet)"""
+    manifest_path = os.path.join(cache_dir, INDEX_DIR, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return {'version': MANIFEST_VERSION, 'years': {}}
+    with open(manifest_path, 'r') as f:
+        manifest = json.load(f)
+    if manifest.get('version') != MANIFEST_VERSION:
+        return {'version': MANIFEST_VERSION, 'years': {}}
+    return manifest
+
+
+def update_manifest(cache_dir=CACHE_DIR):
+    """
+    Bring the manifest and pre-parsed yearly binaries up to date with the cache
+
+    A file is only hashed when its size or modification time differs from
+    the manifest, and only re-parsed when its content hash has changed.
+    Every reader calls this, so the previous manifest is only the state as of
+    the last read; use check_new_completed_games to report changes.
+
+    Parameters:
+    -----------
+    cache_dir: str
+        Directory holding the cached Squiggle responses
+
+    Returns:
+    --------
+    tuple of (updated manifest, previous manifest, list of years that were re-parsed)
+    """
+    index_dir = os.path.join(cache_dir, INDEX_DIR)
+    os.makedirs(index_dir, exist_ok=True)
+    previous = load_manifest(cache_dir)
+    entries = dict(previous['years'])
+    reparsed = []
+
+    current_years = set()
+    for path in sorted(glob.glob(os.path.join(cache_dir, '*.json'))):
+        match = GAMES_FILE_PATTERN.search(os.path.basename(path))
+        if not match:
+            continue
+        year = match.group(1)
+        current_years.add(year)
+
+        stat = os.stat(path)
+        entry = entries.get(year)
+        binary_path = os.path.join(index_dir, f"games_{year}.npz")
+        if (entry and entry['file'] == os.path.basename(path) and entry['size'] == stat.st_size
+                and entry['mtime_ns'] == stat.st_mtime_ns and os.path.exists(binary_path)):
+            continue
+
+        sha256 = _file_sha256(path)
+        if entry and entry['sha256'] == sha256 and os.path.exists(binary_path):
+            # Touched but not changed
+            entries[year] = dict(entry, size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+            continue
+
+        with open(path, 'r', encoding='utf-8') as f:
+            games = json.load(f)['games']
+        columns = _games_to_columns(games)
+        np.savez(binary_path, **columns)
+        reparsed.append(int(year))
+
+        entries[year] = {
+            'file': os.path.basename(path),
+            'year': int(year),
+            'sha256': sha256,
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'games': len(games),
+            'completed_games': int(np.sum(columns['complete'] == 100)),
+            'max_updated': max(columns['updated'], default='')
+        }
+
+    # Drop years whose cache file has gone
+    for year in set(entries) - current_years:
+        del entries[year]
+
+    manifest = {'version': MANIFEST_VERSION, 'years': dict(sorted(entries.items()))}
+    manifest_path = os.path.join(index_dir, MANIFEST_FILE)
+    if manifest != previous or not os.path.exists(manifest_path):
+        _write_json(manifest_path, manifest)
+
+    return manifest, previous, reparsed
+
+
+def years_with_new_completed_games(manifest, previous):
+    """
+    Years with completed games that the previous manifest did not have
+
+    Compares completed game counts and the latest 'updated' timestamp, so
+    it never opens the cached JSON.
+
+    Returns:
+    --------
+    dict mapping year to the number of newly completed games (0 when only
+    existing results were updated)
+    """
+    changed = {}
+    for year, entry in manifest['years'].items():
+        before = previous['years'].get(year)
+        if before is None:
+            if entry['completed_games'] > 0:
+                changed[int(year)] = entry['completed_games']
+        elif (entry['completed_games'] != before['completed_games']
+              or (entry['max_updated'] > before['max_updated'] and entry['completed_games'] > 0)):
+            changed[int(year)] = max(entry['completed_games'] - before['completed_games'], 0)
+    return changed
+
+
+def check_new_completed_games(cache_dir=CACHE_DIR):
+    """
+    Refresh the manifest and report the years with completed games not reported before
+
+    Changes are measured against the state acknowledged by the previous
+    call, not against the manifest, so loading games in between (which also
+    refreshes the manifest) does not hide them. The first call after the
+    manifest was built without an acknowledged state compares against that
+    manifest as it was.
+
+    Parameters:
+    -----------
+    cache_dir: str
+        Directory holding the cached Squiggle responses
+
+    Returns:
+    --------
+    tuple of (updated manifest, changed years as returned by
+    years_with_new_completed_games, list of years that were re-parsed)
+    """
+    manifest, previous, reparsed = update_manifest(cache_dir)
+    acknowledged_path = os.path.join(cache_dir, INDEX_DIR, ACKNOWLEDGED_FILE)
+    if os.path.exists(acknowledged_path):
+        with open(acknowledged_path, 'r') as f:
+            acknowledged = json.load(f)
+    else:
+        acknowledged = previous
+
+    changed = years_with_new_completed_games(manifest, acknowledged)
+    _write_json(acknowledged_path, {
+        'version': MANIFEST_VERSION,
+        'years': {year: {'completed_games': entry['completed_games'], 'max_updated': entry['max_updated']}
+                  for year, entry in manifest['years'].items()}
+    })
+    return manifest, changed, reparsed
+
+
+def iter_games(years=None, cache_dir=CACHE_DIR):
+    """
+    Yield games from the pre-parsed yearly binaries one season at a time
+
+    Parameters:
+    -----------
+    years: iterable of int
+        Years to load (all years in the manifest if None)
+    cache_dir: str
+        Directory holding the cached Squiggle responses
+
+    Returns:
+    --------
+    generator of (year, pandas DataFrame) pairs, one row per game
+    """
+    manifest, _, _ = update_manifest(cache_dir)
+    if years is None:
+        years = [int(year) for year in manifest['years']]
+
+    for year in years:
+        if str(year) not in manifest['years']:
+            continue
+        with np.load(os.path.join(cache_dir, INDEX_DIR, f"games_{year}.npz")) as columns:
+            yield year, pd.DataFrame({name: columns[name] for name in columns.files})
+
+
+def load_games(years=None, cache_dir=CACHE_DIR):
+    """
+    Load games from the pre-parsed yearly binaries
+
+    Parameters:
+    -----------
+    years: iterable of int
+        Years to load (all years in the manifest if None)
+    cache_dir: str
+        Directory holding the cached Squiggle responses
+
+    Returns:
+    --------
+    pandas DataFrame with one row per game
+    """
+    frames = [games for _, games in iter_games(years, cache_dir)]
+    if not frames:
+        return pd.DataFrame(columns=STRING_COLUMNS + INT_COLUMNS + SCORE_COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
+
+def main():
+    """Main function to update the match cache manifest"""
+    parser = argparse.ArgumentParser(description='Index the cached Squiggle games')
+    parser.add_argument('--cache-dir', type=str, default=CACHE_DIR,
+                        help='Directory holding the cached API responses')
+
+    args = parser.parse_args()
+
+    manifest, changed, reparsed = check_new_completed_games(args.cache_dir)
+    print(f"Manifest covers {len(manifest['years'])} years, re-parsed {len(reparsed)}")
+
+    if changed:
+        print("Years with new or updated completed games:")
+        for year, count in sorted(changed.items()):
+            print(f"  {year}: {count} newly completed")
+    else:
+        print("No new completed games")
+
+
+if __name__ == "__main__":
+    main()
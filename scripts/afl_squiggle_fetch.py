@@ -0,0 +1,229 @@
+import asyncio
+import json
+import os
+import re
+import argparse
+from datetime import datetime
+
+import aiohttp
+
+from afl_match_cache import check_new_completed_games
+
+
+# Same endpoint, user agent and cache layout as scripts/sync-games.js
+BASE_API_URL = 'https://api.squiggle.com.au/'
+USER_AGENT = 'jason@jasoncollins.me'
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'cache')
+
+# ETag / Last-Modified validators for each cached URL
+STATE_FILE = 'squiggle_fetch_state.json'
+
+# Status codes worth retrying (rate limiting and server errors)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def games_url(year, base_url=BASE_API_URL):
+    """Squiggle games URL for a year"""
+    return f"{base_url}?q=games;year={year}"
+
+
+def cache_path_for_url(url, cache_dir=CACHE_DIR):
+    """Cache file for a URL, using the same mangled filename as sync-games.js"""
+    return os.path.join(cache_dir, re.sub(r'[^a-zA-Z0-9]', '_', url) + '.json')
+
+
+def load_fetch_state(cache_dir=CACHE_DIR):
+    """Load the saved ETag / Last-Modified validators for cached URLs"""
+    state_path = os.path.join(cache_dir, STATE_FILE)
+    if not os.path.exists(state_path):
+        return {}
+    with open(state_path, 'r') as f:
+        return json.load(f)
+
+
+def save_fetch_state(state, cache_dir=CACHE_DIR):
+    """Save the ETag / Last-Modified validators for cached URLs"""
+    with open(os.path.join(cache_dir, STATE_FILE), 'w') as f:
+        json.dump(state, f, indent=4, sort_keys=True)
+
+
+def _write_cache(cache_path, data):
+    """Write a response to the cache atomically, serialised like JSON.stringify"""
+    tmp_path = cache_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, separators=(',', ':'), ensure_ascii=False)
+    os.replace(tmp_path, cache_path)
+
+
+async def fetch_year(session, semaphore, year, state, cache_dir=CACHE_DIR, base_url=BASE_API_URL,
+                     retries=3, backoff=0.5):
+    """
+    Refresh the cached games for one year
+
+    Sends If-None-Match / If-Modified-Since when the year is already cached,
+    and retries connection errors, timeouts, 429 and 5xx responses with
+    exponential backoff.
+
+    Parameters:
+    -----------
+    session: aiohttp.ClientSession
+        Shared session (and connection pool)
+    semaphore: asyncio.Semaphore
+        Bounds the number of requests in flight
+    year: int
+        Season to refresh
+    state: dict
+        Validators by URL, updated in place
+    cache_dir: str
+        Directory holding the cache files
+    base_url: str
+        API base URL (overridable for a local stand-in server)
+    retries: int
+        Number of retries after the first attempt
+    backoff: float
+        Initial retry delay in seconds (doubles each retry)
+
+    Returns:
+    --------
+    dict with year, status ('updated', 'unchanged' or 'failed'), game count and error if any
+    """
+    url = games_url(year, base_url)
+    cache_path = cache_path_for_url(url, cache_dir)
+    validators = state.get(url, {}) if os.path.exists(cache_path) else {}
+
+    headers = {'User-Agent': USER_AGENT}
+    if validators.get('etag'):
+        headers['If-None-Match'] = validators['etag']
+    if validators.get('last_modified'):
+        headers['If-Modified-Since'] = validators['last_modified']
+
+    error = None
+    for attempt in range(retries + 1):
+        if attempt > 0:
+            await asyncio.sleep(backoff * 2 ** (attempt - 1))
+        try:
+            async with semaphore:
+                async with session.get(url, headers=headers) as response:
+                    if response.status == 304:
+                        return {'year': year, 'status': 'unchanged', 'games': None}
+                    if response.status in RETRY_STATUSES:
+                        error = f"HTTP {response.status}"
+                        continue
+                    if response.status != 200:
+                        return {'year': year, 'status': 'failed', 'games': None, 'error': f"HTTP {response.status}"}
+
+                    data = await response.json(content_type=None)
+                    etag = response.headers.get('ETag')
+                    last_modified = response.headers.get('Last-Modified')
+            break
+        except (aiohttp.ClientError, asyncio.TimeoutError, json.JSONDecodeError) as e:
+            error = f"{type(e).__name__}: {e}"
+    else:
+        return {'year': year, 'status': 'failed', 'games': None, 'error': error}
+
+    if not isinstance(data, dict) or 'games' not in data:
+        return {'year': year, 'status': 'failed', 'games': None, 'error': 'Invalid data structure received'}
+
+    state[url] = {key: value for key, value in [('etag', etag), ('last_modified', last_modified)] if value}
+
+    # Servers without validators still send the full body; skip the write if nothing changed
+    if os.path.exists(cache_path):
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            try:
+                if json.load(f) == data:
+                    return {'year': year, 'status': 'unchanged', 'games': len(data['games'])}
+            except json.JSONDecodeError:
+                pass
+
+    _write_cache(cache_path, data)
+    return {'year': year, 'status': 'updated', 'games': len(data['games'])}
+
+
+async def refresh_years(years, cache_dir=CACHE_DIR, base_url=BASE_API_URL, concurrency=4, retries=3,
+                        backoff=0.5, timeout=30):
+    """
+    Refresh the cached games for many years concurrently over one pooled session
+
+    Parameters:
+    -----------
+    years: iterable of int
+        Seasons to refresh
+    cache_dir: str
+        Directory holding the cache files
+    base_url: str
+        API base URL (overridable for a local stand-in server)
+    concurrency: int
+        Maximum number of requests (and pooled connections) in flight
+    retries: int
+        Number of retries per year after the first attempt
+    backoff: float
+        Initial retry delay in seconds
+    timeout: float
+        Total timeout per request in seconds
+
+    Returns:
+    --------
+    list of per-year result dicts (see fetch_year), in year order
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    state = load_fetch_state(cache_dir)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=timeout)) as session:
+        results = await asyncio.gather(*[
+            fetch_year(session, semaphore, year, state, cache_dir=cache_dir, base_url=base_url,
+                       retries=retries, backoff=backoff)
+            for year in years
+        ])
+
+    save_fetch_state(state, cache_dir)
+    return sorted(results, key=lambda result: result['year'])
+
+
+def main():
+    """Main function to refresh the Squiggle games cache"""
+    parser = argparse.ArgumentParser(description='Refresh cached Squiggle game data')
+    parser.add_argument('--start-year', type=int, default=datetime.now().year,
+                        help='First year to refresh (inclusive)')
+    parser.add_argument('--end-year', type=int, default=datetime.now().year,
+                        help='Last year to refresh (inclusive)')
+    parser.add_argument('--cache-dir', type=str, default=CACHE_DIR,
+                        help='Directory holding the cached API responses')
+    parser.add_argument('--base-url', type=str, default=BASE_API_URL,
+                        help='Squiggle API base URL')
+    parser.add_argument('--concurrency', type=int, default=4,
+                        help='Maximum number of concurrent requests')
+    parser.add_argument('--retries', type=int, default=3,
+                        help='Number of retries per year')
+
+    args = parser.parse_args()
+
+    print("Squiggle Cache Refresh")
+    print("======================")
+    print(f"Refreshing games from {args.start_year} to {args.end_year}")
+
+    start_time = datetime.now()
+    results = asyncio.run(refresh_years(range(args.start_year, args.end_year + 1), cache_dir=args.cache_dir,
+                                        base_url=args.base_url, concurrency=args.concurrency,
+                                        retries=args.retries))
+
+    for result in results:
+        if result['status'] == 'failed':
+            print(f"  {result['year']}: failed ({result['error']})")
+        elif result['status'] == 'updated':
+            print(f"  {result['year']}: updated ({result['games']} games)")
+
+    counts = {status: sum(1 for result in results if result['status'] == status)
+              for status in ['updated', 'unchanged', 'failed']}
+    print(f"\n{counts['updated']} updated, {counts['unchanged']} unchanged, {counts['failed']} failed "
+          f"in {(datetime.now() - start_time).total_seconds():.1f} seconds")
+
+    # Re-index the changed years
+    _, changed, _ = check_new_completed_games(args.cache_dir)
+    if changed:
+        print("Years with new or updated completed games: " + ", ".join(str(year) for year in sorted(changed)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+import numpy as np
+import pandas as pd
+
+
+# Stable integer IDs for each club, matching the Squiggle API team IDs
+TEAMS = {
+    'Adelaide': 1,
+    'Brisbane Lions': 2,
+    'Carlton': 3,
+    'Collingwood': 4,
+    'Essendon': 5,
+    'Fremantle': 6,
+    'Geelong': 7,
+    'Gold Coast': 8,
+    'Greater Western Sydney': 9,
+    'Hawthorn': 10,
+    'Melbourne': 11,
+    'North Melbourne': 12,
+    'Port Adelaide': 13,
+    'Richmond': 14,
+    'St Kilda': 15,
+    'Sydney': 16,
+    'West Coast': 17,
+    'Western Bulldogs': 18,
+    'Fitzroy': 19,
+    'University': 20
+}
+
+# Historical and alternative names that continue an existing club's ratings
+TEAM_ALIASES = {
+    'Adelaide Crows': 'Adelaide',
+    'Brisbane': 'Brisbane Lions',
+    'Brisbane Bears': 'Brisbane Lions',
+    'Geelong Cats': 'Geelong',
+    'Gold Coast Suns': 'Gold Coast',
+    'GWS': 'Greater Western Sydney',
+    'GWS Giants': 'Greater Western Sydney',
+    'Greater Western Sydney Giants': 'Greater Western Sydney',
+    'Kangaroos': 'North Melbourne',
+    'North Melbourne Kangaroos': 'North Melbourne',
+    'Port Adelaide Power': 'Port Adelaide',
+    'St. Kilda': 'St Kilda',
+    'South Melbourne': 'Sydney',
+    'Sydney Swans': 'Sydney',
+    'West Coast Eagles': 'West Coast',
+    'Footscray': 'Western Bulldogs'
+}
+
+
+def _normalise(name):
+    """Lookup key for a team name (case and whitespace insensitive)"""
+    return ' '.join(str(name).split()).lower()
+
+
+class TeamRegistry:
+    def __init__(self, teams=None, aliases=None):
+        """
+        Map team names and historical aliases to stable integer team IDs
+
+        Parameters:
+        -----------
+        teams: dict
+            Canonical team name -> integer ID (defaults to TEAMS)
+        aliases: dict
+            Alias -> canonical team name (defaults to TEAM_ALIASES)
+        """
+        self.team_ids = {}  # Canonical name -> ID
+        self.team_names = {}  # ID -> canonical name
+        self.lookup = {}  # Normalised name or alias -> canonical name
+
+        for name, team_id in (TEAMS if teams is None else teams).items():
+            self.add_team(name, team_id)
+        for alias, name in (TEAM_ALIASES if aliases is None else aliases).items():
+            self.add_alias(alias, name)
+
+    def add_team(self, name, team_id=None):
+        """Register a canonical team name, with the next free ID if none is given"""
+        if team_id is None:
+            team_id = max(self.team_names, default=0) + 1
+        self.team_ids[name] = team_id
+        self.team_names[team_id] = name
+        self.lookup[_normalise(name)] = name
+        return team_id
+
+    def add_alias(self, alias, name):
+        """Make an alias resolve to an existing team"""
+        self.lookup[_normalise(alias)] = self.canonical_name(name)
+
+    @property
+    def size(self):
+        """Length of an array indexed by team ID"""
+        return max(self.team_names, default=0) + 1
+
+    def canonical_name(self, name, register=True):
+        """
+        Canonical name for a team name or alias
+
+        Unknown names are registered as new teams (with a warning) unless
+        register is False, in which case None is returned.
+        """
+        canonical = self.lookup.get(_normalise(name))
+        if canonical is None and register:
+            team_id = self.add_team(name)
+            print(f"Warning: {name} is not a known team or alias, registered as new team ID {team_id}")
+            canonical = name
+        return canonical
+
+    def get_team_id(self, name, register=True):
+        """Integer ID for a team name or alias (None for unknown names when register is False)"""
+        canonical = self.canonical_name(name, register=register)
+        return None if canonical is None else self.team_ids[canonical]
+
+    def get_team_name(self, team_id):
+        """Canonical name for a team ID"""
+        return self.team_names[team_id]
+
+    def canonical_names(self, names):
+        """Canonical names for a sequence of team names, resolving each distinct name once"""
+        names = pd.Series(names)
+        mapping = {name: self.canonical_name(name) for name in names.dropna().unique()}
+        return names.map(mapping).to_numpy(dtype=object)
+
+    def get_team_ids(self, names):
+        """Integer IDs for a sequence of team names, resolving each distinct name once"""
+        return pd.Series(self.canonical_names(names)).map(self.team_ids).to_numpy(dtype=np.int64)
+
+    def copy(self):
+        """Independent copy (teams registered in one registry do not appear in the other)"""
+        registry = TeamRegistry.__new__(TeamRegistry)
+        registry.team_ids = dict(self.team_ids)
+        registry.team_names = dict(self.team_names)
+        registry.lookup = dict(self.lookup)
+        return registry
+
+    def to_dict(self):
+        """Canonical name -> ID mapping for storage alongside a model"""
+        return dict(sorted(self.team_ids.items(), key=lambda item: item[1]))
+
+    @classmethod
+    def from_dict(cls, team_ids):
+        """Registry with the default teams and aliases plus any teams stored with a model"""
+        registry = cls()
+        for name, team_id in (team_ids or {}).items():
+            if name not in registry.team_ids:
+                registry.add_team(name, team_id)
+        return registry
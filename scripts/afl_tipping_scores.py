@@ -0,0 +1,349 @@
+import os
+import time
+import sqlite3
+import argparse
+
+import numpy as np
+import pandas as pd
+
+
+# Predictor ID and name of the ELO model when it is scored alongside the users
+ELO_PREDICTOR_ID = -1
+ELO_PREDICTOR_NAME = 'ELO model'
+
+# Probabilities are clamped to this range before taking logs (as in services/scoring-service.js)
+BITS_MIN_PROBABILITY = 0.001
+
+# Leaderboard levels and the columns that identify a group at each level
+LEVELS = {
+    'overall': ['predictor_id'],
+    'season': ['year', 'predictor_id'],
+    'round': ['year', 'round_number', 'predictor_id']
+}
+
+
+def fetch_results(db_path, start_year=None, end_year=None):
+    """
+    Fetch completed matches in chronological order
+
+    Returns:
+    --------
+    pandas DataFrame with match_id, year, round_number, hscore and ascore
+    """
+    conditions = ["hscore IS NOT NULL", "ascore IS NOT NULL"]
+    params = []
+    if start_year:
+        conditions.append("year >= ?")
+        params.append(start_year)
+    if end_year:
+        conditions.append("year <= ?")
+        params.append(end_year)
+
+    conn = sqlite3.connect(db_path)
+    try:
+        return pd.read_sql_query(f"""
+        SELECT match_id, year, round_number, hscore, ascore
+        FROM matches
+        WHERE {' AND '.join(conditions)}
+        ORDER BY year, match_date, match_number
+        """, conn, params=params)
+    finally:
+        conn.close()
+
+
+def fetch_predictors(db_path):
+    """
+    Fetch the tipping competition's users
+
+    Returns:
+    --------
+    pandas DataFrame with predictor_id, name, display_name and is_admin
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        predictors = pd.read_sql_query("SELECT predictor_id, name, display_name, is_admin FROM predictors", conn)
+    finally:
+        conn.close()
+    predictors['display_name'] = predictors['display_name'].fillna(predictors['name'])
+    predictors['is_admin'] = predictors['is_admin'].fillna(0).astype(bool)
+    return predictors
+
+
+def fetch_tips(db_path):
+    """
+    Fetch every user prediction in one query
+
+    Only numeric columns are read (results and names are joined in by
+    array lookups), which keeps the read fast for large competitions.
+
+    Returns:
+    --------
+    pandas DataFrame with predictor_id, match_id, home_win_probability
+    (percent) and tipped_away (whether a 50% tip was for the away team)
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        # Older databases have no tipped_team column; the app then treats every tip as home
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(predictions)")]
+        tipped_away = "p.tipped_team = 'away'" if 'tipped_team' in columns else "0"
+        return pd.read_sql_query(f"""
+        SELECT p.predictor_id, p.match_id, p.home_win_probability, COALESCE({tipped_away}, 0) AS tipped_away
+        FROM predictions p
+        WHERE p.home_win_probability IS NOT NULL
+        """, conn)
+    finally:
+        conn.close()
+
+
+def elo_tips(predictions_file):
+    """
+    ELO model predictions as tips of a pseudo-user
+
+    Parameters:
+    -----------
+    predictions_file: str
+        Predictions CSV from afl_elo_predictions.py or afl_elo_training.py
+
+    Returns:
+    --------
+    pandas DataFrame in the layout of fetch_tips, with predictor ID ELO_PREDICTOR_ID
+    """
+    predictions = pd.read_csv(predictions_file, usecols=['match_id', 'home_win_probability']).dropna()
+    return pd.DataFrame({
+        'predictor_id': ELO_PREDICTOR_ID,
+        'match_id': predictions['match_id'].astype(np.int64),
+        'home_win_probability': predictions['home_win_probability'] * 100,
+        'tipped_away': 0
+    })
+
+
+def score_tips(tips, results):
+    """
+    Score every tip at once with the app's rules (services/scoring-service.js)
+
+    - Tip points: 1 for tipping the winner, 0 for a draw. A 50% tip counts
+      for the tipped team.
+    - Brier score: squared difference between the probability and the
+      outcome (1 home win, 0.5 draw, 0 away win). Lower is better.
+    - Bits: 1 + log2 of the probability given to the result, with
+      probabilities clamped to 0.1%-99.9%. For a draw the probability is
+      1 - |0.5 - p|. Higher is better.
+
+    Parameters:
+    -----------
+    tips: pandas DataFrame
+        Tips from fetch_tips (and elo_tips)
+    results: pandas DataFrame
+        Completed matches from fetch_results; tips for other matches are dropped
+
+    Returns:
+    --------
+    dict of arrays, one entry per scored tip: predictor_id, match (row in
+    results), tip_points, brier_score and bits_score
+    """
+    match_ids = results['match_id'].to_numpy(dtype=np.int64)
+    tip_match_ids = tips['match_id'].to_numpy(dtype=np.int64)
+    order = np.argsort(match_ids)
+    position = np.searchsorted(match_ids, tip_match_ids, sorter=order)
+    found = position < len(order)
+    found[found] = match_ids[order[position[found]]] == tip_match_ids[found]
+    match = order[position[found]]
+
+    percent = tips['home_win_probability'].to_numpy(dtype=float)[found]
+    tipped_away = tips['tipped_away'].to_numpy(dtype=bool)[found]
+    hscore = results['hscore'].to_numpy(dtype=float)[match]
+    ascore = results['ascore'].to_numpy(dtype=float)[match]
+
+    home_won = hscore > ascore
+    away_won = hscore < ascore
+    tie = hscore == ascore
+    outcome = np.where(home_won, 1.0, np.where(tie, 0.5, 0.0))
+
+    probability = percent / 100
+    safe = np.clip(probability, BITS_MIN_PROBABILITY, 1 - BITS_MIN_PROBABILITY)
+    result_probability = np.where(home_won, safe, np.where(away_won, 1 - safe, 1 - np.abs(0.5 - safe)))
+
+    tipped_winner = np.where(percent == 50, (home_won & ~tipped_away) | (away_won & tipped_away),
+                             (home_won & (percent > 50)) | (away_won & (percent < 50)))
+
+    return {
+        'predictor_id': tips['predictor_id'].to_numpy(dtype=np.int64)[found],
+        'match': match,
+        'tip_points': np.where(tie, 0, tipped_winner).astype(np.int64),
+        'brier_score': (probability - outcome) ** 2,
+        'bits_score': 1 + np.log2(result_probability)
+    }
+
+
+def _min_ranks(values, groups):
+    """Rank of each value within its group (1 = lowest, ties share the lower rank)"""
+    order = np.lexsort((values, groups))
+    sorted_values = values[order]
+    sorted_groups = groups[order]
+    positions = np.arange(len(order))
+    new_group = np.r_[True, sorted_groups[1:] != sorted_groups[:-1]]
+    new_value = new_group | np.r_[True, sorted_values[1:] != sorted_values[:-1]]
+    group_start = np.maximum.accumulate(np.where(new_group, positions, 0))
+    value_start = np.maximum.accumulate(np.where(new_value, positions, 0))
+    ranks = np.empty(len(order), dtype=np.int64)
+    ranks[order] = value_start - group_start + 1
+    return ranks
+
+
+def aggregate_scores(scored, results, predictors, level='season'):
+    """
+    Totals for every predictor at a leaderboard level
+
+    Tips are grouped with integer keys (np.unique) and summed with
+    np.bincount, so every group of a level is computed in one pass.
+
+    Parameters:
+    -----------
+    scored: dict of arrays
+        Tips from score_tips
+    results: pandas DataFrame
+        Completed matches passed to score_tips
+    predictors: pandas DataFrame
+        Users from fetch_predictors (the ELO model is named ELO_PREDICTOR_NAME)
+    level: str
+        'overall' (all seasons), 'season' or 'round'
+
+    Returns:
+    --------
+    pandas DataFrame with one row per group: the group columns, name,
+    display_name, is_admin, tips, tip_points, tip_accuracy (percent),
+    brier_score (mean), bits_score (total) and rank (by Brier score within
+    the season or round, as on the stats page)
+    """
+    # Small integer codes for each key column; rounds are numbered in order of play
+    years = results['year'].to_numpy(dtype=np.int64)
+    first_year = years.min() if len(years) else 0
+    round_codes, round_names = pd.factorize(results['round_number'].astype(str))
+    predictor_ids, predictor_codes = np.unique(scored['predictor_id'], return_inverse=True)
+    match = scored['match']
+    codes = {
+        'year': years[match] - first_year,
+        'round_number': round_codes[match],
+        'predictor_id': predictor_codes
+    }
+    sizes = {'year': int(codes['year'].max(initial=0)) + 1, 'round_number': len(round_names),
+             'predictor_id': len(predictor_ids)}
+
+    keys = LEVELS[level]
+    key = np.zeros(len(match), dtype=np.int64)
+    for column in keys:
+        key = key * sizes[column] + codes[column]
+    group_keys, first, group_ids = np.unique(key, return_index=True, return_inverse=True)
+    n_groups = len(group_keys)
+
+    def total(column):
+        return np.bincount(group_ids, weights=scored[column], minlength=n_groups)
+
+    tips = np.bincount(group_ids, minlength=n_groups)
+    tip_points = total('tip_points').astype(np.int64)
+    brier_score = total('brier_score') / tips
+
+    names = predictors.set_index('predictor_id')
+    group_predictors = predictor_ids[predictor_codes[first]]
+    table = {}
+    if 'year' in keys:
+        table['year'] = years[match[first]]
+    if 'round_number' in keys:
+        table['round_number'] = round_names[round_codes[match[first]]]
+    table['predictor_id'] = group_predictors
+    for column, default in [('name', ELO_PREDICTOR_NAME), ('display_name', ELO_PREDICTOR_NAME), ('is_admin', False)]:
+        table[column] = names[column].reindex(group_predictors).fillna(default).to_numpy()
+    table['tips'] = tips
+    table['tip_points'] = tip_points
+    table['tip_accuracy'] = tip_points / tips * 100
+    table['brier_score'] = brier_score
+    table['bits_score'] = total('bits_score')
+
+    # Rank within each season or round (group keys end with the predictor code)
+    parent = group_keys // sizes['predictor_id']
+    table['rank'] = _min_ranks(brier_score, parent)
+    table = pd.DataFrame(table)
+    return table.iloc[np.lexsort((table['rank'].to_numpy(), parent))].reset_index(drop=True)
+
+
+def leaderboards(tips, results, predictors, include_admins=False):
+    """
+    Score tips and build the overall, season and round leaderboards
+
+    Parameters:
+    -----------
+    tips: pandas DataFrame
+        Tips from fetch_tips (and elo_tips)
+    results: pandas DataFrame
+        Completed matches from fetch_results
+    predictors: pandas DataFrame
+        Users from fetch_predictors
+    include_admins: bool
+        Keep admin users (the stats page leaves them out)
+
+    Returns:
+    --------
+    dict mapping each level in LEVELS to its table from aggregate_scores
+    """
+    if not include_admins:
+        admins = predictors.loc[predictors['is_admin'], 'predictor_id']
+        tips = tips[~tips['predictor_id'].isin(admins)]
+    scored = score_tips(tips, results)
+    return {level: aggregate_scores(scored, results, predictors, level) for level in LEVELS}
+
+
+def main():
+    """Main function to recompute the tipping competition leaderboards"""
+    parser = argparse.ArgumentParser(description='Score every tip in the AFL predictions database')
+    parser.add_argument('--db-path', type=str, default='data/afl_predictions.db',
+                        help='Path to the SQLite database')
+    parser.add_argument('--start-year', type=int,
+                        help='First season to score (default: all)')
+    parser.add_argument('--end-year', type=int,
+                        help='Last season to score (default: all)')
+    parser.add_argument('--elo-predictions', type=str, nargs='+',
+                        help='ELO predictions CSVs to score as an extra predictor (later files take precedence '
+                             'for matches in more than one)')
+    parser.add_argument('--include-admins', action='store_true',
+                        help='Include admin users (left out of the stats page leaderboard)')
+    parser.add_argument('--output-dir', type=str,
+                        help='Save the overall, season and round leaderboards as CSVs in this directory')
+
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db_path):
+        print(f"Error: Database not found at {args.db_path}")
+        return
+
+    start = time.perf_counter()
+    results = fetch_results(args.db_path, args.start_year, args.end_year)
+    predictors = fetch_predictors(args.db_path)
+    tips = fetch_tips(args.db_path)
+    if args.elo_predictions:
+        elo = pd.concat([elo_tips(path) for path in args.elo_predictions])
+        tips = pd.concat([tips, elo.drop_duplicates('match_id', keep='last')], ignore_index=True)
+    fetched = time.perf_counter()
+    tables = leaderboards(tips, results, predictors, include_admins=args.include_admins)
+    scored = time.perf_counter()
+
+    overall = tables['overall']
+    print(f"Scored {overall['tips'].sum()} tips by {len(overall)} predictors in {(scored - start) * 1000:.0f} ms "
+          f"({(fetched - start) * 1000:.0f} ms reading, {(scored - fetched) * 1000:.0f} ms scoring)")
+
+    seasons = tables['season']
+    for year in sorted(seasons['year'].unique()):
+        print(f"\n{year} leaderboard:")
+        for row in seasons[seasons['year'] == year].itertuples():
+            print(f"  {row.rank:>3}. {row.display_name:<20} Brier {row.brier_score:.4f}  "
+                  f"Bits {row.bits_score:8.4f}  Tips {row.tip_points}/{row.tips} ({row.tip_accuracy:.1f}%)")
+
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+        for level, table in tables.items():
+            path = os.path.join(args.output_dir, f"afl_tipping_{level}_leaderboard.csv")
+            table.to_csv(path, index=False)
+            print(f"Saved {level} leaderboard to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+from afl_elo_fingerprint import PIPELINE_ENTRY_POINTS, pipeline_sources
+
+
+def test_pipeline_sources_follow_imports():
+    sources = pipeline_sources()
+    
+    assert set(PIPELINE_ENTRY_POINTS) <= set(sources)
+    for module in ['afl_elo_replay.py', 'afl_elo_model_file.py', 'afl_teams.py', 'afl_elo_calibration.py',
+                   'afl_elo_bootstrap.py', 'afl_elo_queue.py', 'afl_elo_checkpoints.py']:
+        assert module in sources
+    # Scripts that are not imported by the pipeline do not invalidate its outputs
+    assert 'afl_elo_whatif.py' not in sources
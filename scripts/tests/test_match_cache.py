@@ -0,0 +1,38 @@
+import json
+import os
+
+from afl_match_cache import check_new_completed_games, load_games
+
+
+def write_year(cache_dir, year, completed, scheduled=1):
+    games = [{'id': year * 100 + i, 'year': year, 'round': 1, 'hteam': 'Geelong', 'ateam': 'Carlton',
+              'hscore': 90, 'ascore': 70, 'complete': 100, 'updated': f"{year}-04-0{i + 1} 18:00:00"}
+             for i in range(completed)]
+    games += [{'id': year * 100 + 50 + i, 'year': year, 'round': 2, 'hteam': 'Richmond', 'ateam': 'Essendon',
+               'hscore': 0, 'ascore': 0, 'complete': 0, 'updated': f"{year}-03-01 12:00:00"}
+              for i in range(scheduled)]
+    path = os.path.join(cache_dir, f"https___api_squiggle_com_au__q_games_year_{year}.json")
+    with open(path, 'w') as f:
+        json.dump({'games': games}, f)
+
+
+def test_loading_games_does_not_hide_new_results(tmp_path):
+    cache_dir = str(tmp_path)
+    write_year(cache_dir, 2024, completed=2)
+
+    _, changed, reparsed = check_new_completed_games(cache_dir)
+    assert changed == {2024: 2}
+    assert reparsed == [2024]
+
+    # A reader refreshes the index after a result comes in, before the change report runs
+    write_year(cache_dir, 2024, completed=3, scheduled=0)
+    games = load_games([2024], cache_dir)
+    assert len(games) == 3
+    assert games['hscore'].notna().all()
+
+    _, changed, reparsed = check_new_completed_games(cache_dir)
+    assert changed == {2024: 1}
+    assert reparsed == []
+
+    _, changed, _ = check_new_completed_games(cache_dir)
+    assert changed == {}
@@ -0,0 +1,81 @@
+import json
+
+import pytest
+
+from afl_elo_training import train_elo_model, save_ensemble
+from afl_elo_predictions import AFLEloPredictor, save_upcoming_predictions
+
+from test_replay_engines import PARAMS, TEAMS, make_matches
+
+
+@pytest.fixture(scope='module')
+def ensemble_file(tmp_path_factory):
+    data = make_matches([2022, 2023], TEAMS, seed=3)
+    models = [train_elo_model(data, PARAMS, engine='python'),
+              train_elo_model(data, dict(PARAMS, k_factor=15, venue_k_factor=0), engine='python')]
+    path = tmp_path_factory.mktemp('ensemble') / 'afl_elo_ensemble_trained_to_2023.json'
+    save_ensemble(models, [2.0, 1.0], str(path))
+    return str(path)
+
+
+def test_ensemble_predict_match_matches_fixture_prediction(ensemble_file):
+    predictor = AFLEloPredictor(ensemble_file)
+    prediction = predictor.predict_match('Geelong', 'Carlton', year=2024, venue='M.C.G.')
+    _, fixtures = predictor.predict_fixtures([{'home_team': 'Geelong', 'away_team': 'Carlton', 'year': 2024,
+                                               'venue': 'M.C.G.'}])
+    
+    assert prediction == fixtures[0]
+    assert prediction['home_win_probability'] == pytest.approx(
+        predictor.calculate_win_probability('Geelong', 'Carlton', 'M.C.G.'))
+    assert predictor.predictions == [prediction]
+
+
+def test_ensemble_predict_match_unknown_team(ensemble_file):
+    predictor = AFLEloPredictor(ensemble_file)
+    teams = dict(predictor.team_ratings)
+    prediction = predictor.predict_match('Gold Coast', 'Carlton', venue='Nowhere Oval')
+    
+    assert prediction['pre_match_home_rating'] == pytest.approx(PARAMS['base_rating'])
+    assert predictor.team_ratings == teams
+
+
+@pytest.fixture(scope='module')
+def model_file(tmp_path_factory):
+    path = tmp_path_factory.mktemp('model') / 'afl_elo_trained_to_2023.json'
+    train_elo_model(make_matches([2022, 2023], TEAMS, seed=3), PARAMS, engine='python').save_model(str(path))
+    return str(path)
+
+
+def test_fixture_etag_covers_the_fixtures(model_file):
+    predictor = AFLEloPredictor(model_file)
+    fixtures_a = [{'home_team': 'Geelong', 'away_team': 'Carlton', 'match_id': 1}]
+    fixtures_b = [{'home_team': 'Richmond', 'away_team': 'Essendon', 'match_id': 2}]
+    
+    etag, _ = predictor.predict_fixtures(fixtures_a)
+    assert predictor.predict_fixtures(fixtures_a, if_none_match=etag) == (etag, None)
+    
+    other_etag, predictions = predictor.predict_fixtures(fixtures_b, if_none_match=etag)
+    assert other_etag != etag
+    assert [prediction['match_id'] for prediction in predictions] == [2]
+    
+    # A new result changes the tag of the same fixtures
+    predictor.update_ratings('Geelong', 'Carlton', 100, 50, year=2024)
+    new_etag, predictions = predictor.predict_fixtures(fixtures_a, if_none_match=etag)
+    assert new_etag != etag and predictions is not None
+
+
+def test_upcoming_predictions_rewritten_for_new_fixtures(model_file, tmp_path):
+    predictor = AFLEloPredictor(model_file)
+    filename = str(tmp_path / 'afl_elo_upcoming_predictions.json')
+    fixtures = [{'home_team': 'Geelong', 'away_team': 'Carlton', 'match_id': 1}]
+    
+    assert save_upcoming_predictions(predictor, fixtures, filename)
+    assert not save_upcoming_predictions(predictor, fixtures, filename)
+    
+    fixtures.append({'home_team': 'Richmond', 'away_team': 'Essendon', 'match_id': 2})
+    assert save_upcoming_predictions(predictor, fixtures, filename)
+    with open(filename) as f:
+        saved = json.load(f)
+    assert saved['etag'] == predictor.predict_fixtures(fixtures)[0]
+    assert saved['ratings_etag'] == predictor.ratings_etag()
+    assert len(saved['predictions']) == 2
@@ -0,0 +1,243 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from afl_elo_replay import ENGINES, available_engines, round_bounds
+from afl_elo_training import train_elo_model, parameter_tuning, cross_validate_batch
+from afl_elo_predictions import AFLEloPredictor, replay_predictions
+
+
+PARAMS = {
+    'base_rating': 1500,
+    'k_factor': 30,
+    'home_advantage': 40,
+    'margin_factor': 0.4,
+    'season_carryover': 0.7,
+    'max_margin': 80,
+    'venue_k_factor': 3
+}
+
+TEAMS = ['Geelong', 'Carlton', 'Collingwood', 'Richmond', 'Essendon', 'Hawthorn']
+
+VENUES = ['M.C.G.', 'Kardinia Park', 'Docklands', None]
+
+# Every array engine, with numba only where it is installed
+ARRAY_ENGINES = [
+    pytest.param(engine, marks=pytest.mark.skipif(engine not in available_engines(),
+                                                  reason='numba is not installed'))
+    for engine in ENGINES if engine != 'reference'
+]
+
+
+def make_matches(years, teams, rounds=4, seed=0, unplayed_from=None):
+    """
+    Round-robin fixture of matches over several seasons
+
+    Includes a draw in every season and matches without a venue. Matches from
+    the unplayed_from-th match of the last season onward have no scores.
+    """
+    rng = np.random.default_rng(seed)
+    rows = []
+    match_id = 1
+    for year in years:
+        for round_number in range(1, rounds + 1):
+            order = rng.permutation(len(teams))
+            for i in range(0, len(order) - 1, 2):
+                hscore, ascore = rng.integers(40, 130, size=2)
+                rows.append({
+                    'match_id': match_id,
+                    'match_number': match_id,
+                    'round_number': str(round_number),
+                    'match_date': f"{year}-{3 + round_number // 4:02d}-{1 + 7 * (round_number % 4) + i // 2:02d}",
+                    'venue': VENUES[match_id % len(VENUES)],
+                    'year': year,
+                    'hscore': float(hscore),
+                    'ascore': float(ascore),
+                    'home_team': teams[order[i]],
+                    'away_team': teams[order[i + 1]]
+                })
+                match_id += 1
+        # A draw in the second round of each season
+        draw = next(row for row in rows if row['year'] == year and row['round_number'] == '2')
+        draw['ascore'] = draw['hscore']
+    
+    matches = pd.DataFrame(rows)
+    if unplayed_from is not None:
+        last = np.flatnonzero(matches['year'] == years[-1])[unplayed_from:]
+        matches.loc[last, ['hscore', 'ascore']] = np.nan
+    return matches
+
+
+def make_irregular_matches(variant, years, seed=0):
+    """
+    Matches with the irregular rounds the rounds engine has to split
+
+    'bye': an odd number of teams, so one team sits out every round
+    'double': a team playing twice under one round number, as an opening
+    round listed with round 1 would
+    'venue': every match of a round at the same venue
+    'unplayed': a match without scores in the middle of every round of the
+    last season, before matches that were played
+    """
+    if variant == 'bye':
+        return make_matches(years, TEAMS[:5], seed=seed)
+    
+    matches = make_matches(years, TEAMS, seed=seed)
+    if variant == 'double':
+        # A second match for the first home team of round 1, after the rest of the round
+        extra = []
+        for year in years:
+            first_round = matches[(matches['year'] == year) & (matches['round_number'] == '1')]
+            extra.append(dict(first_round.iloc[-1], match_id=0, home_team=first_round['home_team'].iloc[0],
+                              away_team=first_round['away_team'].iloc[-1],
+                              match_date=f"{year}-03-{first_round['match_date'].str[-2:].astype(int).max() + 1:02d}"))
+        matches = pd.concat([matches, pd.DataFrame(extra)], ignore_index=True)
+        matches['match_id'] = matches['match_id'].where(matches['match_id'] > 0,
+                                                        matches['match_id'].max() + 1 + np.arange(len(matches)))
+        matches['match_number'] = matches['match_id']
+        matches = matches.sort_values(['year', 'match_date'], kind='stable').reset_index(drop=True)
+    elif variant == 'venue':
+        matches['venue'] = [VENUES[int(round_number) % 3] for round_number in matches['round_number']]
+    elif variant == 'unplayed':
+        middle = (matches['year'] == years[-1]) & (matches.groupby(['year', 'round_number']).cumcount() == 1)
+        matches.loc[middle, ['hscore', 'ascore']] = np.nan
+    return matches
+
+
+@pytest.fixture(scope='module')
+def training_data():
+    return make_matches([2021, 2022, 2023], TEAMS[:5] + ['Hawthorn'], seed=1)
+
+
+@pytest.fixture(scope='module')
+def prediction_matches():
+    # Gold Coast is not in the trained model, and one venue is new to it
+    matches = make_matches([2024, 2025], TEAMS[1:] + ['Gold Coast'], seed=2, unplayed_from=4)
+    matches.loc[matches.index[-1], 'venue'] = 'Nowhere Oval'
+    matches['match_date'] = pd.to_datetime(matches['match_date'])
+    return matches
+
+
+@pytest.fixture(scope='module')
+def model_file(training_data, tmp_path_factory):
+    path = tmp_path_factory.mktemp('model') / 'afl_elo_trained_to_2023.json'
+    train_elo_model(training_data, PARAMS, engine='reference').save_model(str(path))
+    return str(path)
+
+
+def predictions_frame(predictions):
+    return pd.DataFrame(predictions).set_index('match_id').sort_index()
+
+
+def assert_frames_match(actual, expected):
+    numeric = expected.select_dtypes('number').columns
+    pd.testing.assert_frame_equal(actual[numeric], expected[numeric], check_exact=False, rtol=1e-12, atol=1e-9)
+    other = expected.columns.difference(numeric)
+    pd.testing.assert_frame_equal(actual[other], expected[other])
+
+
+def assert_training_matches_reference(data, engine):
+    expected = train_elo_model(data, PARAMS, engine='reference')
+    model = train_elo_model(data, PARAMS, engine=engine)
+    
+    assert model.team_ratings.keys() == expected.team_ratings.keys()
+    for team, rating in expected.team_ratings.items():
+        assert model.team_ratings[team] == pytest.approx(rating, rel=1e-12)
+    np.testing.assert_allclose(model.venue_advantages, expected.venue_advantages, rtol=1e-12, atol=1e-9)
+    np.testing.assert_allclose(model.get_margin_model(), expected.get_margin_model(), rtol=1e-12)
+    assert model.yearly_ratings.keys() == expected.yearly_ratings.keys()
+    
+    # Probabilities, expected margins and rating changes of every match
+    assert_frames_match(predictions_frame(model.predictions), predictions_frame(expected.predictions))
+
+
+def assert_predictions_match_reference(model_file, matches, engine):
+    expected = AFLEloPredictor(model_file)
+    replay_predictions(expected, matches, engine='reference')
+    predictor = AFLEloPredictor(model_file)
+    replay_predictions(predictor, matches, engine=engine)
+    
+    assert predictor.team_ratings.keys() == expected.team_ratings.keys()
+    for team, rating in expected.team_ratings.items():
+        assert predictor.team_ratings[team] == pytest.approx(rating, rel=1e-12)
+    np.testing.assert_allclose(predictor.venue_advantages, expected.venue_advantages, rtol=1e-12, atol=1e-9)
+    np.testing.assert_allclose(predictor.get_margin_model(), expected.get_margin_model(), rtol=1e-12)
+    assert predictor.ratings_version == expected.ratings_version
+    
+    # Completed and unplayed matches alike
+    actual_predictions = predictions_frame(predictor.predictions)
+    expected_predictions = predictions_frame(expected.predictions)
+    assert len(expected_predictions) == len(matches)
+    assert_frames_match(actual_predictions, expected_predictions)
+    
+    # Carryover and match events in the same order
+    assert [event['event'] for event in predictor.rating_history] == \
+        [event['event'] for event in expected.rating_history]
+
+
+@pytest.mark.parametrize('engine', ARRAY_ENGINES)
+def test_training_matches_reference(training_data, engine):
+    assert_training_matches_reference(training_data, engine)
+
+
+@pytest.mark.parametrize('engine', ARRAY_ENGINES)
+def test_predictions_match_reference(model_file, prediction_matches, engine):
+    assert prediction_matches['hscore'].isna().sum() > 0
+    assert_predictions_match_reference(model_file, prediction_matches, engine)
+
+
+def test_irregular_rounds_are_split():
+    for variant, splits in [('bye', False), ('double', True), ('venue', True)]:
+        matches = make_irregular_matches(variant, [2022, 2023])
+        teams = {team: i for i, team in enumerate(TEAMS)}
+        venues = {venue: i for i, venue in enumerate(VENUES[:-1])}
+        home = matches['home_team'].map(teams).to_numpy()
+        away = matches['away_team'].map(teams).to_numpy()
+        venue = matches['venue'].map(venues).fillna(-1).astype(int).to_numpy()
+        rounds = len(round_bounds(home, away, venue)) - 1
+        assert (rounds > matches.groupby(['year', 'round_number']).ngroups) == splits
+
+
+@pytest.mark.parametrize('variant', ['bye', 'double', 'venue'])
+@pytest.mark.parametrize('engine', ARRAY_ENGINES)
+def test_irregular_rounds_training_match_reference(variant, engine):
+    assert PARAMS['venue_k_factor'] > 0
+    assert_training_matches_reference(make_irregular_matches(variant, [2021, 2022, 2023], seed=6), engine)
+
+
+@pytest.mark.parametrize('variant', ['bye', 'double', 'venue', 'unplayed'])
+@pytest.mark.parametrize('engine', ARRAY_ENGINES)
+def test_irregular_rounds_predictions_match_reference(model_file, variant, engine):
+    matches = make_irregular_matches(variant, [2024, 2025], seed=7)
+    matches['match_date'] = pd.to_datetime(matches['match_date'])
+    assert_predictions_match_reference(model_file, matches, engine)
+
+
+@pytest.fixture(scope='module')
+def reference_cv_results(training_data):
+    """Cross-validation scores from parameter_tuning's row-by-row reference replay"""
+    param_grid = {name: [value] for name, value in PARAMS.items()}
+    param_grid.update({'k_factor': [15, 30], 'season_carryover': [0.5, 0.7]})
+    results = parameter_tuning(training_data, param_grid, cv=3, engine='reference')['all_results']
+    return [result['params'] for result in results], results
+
+
+@pytest.mark.parametrize('engine', ARRAY_ENGINES)
+def test_cross_validation_matches_reference(training_data, reference_cv_results, engine):
+    params_list, expected = reference_cv_results
+    scores = cross_validate_batch(training_data, params_list, cv=3, engine=engine)
+    
+    for name in ['log_loss', 'cv_scores', 'margin_mae', 'cv_margin_maes', 'ece', 'cv_eces']:
+        np.testing.assert_allclose(scores[name], [result[name] for result in expected], rtol=1e-12, atol=1e-12)
+
+
+def test_numba_falls_back_without_numba(training_data, monkeypatch):
+    import afl_elo_replay
+    monkeypatch.setattr(afl_elo_replay, 'numba', None)
+    
+    assert afl_elo_replay.resolve_engine('numba') == 'python'
+    assert afl_elo_replay.resolve_engine('auto') == 'python'
+    expected = train_elo_model(training_data, PARAMS, engine='reference')
+    model = train_elo_model(training_data, PARAMS, engine='numba')
+    for team, rating in expected.team_ratings.items():
+        assert model.team_ratings[team] == pytest.approx(rating, rel=1e-12)
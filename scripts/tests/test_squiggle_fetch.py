@@ -0,0 +1,118 @@
+import asyncio
+import json
+import os
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip('aiohttp')
+
+from afl_squiggle_fetch import cache_path_for_url, games_url, load_fetch_state, refresh_years
+
+
+class StandInSquiggle:
+    """
+    Local stand-in for the Squiggle games endpoint
+
+    responses maps a year to the list of responses to give, in order (the
+    last one repeats): 'games' returns the year's games with its ETag (or
+    304 when the request already holds that ETag), and an int returns that
+    status with an empty body.
+    """
+
+    def __init__(self, games, responses):
+        self.games = games
+        self.responses = responses
+        self.requests = []
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                year = int(re.search(r'year=(\d+)', self.path).group(1))
+                stand_in.requests.append((year, dict(self.headers)))
+                queued = stand_in.responses[year]
+                response = queued.pop(0) if len(queued) > 1 else queued[0]
+                etag = f'"games-{year}"'
+
+                if response != 'games':
+                    self.send_response(response)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                elif self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.end_headers()
+                else:
+                    body = json.dumps({'games': stand_in.games[year]}).encode('utf-8')
+                    self.send_response(200)
+                    self.send_header('ETag', etag)
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}/"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def requests_for(self, year):
+        return [headers for requested, headers in self.requests if requested == year]
+
+
+@pytest.fixture
+def squiggle():
+    games = {year: [{'id': year * 10 + i, 'year': year, 'hteam': 'Geelong', 'ateam': 'Carlton',
+                     'hscore': 80 + i, 'ascore': 70, 'complete': 100} for i in range(3)]
+             for year in [2023, 2024]}
+    stand_in = StandInSquiggle(games, {2023: [503, 'games'], 2024: ['games']})
+    stand_in.thread.start()
+    yield stand_in
+    stand_in.server.shutdown()
+    stand_in.server.server_close()
+
+
+def refresh(squiggle, cache_dir, years, **kwargs):
+    return asyncio.run(refresh_years(years, cache_dir=cache_dir, base_url=squiggle.base_url, backoff=0, **kwargs))
+
+
+def test_etag_is_saved_and_sent_back(squiggle, tmp_path):
+    cache_dir = str(tmp_path)
+    url = games_url(2024, squiggle.base_url)
+
+    results = refresh(squiggle, cache_dir, [2024])
+
+    assert results == [{'year': 2024, 'status': 'updated', 'games': 3}]
+    with open(cache_path_for_url(url, cache_dir)) as f:
+        assert json.load(f) == {'games': squiggle.games[2024]}
+    assert load_fetch_state(cache_dir)[url] == {'etag': '"games-2024"'}
+
+    # The second refresh is a conditional request, answered with a 304
+    modified = os.path.getmtime(cache_path_for_url(url, cache_dir))
+    results = refresh(squiggle, cache_dir, [2024])
+
+    assert results == [{'year': 2024, 'status': 'unchanged', 'games': None}]
+    assert squiggle.requests_for(2024)[-1].get('If-None-Match') == '"games-2024"'
+    assert os.path.getmtime(cache_path_for_url(url, cache_dir)) == modified
+
+
+def test_server_errors_are_retried(squiggle, tmp_path):
+    results = refresh(squiggle, str(tmp_path), [2023, 2024])
+
+    assert [result['status'] for result in results] == ['updated', 'updated']
+    assert len(squiggle.requests_for(2023)) == 2
+    assert len(squiggle.requests_for(2024)) == 1
+
+
+def test_retries_give_up(squiggle, tmp_path):
+    squiggle.responses[2023] = [503]
+
+    results = refresh(squiggle, str(tmp_path), [2023], retries=2)
+
+    assert results == [{'year': 2023, 'status': 'failed', 'games': None, 'error': 'HTTP 503'}]
+    assert len(squiggle.requests_for(2023)) == 3
+    assert not os.path.exists(cache_path_for_url(games_url(2023, squiggle.base_url), str(tmp_path)))
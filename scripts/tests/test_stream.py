@@ -0,0 +1,39 @@
+import json
+import os
+
+import pandas as pd
+
+from afl_elo_stream import iter_cache_matches
+
+
+def write_year(cache_dir, year, games):
+    path = os.path.join(cache_dir, f"https___api_squiggle_com_au__q_games_year_{year}.json")
+    with open(path, 'w') as f:
+        json.dump({'games': games}, f)
+
+
+def game(game_id, year, hteam, ateam, complete=100):
+    return {'id': game_id, 'year': year, 'round': 1, 'roundname': 'Round 1', 'is_final': 0,
+            'date': f"{year}-03-{game_id % 28 + 1:02d} 19:40:00", 'unixtime': 0, 'venue': 'M.C.G.',
+            'hteam': hteam, 'ateam': ateam, 'hscore': 90 if complete else 0, 'ascore': 70 if complete else 0,
+            'complete': complete}
+
+
+def test_cache_matches_skip_fixtures_without_teams(tmp_path):
+    cache_dir = str(tmp_path)
+    for year in [2023, 2024, 2025]:
+        write_year(cache_dir, year, [
+            game(year * 10 + 1, year, 'Geelong', 'Carlton'),
+            game(year * 10 + 2, year, 'Richmond', 'Essendon', complete=0),
+            # A final whose teams are still to be decided
+            game(year * 10 + 3, year, None, None, complete=0)
+        ])
+
+    matches = pd.concat(iter_cache_matches(start_year=2024, completed_only=False, cache_dir=cache_dir))
+
+    assert matches['year'].tolist() == [2024, 2024, 2025, 2025]
+    assert matches['match_id'].tolist() == [20241, 20242, 20251, 20252]
+    assert (matches['home_team'] != '').all() and (matches['away_team'] != '').all()
+
+    matches = pd.concat(iter_cache_matches(end_year=2023, cache_dir=cache_dir))
+    assert matches['match_id'].tolist() == [20231]
@@ -0,0 +1,94 @@
+import pandas as pd
+import pytest
+
+from afl_elo_training import train_elo_model
+from afl_elo_predictions import AFLEloPredictor, replay_predictions
+from afl_elo_whatif import AFLEloWhatIf
+
+from test_replay_engines import ARRAY_ENGINES, PARAMS, TEAMS, make_matches
+
+
+@pytest.fixture(scope='module')
+def model_file(tmp_path_factory):
+    path = tmp_path_factory.mktemp('model') / 'afl_elo_trained_to_2023.json'
+    train_elo_model(make_matches([2022, 2023], TEAMS, seed=4), PARAMS, engine='python').save_model(str(path))
+    return str(path)
+
+
+@pytest.fixture(scope='module')
+def matches():
+    matches = make_matches([2024, 2025], TEAMS, seed=5, unplayed_from=6)
+    matches['match_date'] = pd.to_datetime(matches['match_date'])
+    return matches
+
+
+def scenarios(matches):
+    ids = matches['match_id'].tolist()
+    return [
+        {ids[0]: (100, 50)},
+        {ids[0]: (100, 50), ids[5]: (60, 60)},
+        {ids[1]: (40, 90)},
+        {ids[13]: (70, 80), ids[20]: (90, 30)},
+        # Unplayed in the actual results
+        {ids[-1]: (80, 75)}
+    ]
+
+
+@pytest.mark.parametrize('engine', ARRAY_ENGINES)
+def test_run_scenarios_matches_run_scenario(model_file, matches, engine):
+    whatif = AFLEloWhatIf(AFLEloPredictor(model_file), matches, engine=engine)
+    batch = whatif.run_scenarios(scenarios(matches))
+
+    for results, scenario in zip(scenarios(matches), batch):
+        expected = whatif.run_scenario(results)
+        assert scenario['ratings'].keys() == expected['ratings'].keys()
+        for team, rating in expected['ratings'].items():
+            assert scenario['ratings'][team] == pytest.approx(rating, rel=1e-12)
+        assert scenario['rating_changes'].keys() == expected['rating_changes'].keys()
+        for team, change in expected['rating_changes'].items():
+            assert scenario['rating_changes'][team] == pytest.approx(change, rel=1e-9, abs=1e-9)
+
+        predictions, expected_predictions = scenario['predictions'], expected['predictions']
+        assert predictions['match_id'].tolist() == expected_predictions['match_id'].tolist()
+        for column in ['home_win_probability', 'baseline_home_win_probability', 'expected_margin']:
+            assert predictions[column].to_numpy() == pytest.approx(expected_predictions[column].to_numpy(),
+                                                                   rel=1e-12, abs=1e-12)
+
+
+@pytest.mark.parametrize('batched', [False, True])
+def test_scenarios_match_full_replay(model_file, matches, batched):
+    whatif = AFLEloWhatIf(AFLEloPredictor(model_file), matches, engine='python')
+    if batched:
+        results = whatif.run_scenarios(scenarios(matches))
+    else:
+        results = [whatif.run_scenario(changes) for changes in scenarios(matches)]
+
+    for changes, scenario in zip(scenarios(matches), results):
+        # Replay every match from scratch with the reference engine and the changed scores
+        changed = matches.copy()
+        for match_id, (hscore, ascore) in changes.items():
+            changed.loc[changed['match_id'] == match_id, ['hscore', 'ascore']] = [float(hscore), float(ascore)]
+        predictor = AFLEloPredictor(model_file)
+        replay_predictions(predictor, changed, engine='reference')
+
+        assert scenario['ratings'].keys() == predictor.team_ratings.keys()
+        for team, rating in predictor.team_ratings.items():
+            assert scenario['ratings'][team] == pytest.approx(rating, rel=1e-12)
+
+        expected = pd.DataFrame(predictor.predictions).set_index('match_id')
+        predictions = scenario['predictions'].set_index('match_id')
+        # Every match from the earliest changed one (match IDs are in date order here)
+        assert predictions.index.tolist() == expected.index[expected.index >= min(changes)].tolist()
+        expected = expected.loc[predictions.index]
+        for column in ['home_win_probability', 'expected_margin']:
+            assert predictions[column].to_numpy() == pytest.approx(expected[column].to_numpy(), rel=1e-12, abs=1e-12)
+
+
+def test_unknown_match_ids(model_file, matches):
+    whatif = AFLEloWhatIf(AFLEloPredictor(model_file), matches, engine='python')
+    known = matches['match_id'].iloc[0]
+
+    with pytest.raises(ValueError, match='99999, 88888'):
+        whatif.run_scenarios([{known: (80, 70), 99999: (80, 70)}, {88888: (50, 60)}])
+    with pytest.raises(ValueError, match='99999'):
+        whatif.run_scenario({99999: (80, 70)})
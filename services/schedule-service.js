@@ -0,0 +1,62 @@
+// services/schedule-service.js
+const fs = require('fs');
+const path = require('path');
+const { logger } = require('../utils/logger');
+
+// Strength of schedule written by scripts/afl_elo_predictions.py
+const SCHEDULE_PATH = process.env.ELO_SCHEDULE_PATH ||
+  path.join(__dirname, '../data/afl_elo_strength_of_schedule.json');
+
+// Parsed file, reloaded when the file changes
+let cachedSchedule = null;
+let cachedModified = null;
+
+async function loadSchedule() {
+  let stats;
+  try {
+    stats = await fs.promises.stat(SCHEDULE_PATH);
+  } catch (error) {
+    logger.debug(`No strength of schedule file at ${SCHEDULE_PATH}`);
+    return null;
+  }
+
+  if (cachedSchedule && cachedModified === stats.mtimeMs) {
+    return cachedSchedule;
+  }
+
+  try {
+    const contents = await fs.promises.readFile(SCHEDULE_PATH, 'utf8');
+    cachedSchedule = JSON.parse(contents);
+    cachedModified = stats.mtimeMs;
+    logger.info(`Loaded strength of schedule (ratings ${cachedSchedule.etag}) from ${SCHEDULE_PATH}`);
+    return cachedSchedule;
+  } catch (error) {
+    logger.error('Error loading strength of schedule', {
+      path: SCHEDULE_PATH,
+      error: error.message
+    });
+    return null;
+  }
+}
+
+// Get strength of schedule for each team in a season, hardest schedule first
+async function getScheduleStrengthForYear(year) {
+  const schedule = await loadSchedule();
+  const teams = schedule && schedule.seasons ? schedule.seasons[String(year)] : null;
+
+  if (!teams) {
+    logger.debug(`No strength of schedule for year ${year}`);
+    return [];
+  }
+
+  // Teams yet to play this season go last
+  const sortKey = entry => (entry.schedule_index === null ? -Infinity : entry.schedule_index);
+
+  return Object.entries(teams)
+    .map(([team, entry]) => ({ team, ...entry }))
+    .sort((a, b) => sortKey(b) - sortKey(a));
+}
+
+module.exports = {
+  getScheduleStrengthForYear
+};